@@ -0,0 +1,59 @@
+"""
+Replay the odds history store through the arbitrage rule and report how the opportunities behaved.
+
+    python backtest.py --start 2025-01-01 --end 2025-04-15 --min-edge 0 0.01 0.02
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from common.odds_history import DEFAULT_HISTORY_PATH, OddsHistory
+from common.timeutil import to_epoch
+from nba.arbBacktest import run_backtest, summarize
+
+BACKTEST_DIR = 'arbOutput'
+
+
+def print_summary(min_edge, summary):
+    print(f"\nMin edge {min_edge:.1%}: {summary['windows']} arbitrage windows")
+    if not summary['windows']:
+        return
+    print(f"  Games: {summary['games']}, still open at the end: {summary['still_open']}")
+    print(f"  By venue: {summary['by_venue']}")
+    print(f"  Max edge %: " + ", ".join(f"p{q} {v}" for q, v in summary['max_edge_pct'].items()))
+    print(f"  Max edge histogram: {summary['max_edge_histogram']}")
+    print(f"  Open for (s): " + ", ".join(f"p{q} {v}" for q, v in summary['duration_s'].items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the arbitrage rule against stored odds history")
+    parser.add_argument("--db", default=DEFAULT_HISTORY_PATH, help="Odds history database")
+    parser.add_argument("--start", help="First time to replay (ISO date or time, UTC)")
+    parser.add_argument("--end", help="Last time to replay (ISO date or time, UTC)")
+    parser.add_argument("--min-edge", type=float, nargs="+", default=[0.0],
+                        help="Edges (1 - total probability) an arbitrage must beat; one report per value")
+    args = parser.parse_args()
+
+    history = OddsHistory(args.db)
+    started = time.perf_counter()
+    found = run_backtest(history, to_epoch(args.start), to_epoch(args.end), args.min_edge)
+    elapsed = time.perf_counter() - started
+
+    report = {
+        'start': args.start,
+        'end': args.end,
+        'elapsed_s': round(elapsed, 2),
+        'results': {str(min_edge): summarize(windows) for min_edge, windows in found.items()},
+    }
+    print(f"Replayed {args.db} in {elapsed:.2f}s")
+    for min_edge, windows in found.items():
+        print_summary(min_edge, report['results'][str(min_edge)])
+
+    os.makedirs(BACKTEST_DIR, exist_ok=True)
+    filename = os.path.join(BACKTEST_DIR, f"backtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    report['windows'] = {str(min_edge): [w._asdict() for w in windows] for min_edge, windows in found.items()}
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"\nSaved backtest report to {filename}")
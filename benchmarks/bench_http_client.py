@@ -0,0 +1,85 @@
+"""
+Connection reuse benchmark: bare requests.get versus the shared pooled http_client.
+
+Runs against a local plain-HTTP keep-alive stub and counts the TCP connections it accepts. Real
+upstreams are HTTPS, so each avoided connection also saves a TLS handshake on top of what this shows:
+    python benchmarks/bench_http_client.py --requests 300 --threads 4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.http_client import HttpClient
+
+
+class KeepAliveStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections open between requests
+    disable_nagle_algorithm = True  # Headers and body are separate writes, avoid delayed-ACK stalls
+    body = b'[{"id": "1", "title": "Bulls vs. Pistons"}]' * 20
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def timed(server, label, get, url, total, threads):
+    server.connections = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for response in executor.map(lambda _: get(url), range(total)):
+            response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:7.3f}s  {total / elapsed:8.0f} req/s  {server.connections:5} connections")
+    return elapsed
+
+
+def run(total, threads):
+    server = KeepAliveStubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/events"
+
+    client = HttpClient(host_pool_sizes={f"127.0.0.1:{server.server_port}": threads})
+
+    print(f"{total} GETs with {threads} thread(s)\n")
+    bare = timed(server, "bare requests.get", requests.get, url, total, threads)
+    pooled = timed(server, "pooled http_client.get", client.get, url, total, threads)
+    print(f"\nspeedup: {bare / pooled:.1f}x")
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="Number of GET requests per client")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent callers")
+    args = parser.parse_args()
+    run(args.requests, args.threads)
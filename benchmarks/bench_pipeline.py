@@ -0,0 +1,215 @@
+"""
+Throughput and peak memory of each scan stage on synthetic payloads, from today's slate to 100x it.
+
+    python benchmarks/bench_pipeline.py --scales 1 10 100
+
+Stages: Gamma snapshot filtering (get_nba_events_from_file), Gamma and Kalshi parsing,
+find_matching_games on snapshot files, in-memory matching with Kalshi, save_arbitrage_opportunities,
+and the odds server's /api/<sport>/odds route (server.sport_odds) both re-encoding and cached.
+Results are saved under benchmarks/results/ with the commit they ran on, and compared against
+the previous saved run so regressions show up between commits. No network is used.
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.payloads import (
+    BASE_BOOKS, BASE_GAMES, gamma_events, kalshi_game_events, make_slate, odds_api_games, odds_api_source,
+)
+from common.fx_rate import DEFAULT_EXCHANGE_RATE
+from common.json_stream import StreamingJsonArrayWriter
+from nba import nbaSimSearch
+from nba.getNBAevents import get_nba_events_from_file
+from secondaryMarkets.models import kalshi_games_from_api, polymarket_events_from_gamma
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+REGRESSION_THRESHOLD = 0.10  # Slower than this fraction versus the previous run is flagged
+GAMMA_PAGE_SIZE = 500  # Events per page, like the Gamma API's limit
+
+
+def measure(fn, repeat):
+    """(median seconds, best seconds, peak traced MB, result); memory is traced in a separate run"""
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times.sort()
+    return times[len(times) // 2], times[0], peak / 1e6, result
+
+
+def quiet():
+    """The stages log every game they look at; keep that out of the timings' output"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def load_server(db_path, source):
+    """The odds server app, with its shared cache in db_path and getOdds answering with source"""
+    os.environ["ODDS_CACHE_DB"] = db_path
+    sys.path.insert(0, os.path.join(REPO_ROOT, "server"))  # The server imports its modules the way it is started
+    import server as odds_server
+    import odds_api
+
+    odds_api.odds_cache.fetch = lambda sport: source
+    return odds_server
+
+
+def bench_scale(scale, n_books, repeat, workdir):
+    slate = make_slate(BASE_GAMES * scale)
+    mira_data = odds_api_games(slate, n_books)
+    kalshi_raw = kalshi_game_events(slate)
+
+    # Snapshot files laid out like jsonOutputs/, for the file-based stages
+    os.makedirs(os.path.join(workdir, "jsonOutputs"), exist_ok=True)
+    gamma_path = os.path.join(workdir, "jsonOutputs", "gamma_events.json")
+    n_gamma = 0
+    with StreamingJsonArrayWriter(gamma_path) as writer:
+        page = []
+        for event in gamma_events(slate):
+            page.append(event)
+            if len(page) == GAMMA_PAGE_SIZE:
+                writer.write_page(page)
+                n_gamma, page = n_gamma + len(page), []
+        writer.write_page(page)
+        n_gamma += len(page)
+
+    with quiet():
+        nba_events = get_nba_events_from_file(gamma_path)
+    with open(os.path.join(workdir, nbaSimSearch.POLYMARKET_NBA), "w") as f:
+        json.dump(nba_events, f, indent=4)
+    with open(os.path.join(workdir, nbaSimSearch.MIRA_NBA), "w") as f:
+        json.dump(mira_data, f, indent=4)
+
+    poly_events = list(polymarket_events_from_gamma(nba_events))
+    kalshi_events = list(kalshi_games_from_api(kalshi_raw, nbaSimSearch.resolve_team_name))
+    with quiet():
+        opportunities = nbaSimSearch.find_arbitrage_opportunities(mira_data, poly_events, kalshi_events)
+
+    odds_server = load_server(os.path.join(workdir, "odds_cache.sqlite3"), odds_api_source(slate, n_books))
+    client = odds_server.app.test_client()
+    url = f"/api/bench_{scale}x/odds"  # One sport per scale, so the shared cache never serves another scale's games
+
+    def served(reencode):
+        def request():
+            if reencode:
+                odds_server.encoded_odds.clear()
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+            return response
+        return request
+
+    stages = [
+        ("get_nba_events_from_file", n_gamma, lambda: get_nba_events_from_file(gamma_path)),
+        ("polymarket_events_from_gamma", len(nba_events), lambda: list(polymarket_events_from_gamma(nba_events))),
+        ("kalshi_games_from_api", len(kalshi_raw),
+         lambda: list(kalshi_games_from_api(kalshi_raw, nbaSimSearch.resolve_team_name))),
+        ("find_matching_games", len(slate), nbaSimSearch.find_matching_games),
+        ("find_arbitrage_opportunities", len(slate),
+         lambda: nbaSimSearch.find_arbitrage_opportunities(mira_data, poly_events, kalshi_events)),
+        ("save_arbitrage_opportunities", len(opportunities),
+         lambda: nbaSimSearch.save_arbitrage_opportunities(opportunities)),
+        ("server.sport_odds (re-encode)", len(slate), served(True)),
+        ("server.sport_odds (cached)", len(slate), served(False)),
+    ]
+
+    results = []
+    for name, items, fn in stages:
+        with quiet():
+            median, best, peak_mb, _ = measure(fn, repeat)
+        results.append({
+            "stage": name,
+            "scale": scale,
+            "games": len(slate),
+            "books": n_books,
+            "items": items,
+            "median_ms": round(median * 1000, 3),
+            "best_ms": round(best * 1000, 3),
+            "items_per_s": round(items / median, 1) if median > 0 else None,
+            "peak_mb": round(peak_mb, 2),
+        })
+        print(f"{name:<32} {scale:>5}x {items:>8} {median * 1000:>10.2f} {items / median if median else 0:>12.0f} {peak_mb:>9.2f}")
+    return results
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(previous_path, results):
+    with open(previous_path) as f:
+        previous = {(r["stage"], r["scale"], r["books"]): r for r in json.load(f)["results"]}
+    print(f"\nChange versus {os.path.basename(previous_path)}:")
+    for result in results:
+        before = previous.get((result["stage"], result["scale"], result["books"]))
+        if not before or not before["best_ms"]:
+            continue
+        # Best of the repetitions is the least noisy figure for short stages
+        change = result["best_ms"] / before["best_ms"] - 1
+        flag = "  <-- slower" if change > REGRESSION_THRESHOLD else ""
+        print(f"{result['stage']:<32} {result['scale']:>5}x {change:>+8.1%}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="Multiples of today's slate")
+    parser.add_argument("--books", type=int, default=BASE_BOOKS, help="Bookmakers per game")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per stage")
+    parser.add_argument("--no-save", action="store_true", help="Don't write the results file")
+    args = parser.parse_args()
+
+    # Offline: use the fallback CAD/USD rate instead of calling the exchange rate API
+    nbaSimSearch.get_exchange_rate = lambda: DEFAULT_EXCHANGE_RATE
+
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    cwd = os.getcwd()
+    os.chdir(workdir)  # find_matching_games and the report writer use paths relative to the repo root
+    try:
+        print(f"{'stage':<32} {'scale':>6} {'items':>8} {'median ms':>10} {'items/s':>12} {'peak MB':>9}")
+        results = []
+        for scale in args.scales:
+            results.extend(bench_scale(scale, args.books, args.repeat, workdir))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    previous = sorted(glob.glob(os.path.join(RESULTS_DIR, "bench_pipeline_*.json")))
+    if previous:
+        compare(previous[-1], results)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = git_commit()
+        path = os.path.join(RESULTS_DIR, f"bench_pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+        with open(path, "w") as f:
+            json.dump({
+                "commit": commit,
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved results to {path}")
@@ -0,0 +1,80 @@
+"""
+Timing comparison of the serial and concurrent Polymarket Gamma fetch paths.
+
+Runs against a local stub of the Gamma /events endpoint so no network or quota is needed:
+    python benchmarks/bench_polymarket_fetch.py --events 2500 --latency 0.15 --workers 1 4 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from secondaryMarkets.polymarket.polymarket import PolymarketAPI
+
+
+def make_stub_handler(total_events, latency):
+    class GammaStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            offset = int(query.get("offset", [0])[0])
+            limit = int(query.get("limit", [100])[0])
+
+            time.sleep(latency)  # Simulated upstream round-trip
+
+            events = [{"id": str(i), "title": f"Event {i}"} for i in range(offset, min(offset + limit, total_events))]
+            body = json.dumps(events).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return GammaStubHandler
+
+
+def run(total_events, latency, worker_counts):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub_handler(total_events, latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = []
+        for workers in worker_counts:
+            api = PolymarketAPI(max_workers=workers)
+            api.gammaAPI = f"http://127.0.0.1:{server.server_port}/events"
+            api.output_file = os.path.join(tmp_dir, f"gamma_events_{workers}.json")
+
+            start = time.perf_counter()
+            api.get_and_save_all_events()
+            elapsed = time.perf_counter() - start
+
+            with open(api.output_file, 'r') as f:
+                ids = [event["id"] for event in json.load(f)]
+            in_order = ids == [str(i) for i in range(total_events)]
+            results.append((workers, elapsed, len(ids), in_order))
+
+    server.shutdown()
+
+    print("\nworkers  seconds  events  in_order  speedup")
+    serial_time = results[0][1]
+    for workers, elapsed, count, in_order in results:
+        print(f"{workers:>7}  {elapsed:7.2f}  {count:6}  {str(in_order):>8}  {serial_time / elapsed:6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2500, help="Number of events served by the stub")
+    parser.add_argument("--latency", type=float, default=0.15, help="Seconds of simulated latency per page")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8], help="Worker counts to compare, first is the baseline")
+    args = parser.parse_args()
+    run(args.events, args.latency, args.workers)
@@ -0,0 +1,294 @@
+"""
+Load test of the odds server's /api/<sport>/odds route under concurrent pollers.
+
+    python benchmarks/load_server.py --modes dev gunicorn --concurrency 1 8 32 64 --duration 10
+
+Each mode starts server/server.py in a subprocess: "dev" is the Flask development server it
+runs by default, "gunicorn" is its production mode (--workers/--threads). getOdds is pointed
+at the local upstream simulator (simulator/upstream.py), so no Odds API quota is used and the
+payload size is set with --games/--books. At each concurrency level that many clients, each
+on its own keep-alive connection, poll the route back to back for --duration seconds.
+
+Reported per level: latency percentiles, throughput, errors, and the peak threads and resident
+memory of the server's process tree (read from /proc, so Linux only). Clients run in
+--client-processes processes so the load generator's GIL isn't the bottleneck; on a machine
+with few cores, clients and server compete for CPU and the numbers are only comparable with
+each other. Results are saved under benchmarks/results/ like bench_pipeline.py's.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit
+from benchmarks.payloads import BASE_BOOKS, BASE_GAMES
+from simulator.upstream import UpstreamSimulator, start_simulator
+
+SERVER_DIR = os.path.join(REPO_ROOT, "server")
+STARTUP_TIMEOUT = 30
+SAMPLE_INTERVAL = 0.2
+
+
+def start_server(mode, port, upstream_port, workdir, workers, threads):
+    """server.py in a subprocess, answering with the simulator's Odds API games; its output goes to <mode>.log"""
+    env = dict(os.environ, ODDS_API_BASE=f"http://127.0.0.1:{upstream_port}/oddsapi/v4", ODDSAPI="load-test",
+               ODDS_CACHE_DB=os.path.join(workdir, f"{mode}_cache.sqlite3"))
+    command = [sys.executable, "server.py", "--host", "127.0.0.1", "--port", str(port)]
+    if mode == "gunicorn":
+        command += ["--workers", str(workers), "--threads", str(threads)]
+    # A file rather than a pipe: the dev server logs every request, and a full pipe would stall it
+    with open(os.path.join(workdir, f"{mode}.log"), "w") as log:
+        return subprocess.Popen(command, cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_serving(process, url):
+    """First successful response (which also fills the odds cache), or None if the server never came up"""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            response = requests.get(url, timeout=5)
+            if response.status_code == 200:
+                return response
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    return None
+
+
+def process_tree(pid):
+    """pid and all its descendants"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, ()))
+    return tree
+
+
+def tree_usage(pid):
+    """(threads, resident MB) summed over the process tree"""
+    threads, rss_kb = 0, 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/status") as f:
+                for line in f:
+                    if line.startswith("Threads:"):
+                        threads += int(line.split()[1])
+                    elif line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return threads, rss_kb / 1024
+
+
+class UsageSampler(threading.Thread):
+    """Peak threads and memory of the server while a level runs"""
+
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak_threads = 0
+        self.peak_rss_mb = 0.0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            threads, rss_mb = tree_usage(self.pid)
+            self.peak_threads = max(self.peak_threads, threads)
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+            self._done.wait(SAMPLE_INTERVAL)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def drive(url, headers, clients, duration, start_at):
+    """
+    One client process: clients threads polling url until start_at + duration.
+    Returns (latencies in seconds, status counts, error count).
+    """
+    latencies, statuses, errors = [], Counter(), [0]
+    lock = threading.Lock()
+
+    def client():
+        session = requests.Session()
+        session.headers.update(headers)
+        own_latencies, own_statuses, own_errors = [], Counter(), 0
+        while time.time() < start_at:
+            time.sleep(0.001)
+        end_at = start_at + duration
+        while time.time() < end_at:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                response.content
+                own_latencies.append(time.perf_counter() - started)
+                own_statuses[response.status_code] += 1
+            except requests.exceptions.RequestException:
+                own_errors += 1
+        session.close()
+        with lock:
+            latencies.extend(own_latencies)
+            statuses.update(own_statuses)
+            errors[0] += own_errors
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, errors[0]
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run_level(pool, processes, url, headers, concurrency, duration, server_pid):
+    """Drive the server with concurrency clients spread over the client processes"""
+    shares = [concurrency // processes + (i < concurrency % processes) for i in range(processes)]
+    start_at = time.time() + 1.0  # Every client process starts together
+    sampler = UsageSampler(server_pid)
+    sampler.start()
+    futures = [pool.submit(drive, url, headers, share, duration, start_at) for share in shares if share]
+    latencies, statuses, errors = [], Counter(), 0
+    for future in futures:
+        part_latencies, part_statuses, part_errors = future.result()
+        latencies.extend(part_latencies)
+        statuses.update(part_statuses)
+        errors += part_errors
+    sampler.stop()
+
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status in (200, 304))
+    to_ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "ok": ok,
+        "errors": errors + len(latencies) - ok,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(ok / duration, 1),
+        "p50_ms": to_ms(percentile(latencies, 50)),
+        "p95_ms": to_ms(percentile(latencies, 95)),
+        "p99_ms": to_ms(percentile(latencies, 99)),
+        "max_ms": to_ms(latencies[-1] if latencies else None),
+        "server_threads": sampler.peak_threads,
+        "server_rss_mb": round(sampler.peak_rss_mb, 1),
+    }
+
+
+def run_mode(mode, args, upstream_port, pool, workdir):
+    port = args.port
+    url = f"http://127.0.0.1:{port}{args.path}"
+    process = start_server(mode, port, upstream_port, workdir, args.workers, args.threads)
+    try:
+        first = wait_until_serving(process, url)
+        if first is None:
+            with open(os.path.join(workdir, f"{mode}.log")) as log:
+                output = log.read().strip().splitlines()
+            print(f"{mode}: server did not start{': ' + output[-1] if output else ''}")
+            return []
+
+        # Pollers ask for gzip, and with --revalidate send the ETag they hold like the scanner's fetch_mira_odds does
+        headers = {"Accept-Encoding": "gzip"}
+        if args.revalidate and first.headers.get("ETag"):
+            headers["If-None-Match"] = first.headers["ETag"]
+        idle_threads, idle_rss = tree_usage(process.pid)
+        print(f"\n{mode}: {len(first.content)} byte payload, idle {idle_threads} threads / {idle_rss:.1f} MB")
+        print(f"{'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+              f"{'errors':>7} {'threads':>8} {'RSS MB':>8}")
+
+        results = []
+        for concurrency in args.concurrency:
+            result = run_level(pool, args.client_processes, url, headers, concurrency, args.duration, process.pid)
+            result.update(mode=mode, workers=args.workers if mode == "gunicorn" else 1,
+                          threads=args.threads if mode == "gunicorn" else None,
+                          idle_threads=idle_threads, idle_rss_mb=round(idle_rss, 1))
+            results.append(result)
+            print(f"{concurrency:>8} {result['throughput_rps']:>9.1f} {result['p50_ms']!s:>8} {result['p95_ms']!s:>8} "
+                  f"{result['p99_ms']!s:>8} {result['max_ms']!s:>8} {result['errors']:>7} "
+                  f"{result['server_threads']:>8} {result['server_rss_mb']:>8.1f}")
+        return results
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=("dev", "gunicorn"), default=["dev", "gunicorn"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64], help="Concurrent clients per level")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per level")
+    parser.add_argument("--path", default="/api/basketball_nba/odds", help="Route to poll")
+    parser.add_argument("--revalidate", action="store_true", help="Send If-None-Match, so unchanged odds are 304s")
+    parser.add_argument("--games", type=int, default=BASE_GAMES, help="Games in the odds payload")
+    parser.add_argument("--books", type=int, default=BASE_BOOKS, help="Bookmakers per game")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per gunicorn worker")
+    parser.add_argument("--client-processes", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Processes the clients are spread over")
+    parser.add_argument("--port", type=int, default=8181)
+    parser.add_argument("--no-save", action="store_true", help="Don't write the results file")
+    args = parser.parse_args()
+
+    if not os.path.isdir("/proc"):
+        print("Server threads and memory are read from /proc and will show as 0 on this platform")
+
+    simulator = start_simulator(UpstreamSimulator(games=args.games, books=args.books, gamma_events=0,
+                                                  kalshi_noise_events=0, odds_quota=10 ** 9))
+    workdir = tempfile.mkdtemp(prefix="load_server_")
+    results = []
+    # Spawned, not forked: this process already runs the simulator's threads
+    with ProcessPoolExecutor(max_workers=args.client_processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for mode in args.modes:
+            results.extend(run_mode(mode, args, simulator.server_address[1], pool, workdir))
+    simulator.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if results and not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = git_commit()
+        path = os.path.join(RESULTS_DIR, f"load_server_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+        with open(path, "w") as f:
+            json.dump({
+                "commit": commit,
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "settings": {key: value for key, value in vars(args).items() if key != "no_save"},
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved results to {path}")
@@ -0,0 +1,232 @@
+"""
+Synthetic venue payloads shaped like the committed jsonOutputs/ snapshots.
+
+Everything is derived from one slate of upcoming games, so the Gamma events, Odds API games and
+Kalshi games all describe the same matchups and the matcher pairs them the way it would live.
+scale=1 is about today's slate (8 games, 8 bookmakers); larger scales multiply the game count.
+The rest of the Gamma catalogue (~2,400 unrelated events) stays the same size at every scale.
+"""
+import copy
+import json
+import os
+import random
+from datetime import datetime, timezone
+
+from common.timeutil import EST, now_epoch
+from nba.nbaSimSearch import TEAM_NAME_MAPPING
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NBA_EVENTS_SAMPLE = os.path.join(REPO_ROOT, "jsonOutputs", "nbaEvents.json")
+
+BASE_GAMES = 8
+BASE_BOOKS = 8
+BOOKMAKERS = (
+    "FanDuel", "DraftKings", "BetMGM", "Caesars", "BetRivers", "LowVig.ag", "BetOnline.ag", "Bovada",
+    "MyBookie.ag", "BetUS", "Unibet", "PointsBet", "WynnBET", "SuperBook", "ESPN BET", "Fanatics",
+)
+EXTRA_MARKETS_PER_GAME = 4  # Spreads, totals and props listed with each Gamma game
+OTHER_EVENTS = 2400  # Non-NBA events in the Gamma catalogue, so filtering has real work to do
+
+TEAMS = list(TEAM_NAME_MAPPING.items())  # (full name, short name)
+KALSHI_CODES = {short: short[:3].upper() for _, short in TEAMS}
+
+
+def _market_template():
+    """A real Gamma market from the committed snapshot, or the fields the pipeline reads"""
+    try:
+        with open(NBA_EVENTS_SAMPLE) as f:
+            return json.load(f)[0]["markets"][0]
+    except (OSError, ValueError, IndexError, KeyError):
+        return {"id": "0", "question": "", "outcomes": "[]", "outcomePrices": "[]", "active": True, "closed": False}
+
+
+MARKET_TEMPLATE = _market_template()
+
+
+def make_slate(n_games, seed=0, start_ts=None):
+    """
+    Upcoming games as (away full name, home full name, commence_ts, fair home probability).
+    About 8 games a day at evening start times, starting tomorrow.
+    """
+    rng = random.Random(seed)
+    start_ts = start_ts or now_epoch() + 86400
+    slate = []
+    for g in range(n_games):
+        away, home = rng.sample(TEAMS, 2)
+        day, slot = divmod(g, BASE_GAMES)
+        commence_ts = start_ts + day * 86400 + slot * 1800
+        slate.append((away[0], home[0], commence_ts, rng.uniform(0.25, 0.75)))
+    return slate
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _gamma_market(market_id, question, outcomes, prices, updated_ts):
+    market = copy.deepcopy(MARKET_TEMPLATE)
+    market.update(
+        id=str(market_id),
+        question=question,
+        outcomes=json.dumps(outcomes),
+        outcomePrices=json.dumps([f"{price:.3f}" for price in prices]),
+        updatedAt=_iso(updated_ts),
+    )
+    return market
+
+
+def gamma_events(slate, seed=0, other_events=OTHER_EVENTS):
+    """
+    Raw Gamma /events records, generated lazily so large catalogues can be streamed to disk:
+    one NBA event per game (moneyline first), with other_events unrelated events spread between them.
+    """
+    rng = random.Random(seed)
+    short = dict(TEAMS)
+    now_ts = now_epoch()
+    for g, (away, home, commence_ts, fair) in enumerate(slate):
+        title = f"{short[away]} vs. {short[home]}"
+        poly_away = round(min(max(1 - fair + rng.uniform(-0.03, 0.03), 0.01), 0.99), 3)
+        updated_ts = min(commence_ts - 3600, now_ts)  # Quotes are never stamped in the future
+        markets = [_gamma_market(
+            100000 + g * 10, title, [short[away], short[home]], [poly_away, 1 - poly_away], updated_ts
+        )]
+        for m in range(EXTRA_MARKETS_PER_GAME):
+            line = rng.choice((-7.5, -4.5, 3.5, 215.5, 228.5))
+            markets.append(_gamma_market(
+                100000 + g * 10 + m + 1, f"{title}: {line:+}", ["Yes", "No"], [0.5, 0.5], updated_ts
+            ))
+        yield {
+            "id": str(10000 + g),
+            "title": title,
+            "ticker": f"nba-{short[away][:3].lower()}-{short[home][:3].lower()}-{datetime.fromtimestamp(commence_ts, EST):%Y-%m-%d}",
+            "slug": f"nba-{short[away][:3].lower()}-{short[home][:3].lower()}",
+            "description": f"In the upcoming NBA game: if the {away} win, the market will resolve to “{short[away]}”.",
+            "startDate": _iso(commence_ts - 7 * 86400),
+            "endDate": _iso(commence_ts),
+            "active": True,
+            "closed": False,
+            "tags": [{"label": "Sports", "slug": "sports"}, {"label": "NBA", "slug": "nba"}],
+            "markets": markets,
+        }
+
+        for other_id in range(1000000 + other_events * g // len(slate), 1000000 + other_events * (g + 1) // len(slate)):
+            yield {
+                "id": str(other_id),
+                "title": f"Will question {other_id} resolve Yes?",
+                "ticker": f"question-{other_id}",
+                "slug": f"question-{other_id}",
+                "description": "This market will resolve to Yes if the stated outcome happens.",
+                "startDate": _iso(commence_ts - 30 * 86400),
+                "endDate": _iso(commence_ts + 90 * 86400),
+                "active": True,
+                "closed": False,
+                "tags": [{"label": "Politics", "slug": "politics"}],
+                "markets": [_gamma_market(other_id, f"Question {other_id}", ["Yes", "No"], [0.4, 0.6], commence_ts)],
+            }
+
+
+def odds_api_games(slate, n_books=BASE_BOOKS, seed=0):
+    """The odds server's /api/basketball_nba/odds payload (miraNBAEvents.json)"""
+    rng = random.Random(seed)
+    books = [BOOKMAKERS[b % len(BOOKMAKERS)] + ("" if b < len(BOOKMAKERS) else f" {b}") for b in range(n_books)]
+    odds_data = {}
+    now_ts = now_epoch()
+    for g, (away, home, commence_ts, fair) in enumerate(slate, start=1):
+        bookmakers = []
+        for name in books:
+            update_ts = min(commence_ts - rng.randint(3600, 12 * 3600), now_ts - rng.randint(0, 600))
+            bookmakers.append({
+                "last_update": datetime.fromtimestamp(update_ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                "last_update_ts": update_ts,
+                "name": name,
+                "odds": {
+                    away: round(1 / (1 - fair + rng.uniform(0.01, 0.05)), 2),
+                    home: round(1 / (fair + rng.uniform(0.01, 0.05)), 2),
+                },
+            })
+        odds_data[f"Game {g}"] = {
+            "away_team": away,
+            "bookmakers": bookmakers,
+            "commence_time": datetime.fromtimestamp(commence_ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "commence_ts": commence_ts,
+            "home_team": home,
+            "missing_bookmakers": [],
+        }
+    return {"odds_data": odds_data, "remaining_requests": "480"}
+
+
+def odds_api_source(slate, n_books=BASE_BOOKS, seed=0):
+    """What getOdds returns for the same games, the input to the odds server"""
+    games = []
+    for game in odds_api_games(slate, n_books, seed)["odds_data"].values():
+        game = dict(game)
+        game.pop("missing_bookmakers")
+        games.append(game)
+    return {"games": games, "remaining_requests": "480"}
+
+
+def odds_api_raw(slate, n_books=BASE_BOOKS, seed=0):
+    """The Odds API's own /v4/sports/<sport>/odds response (h2h, decimal) that getOdds parses"""
+    games = []
+    for g, game in enumerate(odds_api_games(slate, n_books, seed)["odds_data"].values()):
+        games.append({
+            "id": f"{g:032x}",
+            "sport_key": "basketball_nba",
+            "sport_title": "NBA",
+            "commence_time": _iso(game["commence_ts"]),
+            "home_team": game["home_team"],
+            "away_team": game["away_team"],
+            "bookmakers": [{
+                "key": bookmaker["name"].lower().replace(" ", "").replace(".", "_"),
+                "title": bookmaker["name"],
+                "last_update": _iso(bookmaker["last_update_ts"]),
+                "markets": [{
+                    "key": "h2h",
+                    "last_update": _iso(bookmaker["last_update_ts"]),
+                    "outcomes": [{"name": team, "price": price} for team, price in bookmaker["odds"].items()],
+                }],
+            } for bookmaker in game["bookmakers"]],
+        })
+    return games
+
+
+def kalshi_game_events(slate, seed=0):
+    """KXNBAGAME events as the Kalshi /events?with_nested_markets=true API returns them"""
+    rng = random.Random(seed)
+    short = dict(TEAMS)
+    events = []
+    for away, home, commence_ts, fair in slate:
+        date_code = datetime.fromtimestamp(commence_ts, EST).strftime("%y%b%d").upper()
+        event_ticker = f"KXNBAGAME-{date_code}{KALSHI_CODES[short[away]]}{KALSHI_CODES[short[home]]}"
+        markets = []
+        for team, prob in ((away, 1 - fair), (home, fair)):
+            ask = min(max(round((prob + rng.uniform(-0.03, 0.04)) * 100), 1), 99)
+            markets.append({
+                "ticker": f"{event_ticker}-{KALSHI_CODES[short[team]]}",
+                "event_ticker": event_ticker,
+                "market_type": "binary",
+                "title": f"{short[away]} at {short[home]} Winner?",
+                "yes_sub_title": short[team],
+                "no_sub_title": short[team],
+                "close_time": _iso(commence_ts + 4 * 3600),
+                "expected_expiration_time": _iso(commence_ts + 3 * 3600),
+                "status": "active",
+                "response_price_units": "usd_cent",
+                "yes_bid": ask - 1,
+                "yes_ask": ask,
+                "no_bid": 99 - ask,
+                "no_ask": 101 - ask,
+                "last_price": ask,
+                "volume": rng.randint(1000, 100000),
+                "liquidity": rng.randint(10000, 1000000),
+            })
+        events.append({
+            "event_ticker": event_ticker,
+            "series_ticker": "KXNBAGAME",
+            "sub_title": f"{KALSHI_CODES[short[away]]} at {KALSHI_CODES[short[home]]}",
+            "title": f"{short[away]} at {short[home]}",
+            "mutually_exclusive": True,
+            "category": "Sports",
+            "markets": markets,
+        })
+    return events
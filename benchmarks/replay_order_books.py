@@ -0,0 +1,75 @@
+"""
+Replay recorded CLOB market-channel messages through OrderBookManager and print every cross.
+
+    python benchmarks/replay_order_books.py
+    python benchmarks/replay_order_books.py --replay books.jsonl --watch <token id>=0.52 --speed 10
+
+Recordings are what `main.py --daemon --book-record FILE` writes: one websocket frame per line.
+Without --replay it plays benchmarks/fixtures/clob_replay.jsonl, a short recording of both
+outcomes of one game whose best asks move below their thresholds and back, and exits non-zero
+if the crosses don't open and close in the recorded order.
+"""
+import argparse
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from secondaryMarkets.polymarket.orderbook import OrderBookManager, ReplayFeed
+
+FIXTURE = os.path.join(REPO_ROOT, "benchmarks", "fixtures", "clob_replay.jsonl")
+HOME = "71321045679252212594626385532706912750332728571942532289631379312455583992563"
+AWAY = "52114319501245915516055106046884209969926127482827954674443846427813813222426"
+FIXTURE_THRESHOLDS = {HOME: 0.52, AWAY: 0.45}
+FIXTURE_CROSSES = [(HOME, True), (HOME, False), (AWAY, True), (AWAY, False)]
+
+
+def parse_watch(value):
+    token_id, _, max_ask = value.rpartition("=")
+    if not token_id:
+        raise argparse.ArgumentTypeError(f"expected <token id>=<max ask>, got {value!r}")
+    return token_id, float(max_ask)
+
+
+def replay(path, thresholds, speed=0.0):
+    """(token id, is_open, best ask, levels) of every cross, in order, and the manager after the replay"""
+    crosses = []
+
+    def on_cross(token_id, asks, is_open):
+        crosses.append((token_id, is_open, asks[0][0] if asks else None, len(asks)))
+
+    manager = OrderBookManager(thresholds, on_cross)
+    for token_id, max_ask in thresholds.items():
+        manager.watch(token_id, max_ask)
+    manager.run(ReplayFeed(path, speed))
+    return crosses, manager
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replay", help="JSONL recording to play (default: the bundled fixture)")
+    parser.add_argument("--watch", type=parse_watch, action="append", default=[], metavar="TOKEN=MAX_ASK",
+                        help="Watch a token with the highest ask that is still an arbitrage (repeatable)")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Replay the recorded gaps divided by this (default: as fast as possible)")
+    args = parser.parse_args()
+
+    path = args.replay or FIXTURE
+    thresholds = dict(args.watch) if args.watch else (FIXTURE_THRESHOLDS if not args.replay else {})
+    if not thresholds:
+        parser.error("pass the tokens to watch with --watch")
+
+    crosses, manager = replay(path, thresholds, args.speed)
+    print(f"{manager.messages} book messages applied from {path}")
+    for token_id, is_open, best_ask, levels in crosses:
+        print(f"  {token_id[:12]}... {'OPEN ' if is_open else 'CLOSE'} best ask {best_ask} "
+              f"({levels} levels, threshold {thresholds[token_id]})")
+    for token_id in thresholds:
+        print(f"  final {manager.book(token_id)}")
+
+    if not args.replay and not args.watch:
+        if [(token_id, is_open) for token_id, is_open, _, _ in crosses] != FIXTURE_CROSSES:
+            print("Crosses don't match the fixture's expected open/close sequence")
+            sys.exit(1)
+        print("Fixture crosses open and close as expected")
@@ -0,0 +1,218 @@
+"""
+Background Discord webhook delivery.
+
+send() only queues a message and returns, so scanning never waits on alerts. A worker thread
+packs queued messages into as few posts as fit Discord's 2000-character limit, and paces the
+posts with a token bucket. The bucket starts at the webhook default of 5 posts per 2 seconds
+and then follows the X-RateLimit-* headers of each response. A 429 is retried after the delay
+Discord advises.
+"""
+import queue
+import threading
+import time
+
+from common.http_client import http_client
+from common.metrics import metrics
+
+MESSAGE_LIMIT = 2000
+CODE_FENCE = "```"
+
+
+class RateLimitBucket:
+    """Token bucket fed by Discord's X-RateLimit-Remaining / X-RateLimit-Reset-After headers"""
+
+    def __init__(self, capacity=5, period=2.0):
+        self.capacity = capacity
+        self.period = period
+        self.tokens = capacity
+        self.reset_at = time.monotonic() + period
+
+    def wait(self):
+        """Block the worker (never the caller of send) until a post is allowed"""
+        while True:
+            now = time.monotonic()
+            if now >= self.reset_at:
+                self.tokens = self.capacity
+                self.reset_at = now + self.period
+            if self.tokens > 0:
+                self.tokens -= 1
+                return
+            time.sleep(self.reset_at - now)
+
+    def update(self, headers):
+        try:
+            limit = headers.get("X-RateLimit-Limit")
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset_after = headers.get("X-RateLimit-Reset-After")
+            if limit is not None:
+                self.capacity = int(limit)
+            if remaining is not None:
+                self.tokens = int(remaining)
+            if reset_after is not None:
+                self.reset_at = time.monotonic() + float(reset_after)
+        except ValueError:
+            pass
+
+    def block_for(self, seconds):
+        self.tokens = 0
+        self.reset_at = time.monotonic() + seconds
+
+
+def split_long(text, limit):
+    """Split text on line boundaries into pieces of at most limit characters"""
+    pieces, current = [], ""
+    for line in text.split("\n"):
+        while len(line) > limit:  # A single line over the limit is cut hard
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            pieces.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def pack_messages(items, limit=MESSAGE_LIMIT):
+    """
+    Pack (text, code_block) items, in order, into as few Discord messages as fit the limit.
+    Consecutive code-block items share one fence.
+    """
+    messages = []
+    current, current_code = [], None
+
+    def flush():
+        if current:
+            body = "\n".join(current)
+            messages.append(f"{CODE_FENCE}{body}{CODE_FENCE}" if current_code else body)
+            current.clear()
+
+    for text, code_block in items:
+        text = text.strip("\n")
+        if not text.strip():
+            continue
+        room = limit - (2 * len(CODE_FENCE) if code_block else 0)
+        for piece in split_long(text, room):
+            used = len("\n".join(current))
+            if code_block != current_code or (current and used + 1 + len(piece) > room):
+                flush()
+                current_code = code_block
+            current.append(piece)
+    flush()
+    return messages
+
+
+class DiscordNotifier:
+    def __init__(self, webhook_url, max_retries=5, batch_wait=0.5):
+        self.webhook_url = webhook_url
+        self.max_retries = max_retries
+        self.batch_wait = batch_wait  # How long to gather more items before posting
+        self.bucket = RateLimitBucket()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+
+    def send(self, content, code_block=True):
+        """Queue a message; returns immediately"""
+        if not content or not content.strip():
+            return
+        self._ensure_worker()
+        self._queue.put((content, code_block))
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="discord-notifier", daemon=True)
+                self._thread.start()
+
+    def _drain(self):
+        """Block for the first item, then collect whatever else arrives within batch_wait"""
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while items[-1] is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._drain()
+            stop_after = any(item is None for item in items)
+            items = [item for item in items if item is not None]
+            try:
+                for message in pack_messages(items):
+                    self._post(message)
+            finally:
+                for _ in range(len(items) + stop_after):
+                    self._queue.task_done()
+            if stop_after:
+                return
+
+    def _post(self, message):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.wait()
+            started = time.perf_counter()
+            try:
+                response = http_client.post(self.webhook_url, json={"content": message})
+            except Exception as e:
+                print(f"Failed to send Discord message: {e}")
+                metrics.incr("webhook_posts_total", status="error")
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            metrics.observe("webhook_seconds", time.perf_counter() - started)
+            metrics.incr("webhook_posts_total", status=response.status_code)
+
+            self.bucket.update(response.headers)
+            if response.status_code == 429:
+                retry_after = self._retry_after(response)
+                print(f"Discord rate limited, retrying in {retry_after:.2f}s")
+                self.bucket.block_for(retry_after)
+                continue
+            if response.status_code in (200, 204):
+                self.sent += 1
+                return
+            print(f"Failed to send Discord message: {response.status_code}")
+            if response.status_code < 500:
+                break  # Bad request, retrying won't help
+            time.sleep(min(2 ** attempt, 30))
+        self.failed += 1
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.json().get("retry_after"))
+        except (ValueError, TypeError, AttributeError):
+            pass
+        try:
+            return float(response.headers.get("Retry-After", 1))
+        except ValueError:
+            return 1.0
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far has been delivered (or given up on). Returns True if it was."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._queue.join(), done.set()), daemon=True).start()
+        return done.wait(timeout)
+
+    def close(self, timeout=30):
+        """Deliver what is queued (waiting at most timeout seconds) and stop the worker"""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+
+from common.http_client import http_client
+
+DEFAULT_EXCHANGE_RATE = 0.73
+EXCHANGE_RATE_API = os.getenv("EXCHANGE_RATE_API", "https://api.exchangerate-api.com/v4/latest/CAD")
+
+
+class ExchangeRateProvider:
+    """
+    CAD to USD rate with a TTL cache and stale-while-revalidate refresh.
+
+    The first call fetches the rate (blocking once; concurrent first callers wait for that one
+    fetch instead of making their own). After that callers always get the cached
+    value immediately; once it is older than ttl a single background thread refreshes it. If a
+    fetch fails the last good rate is kept, or DEFAULT_EXCHANGE_RATE is used until a retry
+    succeeds retry_after seconds later.
+    """
+
+    def __init__(self, url=EXCHANGE_RATE_API, ttl=3600, retry_after=60, timeout=5, default=DEFAULT_EXCHANGE_RATE):
+        self.url = url
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self.default = default
+        self._rate = None
+        self._expires_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._first_fetch = threading.Lock()  # Held by the one caller doing the blocking first fetch
+
+    def get_rate(self):
+        with self._lock:
+            rate = self._rate
+            revalidate = rate is not None and time.monotonic() >= self._expires_at and not self._refreshing
+            if revalidate:
+                self._refreshing = True
+
+        if rate is None:
+            with self._first_fetch:
+                with self._lock:
+                    rate = self._rate
+                if rate is not None:
+                    return rate  # Another caller fetched it while we waited
+                return self.refresh()
+        if revalidate:
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+        return rate
+
+    def refresh(self):
+        """Fetch a fresh rate now, blocking the caller."""
+        rate = self._fetch()
+        with self._lock:
+            self._store(rate)
+            return self._rate
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _store(self, rate):
+        if rate is not None:
+            self._rate = rate
+            self._expires_at = time.monotonic() + self.ttl
+            return
+
+        if self._rate is None:
+            print(f"Using default CAD/USD rate of {self.default}")
+            self._rate = self.default
+        self._expires_at = time.monotonic() + self.retry_after
+
+    def _fetch(self):
+        try:
+            response = http_client.get(self.url, timeout=self.timeout)
+            if response.status_code == 200:
+                return float(response.json()['rates']['USD'])
+        except Exception as e:
+            print(f"Warning: Could not fetch exchange rate: {e}")
+        return None
+
+
+# Shared by every arbitrage calculation in the process
+fx_rates = ExchangeRateProvider()
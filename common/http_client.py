@@ -0,0 +1,91 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds, used whenever a caller doesn't pass its own
+DEFAULT_TIMEOUT = (3.05, 30)
+DEFAULT_POOL_SIZE = 10
+
+# Hosts we hit with several requests in flight at once get bigger keep-alive pools
+HOST_POOL_SIZES = {
+    "gamma-api.polymarket.com": 16,
+    "trading-api.kalshi.com": 8,
+    "api.the-odds-api.com": 8,
+}
+
+
+class HttpClient:
+    """
+    Shared HTTP client so every fetcher reuses keep-alive connections instead of paying a new
+    TCP/TLS handshake on each call through bare requests.get/requests.post.
+
+    Each host gets its own adapter (and so its own connection pool) sized from HOST_POOL_SIZES or
+    configure_host, and every request gets DEFAULT_TIMEOUT unless the caller passes a timeout.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE, host_pool_sizes=None):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.host_pool_sizes = dict(HOST_POOL_SIZES if host_pool_sizes is None else host_pool_sizes)
+        self._session = self._new_session()
+        self._mounted = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_session():
+        session = requests.Session()
+        session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        return session
+
+    def configure_host(self, url_or_host, pool_size):
+        """Set the pool size for a host, growing its pool if it was already created smaller."""
+        host = urlsplit(url_or_host).netloc or url_or_host
+        with self._lock:
+            if pool_size <= self.host_pool_sizes.get(host, 0):
+                return
+            self.host_pool_sizes[host] = pool_size
+            # Remount on next use so the new size takes effect
+            self._mounted = {prefix for prefix in self._mounted if urlsplit(prefix).netloc != host}
+
+    def _ensure_adapter(self, url):
+        parts = urlsplit(url)
+        prefix = f"{parts.scheme}://{parts.netloc}/"
+        if prefix in self._mounted:
+            return
+
+        with self._lock:
+            if prefix in self._mounted:
+                return
+            pool_size = self.host_pool_sizes.get(parts.netloc, self.pool_size)
+            # A remount after configure_host replaces the adapter, release the old pool's connections
+            previous = self._session.adapters.get(prefix)
+            self._session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            if previous is not None:
+                previous.close()
+            self._mounted.add(prefix)
+
+    def request(self, method, url, **kwargs):
+        self._ensure_adapter(url)
+        kwargs.setdefault("timeout", self.timeout)
+        return self._session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            self._session.close()
+            self._session = self._new_session()
+            self._mounted = set()
+
+
+# Shared by every fetcher in the process
+http_client = HttpClient()
@@ -0,0 +1,171 @@
+import codecs
+import json
+import os
+import queue
+import tempfile
+import textwrap
+import threading
+
+_END = object()
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(chunks):
+    """
+    Yield the elements of a top-level JSON array one at a time from an iterable of text or byte
+    chunks (a file read in blocks, or an HTTP body from response.iter_content).
+
+    Only the element being decoded and the unread tail of the current chunk are held in memory,
+    so callers can filter a large payload while it is still downloading.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    started = False
+
+    def skip_whitespace(text, i):
+        while i < len(text) and text[i] in _WHITESPACE:
+            i += 1
+        return i
+
+    chunks = iter(chunks)
+    finished = False
+    while not finished:
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+            chunk = utf8.decode(b"", final=True)
+        elif isinstance(chunk, bytes):
+            chunk = utf8.decode(chunk)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+        while True:
+            pos = skip_whitespace(buffer, pos)
+            if pos == len(buffer):
+                break
+
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+
+            if buffer[pos] == "]":
+                return
+            if buffer[pos] == ",":
+                pos += 1
+                continue
+
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if finished:
+                    raise
+                break  # Element continues in the next chunk
+
+            # A bare number or literal is only complete once a delimiter follows it
+            if not finished and not isinstance(item, (dict, list, str)):
+                if end == len(buffer) or buffer[end] not in _WHITESPACE + ",]":
+                    break
+
+            yield item
+            pos = end
+
+    if not started:
+        raise ValueError("Expected a JSON array")
+    raise ValueError("Unterminated JSON array")
+
+
+def iter_json_file(file_path, chunk_size=65536):
+    """Yield the elements of the JSON array stored in file_path without loading the whole file."""
+    with open(file_path, 'r') as f:
+        yield from iter_json_array(iter(lambda: f.read(chunk_size), ""))
+
+
+class StreamingJsonArrayWriter:
+    """
+    Write a JSON array to disk page by page instead of holding every item in memory.
+
+    Pages are handed to a background thread through a bounded queue, so serializing page N
+    overlaps with fetching/parsing page N+1 while at most a couple of pages are alive at once.
+    Items go to a temp file next to the output and the finished file is atomically renamed over
+    the old snapshot, so readers never see a half-written file. The output is formatted exactly
+    like json.dump(items, f, indent=indent).
+    """
+
+    def __init__(self, output_file, indent=4, max_pending_pages=1):
+        self.output_file = output_file
+        self.indent = indent
+        self.count = 0
+        self._queue = queue.Queue(maxsize=max_pending_pages)
+        self._error = None
+        self._file = None
+        self._temp_path = None
+        self._thread = None
+
+    def __enter__(self):
+        output_dir = os.path.dirname(os.path.abspath(self.output_file))
+        os.makedirs(output_dir, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(dir=output_dir, prefix=".", suffix=".tmp")
+        self._file = os.fdopen(fd, 'w')
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write_page(self, items):
+        """Queue a page of items, blocking while the writer is a page behind."""
+        if self._error:
+            raise self._error
+        self._queue.put(items)
+
+    def close(self):
+        """Finish the array and move the temp file into place."""
+        self._stop()
+        if self._error:
+            self._discard()
+            raise self._error
+
+        self._file.write("\n]" if self.count else "[]")
+        self._file.close()
+        os.replace(self._temp_path, self.output_file)
+
+    def abort(self):
+        """Drop everything written so far and leave any existing snapshot untouched."""
+        self._stop()
+        self._discard()
+
+    def _stop(self):
+        self._queue.put(_END)
+        self._thread.join()
+
+    def _discard(self):
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def _write_loop(self):
+        prefix = " " * self.indent if self.indent else ""
+        while True:
+            items = self._queue.get()
+            if items is _END:
+                return
+            if self._error:
+                continue  # Keep draining so producers never block on a dead writer
+
+            try:
+                for item in items:
+                    encoded = json.dumps(item, indent=self.indent)
+                    self._file.write(("[\n" if self.count == 0 else ",\n") + textwrap.indent(encoded, prefix))
+                    self.count += 1
+            except (OSError, TypeError, ValueError) as e:
+                self._error = e
@@ -0,0 +1,211 @@
+"""
+Lightweight instrumentation: timing spans, counters and gauges, exported as a JSON run summary
+or in the Prometheus text format.
+
+Off unless ARB_METRICS=1 is set (or enable() is called). While off, span() hands back one shared
+no-op context manager and incr/observe/set_gauge return on their first line, so the hooks can
+stay in per-page and per-game code paths.
+
+    with metrics.span("stage_seconds", stage="match"):
+        ...
+    metrics.incr("pages_fetched_total", venue="polymarket")
+    metrics.observe("quote_age_seconds", 42.0, venue="kalshi")
+
+Every process has its own registry. A scan writes its summary under arbOutput/metrics/, and the
+odds server's /metrics endpoint renders its own registry together with the latest scan summary.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_DIR = os.path.join(REPO_ROOT, "arbOutput", "metrics")
+LATEST_SCAN_SUMMARY = os.path.join(METRICS_DIR, "latest_scan.json")
+PREFIX = "arb_"
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def _key(name, labels):
+    # Label values are text in both exports; str() also keeps keys sortable when one label
+    # mixes types (status=204 and status="error")
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._counters = {}  # (name, labels) -> value
+        self._gauges = {}    # (name, labels) -> value
+        self._timings = {}   # (name, labels) -> [count, sum, min, max]
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+    def span(self, name, **labels):
+        """Context manager observing its wall time in seconds under name"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, labels)
+
+    def incr(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        """Add one observation (a duration, an age, ...); kept as count, sum, min and max"""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                self._timings[key] = [1, value, value, value]
+            else:
+                timing[0] += 1
+                timing[1] += value
+                if value < timing[2]:
+                    timing[2] = value
+                if value > timing[3]:
+                    timing[3] = value
+
+    def summary(self):
+        """Everything recorded so far, as JSON-serializable lists"""
+        with self._lock:
+            return {
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "elapsed_s": round(time.time() - self.started_at, 3),
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self._counters.items())],
+                "gauges": [{"name": name, "labels": dict(labels), "value": value}
+                           for (name, labels), value in sorted(self._gauges.items())],
+                "timings": [{"name": name, "labels": dict(labels), "count": count, "sum": round(total, 6),
+                             "min": round(low, 6), "max": round(high, 6)}
+                            for (name, labels), (count, total, low, high) in sorted(self._timings.items())],
+            }
+
+    def write_summary(self, path):
+        """Save the summary to path, and as the latest scan summary for the odds server's /metrics"""
+        summary = self.summary()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+        # Swapped in whole, the odds server may be reading it
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        tmp_path = f"{LATEST_SCAN_SUMMARY}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, LATEST_SCAN_SUMMARY)
+        return summary
+
+
+def summary_path(name="scan"):
+    """arbOutput/metrics/<name>_<time>.json, one file per run"""
+    return os.path.join(METRICS_DIR, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+
+
+def read_summary(path=LATEST_SCAN_SUMMARY):
+    """A saved summary, or None if there isn't one"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def print_summary(summary):
+    """A summary's timings as a table, slowest first within each metric"""
+    timings = sorted(summary["timings"], key=lambda t: (t["name"], -t["sum"]))
+    print(f"\n{'timing':<56} {'count':>7} {'total s':>10} {'mean s':>9} {'max s':>9}")
+    for timing in timings:
+        labels = ",".join(f"{key}={value}" for key, value in timing["labels"].items())
+        name = f"{timing['name']}{{{labels}}}" if labels else timing["name"]
+        print(f"{name:<56} {timing['count']:>7} {timing['sum']:>10.3f} "
+              f"{timing['sum'] / timing['count']:>9.3f} {timing['max']:>9.3f}")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name, labels, value):
+    label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    if isinstance(value, float) and not math.isfinite(value):
+        value = "NaN" if math.isnan(value) else ("+Inf" if value > 0 else "-Inf")
+    return f"{PREFIX}{name}{{{label_text}}} {value}" if label_text else f"{PREFIX}{name} {value}"
+
+
+def render_prometheus(*summaries):
+    """
+    Prometheus text exposition of one or more (summary, extra labels) pairs. Samples of the same
+    metric from several summaries are grouped under one TYPE line, told apart by the extra labels.
+    """
+    families = {}  # name -> (type, [lines])
+
+    def add(name, kind, line):
+        families.setdefault(name, (kind, []))[1].append(line)
+
+    for summary, extra in summaries:
+        for counter in summary["counters"]:
+            add(counter["name"], "counter", _sample(counter["name"], {**counter["labels"], **extra}, counter["value"]))
+        for gauge in summary["gauges"]:
+            add(gauge["name"], "gauge", _sample(gauge["name"], {**gauge["labels"], **extra}, gauge["value"]))
+        for timing in summary["timings"]:
+            labels = {**timing["labels"], **extra}
+            add(timing["name"], "summary", _sample(f"{timing['name']}_count", labels, timing["count"]))
+            add(timing["name"], "summary", _sample(f"{timing['name']}_sum", labels, timing["sum"]))
+            add(f"{timing['name']}_max", "gauge", _sample(f"{timing['name']}_max", labels, timing["max"]))
+        finished = summary.get("finished_at")
+        if finished:
+            add("summary_timestamp_seconds", "gauge",
+                _sample("summary_timestamp_seconds", extra, round(datetime.fromisoformat(finished).timestamp())))
+
+    lines = []
+    for name, (kind, samples) in sorted(families.items()):
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+# Shared by everything in the process
+metrics = Metrics(enabled=os.getenv("ARB_METRICS", "").lower() in ("1", "true", "yes"))
@@ -0,0 +1,218 @@
+"""
+Append-only history of every quote the scanners ingest.
+
+Quotes live in one SQLite file (WAL mode, like the odds cache) as fixed-width integer and real
+columns: venue, event and outcome names are interned into small lookup tables, so a quote row
+is (event id, ts, venue id, outcome id, price). The quotes table is WITHOUT ROWID with
+(event, ts) leading its primary key, so the rows of one game are stored together in time order
+and a price path is a single range scan.
+
+Prices are implied probabilities (0-1) whatever the venue: prediction-market prices as quoted,
+sportsbook decimal odds as 1 / odds. A quote is only written when it differs from the last one
+recorded for the same venue, event and outcome, so snapshotting every few seconds costs rows
+only for prices that moved; a NULL price marks a quote the venue stopped listing. A quote's
+price at any time is therefore its latest row at or before that time. The only in-memory state
+is the latest quote per live (venue, event, outcome) and the name -> id tables. That latest
+snapshot is also kept per source in the small live_quotes table (withdrawn quotes are deleted
+from it), so the first snapshot a one-shot scan records is compared with what the previous run
+left, not with nothing, without aggregating the history.
+"""
+import os
+import sqlite3
+import threading
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY_PATH = os.getenv("ODDS_HISTORY_DB", os.path.join(REPO_ROOT, "jsonOutputs", "odds_history.sqlite3"))
+
+NAME_TABLES = ("venues", "events", "outcomes")
+
+
+class OddsHistory:
+    def __init__(self, db_path=DEFAULT_HISTORY_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ids = {table: {} for table in NAME_TABLES}  # name -> id, per lookup table
+        self._last = {}  # source -> {(venue, event, outcome): price last written}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        for table in NAME_TABLES:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS quotes (
+                event_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                venue_id INTEGER NOT NULL,
+                outcome_id INTEGER NOT NULL,
+                price REAL,
+                PRIMARY KEY (event_id, ts, venue_id, outcome_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS quotes_by_ts ON quotes (ts)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS live_quotes (
+                source TEXT NOT NULL,
+                event_id INTEGER NOT NULL,
+                venue_id INTEGER NOT NULL,
+                outcome_id INTEGER NOT NULL,
+                price REAL NOT NULL,
+                PRIMARY KEY (source, event_id, venue_id, outcome_id)
+            ) WITHOUT ROWID
+        """)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _intern(self, conn, table, name):
+        ids = self._ids[table]
+        name_id = ids.get(name)
+        if name_id is None:
+            conn.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+            name_id = conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+            ids[name] = name_id
+        return name_id
+
+    def _lookup(self, table, name):
+        """Id of an existing name, None if it was never recorded"""
+        name_id = self._ids[table].get(name)
+        if name_id is None:
+            row = self._connect().execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()
+            name_id = row[0] if row else None
+        return name_id
+
+    def _load_last(self, conn, source):
+        """The quotes source listed in its last snapshot, as left by this or a previous run"""
+        rows = conn.execute(
+            """
+            SELECT v.name, e.name, o.name, l.price FROM live_quotes l
+            JOIN venues v ON v.id = l.venue_id JOIN events e ON e.id = l.event_id JOIN outcomes o ON o.id = l.outcome_id
+            WHERE l.source = ?
+            """,
+            (source,),
+        )
+        return {(venue, event, outcome): price for venue, event, outcome, price in rows}
+
+    def record(self, ts, quotes, source=""):
+        """
+        Append one snapshot from source: quotes is an iterable of (venue, event, outcome, price).
+        The snapshot is taken as everything source quotes now, so a quote it listed last time
+        and no longer does is written as withdrawn (a NULL price), also across runs. Returns the
+        number of rows written.
+        """
+        ts = int(ts)
+        latest = {}
+        for venue, event, outcome, price in quotes:
+            if price is None or price != price:  # Missing or NaN
+                continue
+            latest[venue, event, outcome] = float(price)
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                previous = self._last.get(source)
+                if previous is None:
+                    previous = self._load_last(conn, source)
+                changed = [(key, price) for key, price in latest.items() if previous.get(key) != price]
+                changed.extend((key, None) for key in previous.keys() - latest.keys())
+
+                # Only the quotes that moved are interned and written
+                rows = [
+                    (self._intern(conn, "events", event), ts, self._intern(conn, "venues", venue),
+                     self._intern(conn, "outcomes", outcome), price)
+                    for (venue, event, outcome), price in changed
+                ]
+                conn.executemany("INSERT OR REPLACE INTO quotes VALUES (?, ?, ?, ?, ?)", rows)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO live_quotes VALUES (?, ?, ?, ?, ?)",
+                    [(source, event_id, venue_id, outcome_id, price)
+                     for event_id, _, venue_id, outcome_id, price in rows if price is not None],
+                )
+                conn.executemany(
+                    "DELETE FROM live_quotes WHERE source = ? AND event_id = ? AND venue_id = ? AND outcome_id = ?",
+                    [(source, event_id, venue_id, outcome_id)
+                     for event_id, _, venue_id, outcome_id, price in rows if price is None],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._ids = {table: {} for table in NAME_TABLES}  # Ids interned in the rolled back transaction are gone
+                raise
+            self._last[source] = latest
+            # Keep id lookups to the games still being quoted
+            if len(self._ids["events"]) > 4096:
+                live_events = {event for prices in self._last.values() for _, event, _ in prices}
+                self._ids["events"] = {name: i for name, i in self._ids["events"].items() if name in live_events}
+        return len(rows)
+
+    def price_path(self, event, start=None, end=None, venue=None):
+        """
+        [(ts, venue, outcome, price), ...] for one event in time order, optionally limited to
+        [start, end] and one venue. price is None where the quote was withdrawn.
+        """
+        event_id = self._lookup("events", event)
+        if event_id is None:
+            return []
+        sql = """
+            SELECT q.ts, v.name, o.name, q.price FROM quotes q
+            JOIN venues v ON v.id = q.venue_id JOIN outcomes o ON o.id = q.outcome_id
+            WHERE q.event_id = ? AND q.ts BETWEEN ? AND ?
+        """
+        params = [event_id, start if start is not None else -2 ** 63, end if end is not None else 2 ** 63 - 1]
+        if venue is not None:
+            sql += " AND v.name = ?"
+            params.append(venue)
+        return self._connect().execute(sql + " ORDER BY q.ts, q.venue_id, q.outcome_id", params).fetchall()
+
+    def events(self, start=None, end=None):
+        """Names of the events with quotes in [start, end]"""
+        if start is None and end is None:
+            return [name for (name,) in self._connect().execute("SELECT name FROM events ORDER BY id")]
+        rows = self._connect().execute(
+            """
+            SELECT name FROM events WHERE id IN (SELECT DISTINCT event_id FROM quotes WHERE ts BETWEEN ? AND ?)
+            ORDER BY id
+            """,
+            (start if start is not None else -2 ** 63, end if end is not None else 2 ** 63 - 1),
+        )
+        return [name for (name,) in rows]
+
+    def names(self, table):
+        """id -> name for one of the lookup tables (venues, events, outcomes)"""
+        if table not in NAME_TABLES:
+            raise ValueError(f"Unknown table {table}")
+        return dict(self._connect().execute(f"SELECT id, name FROM {table}"))
+
+    def event_ids(self, start=None, end=None):
+        """Ids of the events with quotes in [start, end], in id order"""
+        rows = self._connect().execute(
+            "SELECT DISTINCT event_id FROM quotes WHERE ts BETWEEN ? AND ? ORDER BY event_id",
+            (start if start is not None else -2 ** 63, end if end is not None else 2 ** 63 - 1),
+        )
+        return [event_id for (event_id,) in rows]
+
+    def quote_rows(self, event_ids, end=None):
+        """[(event id, ts, venue id, outcome id, price), ...] for the given events up to end, ordered by event then time"""
+        if not event_ids:
+            return []
+        placeholders = ",".join("?" * len(event_ids))
+        return self._connect().execute(
+            f"""
+            SELECT event_id, ts, venue_id, outcome_id, price FROM quotes
+            WHERE event_id IN ({placeholders}) AND ts <= ? ORDER BY event_id, ts
+            """,
+            (*event_ids, end if end is not None else 2 ** 63 - 1),
+        ).fetchall()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,77 @@
+"""
+Timestamp normalization shared by every venue.
+
+Venue timestamps arrive in several shapes ('2025-02-02T20:00:00Z', '2025-02-02 15:00:00-0500',
+'2025-02-02 20:00:00+00', naive Odds API times in UTC, ...). They are turned into UTC epoch
+seconds once at ingest; filtering, sorting and window matching then compare ints, and local
+time is only produced when rendering.
+"""
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import pytz
+
+EST = pytz.timezone('US/Eastern')
+
+_FALLBACK_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+
+def now_epoch():
+    return int(time.time())
+
+
+@lru_cache(maxsize=8192)
+def _parse_epoch(value):
+    text = value.strip().replace("Z", "+00:00")
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        for fmt in _FALLBACK_FORMATS:
+            try:
+                dt = datetime.strptime(text.replace("+00:00", "+0000"), fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # Naive venue times are UTC
+    return int(dt.timestamp())
+
+
+def to_epoch(value):
+    """UTC epoch seconds for a timestamp string, datetime or number; None if it can't be parsed"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return _parse_epoch(str(value))
+
+
+def local_date(ts, tz=EST):
+    """Calendar date of an epoch timestamp in tz (EST by default)"""
+    return datetime.fromtimestamp(ts, tz).date()
+
+
+def to_local(ts, tz=EST):
+    return datetime.fromtimestamp(ts, tz)
+
+
+def format_local(ts, fmt="%Y-%m-%d %H:%M:%S%z", tz=EST):
+    """Render an epoch timestamp in local time, only used for output"""
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz).strftime(fmt)
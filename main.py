@@ -1,76 +1,42 @@
 from secondaryMarkets.polymarket.polymarket import PolymarketAPI
 from secondaryMarkets.kalshi.kalshi import KalshiAPI
-from nba.nbaSimSearch import find_matching_games
-from nba.getNBAevents import get_nba_events_from_file, write_nba_events_to_file, get_mira_nba_events
-import requests
-import glob
+from pipeline import run_scan
+from scan_daemon import ScanDaemon
+from nba.arbReport import render_header, render_opportunity, save_scan
+from common.discord_notifier import DiscordNotifier
+from common.odds_history import OddsHistory
+from common.metrics import metrics, print_summary, summary_path
+import argparse
 import os
 from datetime import datetime
-import time
 
 polymarket_api = PolymarketAPI()
+kalshi_api = KalshiAPI()
 file_path = 'jsonOutputs/gamma_events.json'
 nbaFilePath = 'jsonOutputs/nbaEvents.json'
 
-DISCORD_WEBHOOK_URL = "https://discordapp.com/api/webhooks/1306538886515785750/JIm5CjrQ49Yj5E8MBGOGTGrWvIbojn05jiG3jiGlJs5zlzWt30PZufR_72KI9yidpsGv"
+DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "https://discordapp.com/api/webhooks/1306538886515785750/JIm5CjrQ49Yj5E8MBGOGTGrWvIbojn05jiG3jiGlJs5zlzWt30PZufR_72KI9yidpsGv")
+
+# Alerts are delivered by a background thread, nothing below waits on Discord
+discord = DiscordNotifier(DISCORD_WEBHOOK_URL)
 
 def send_to_discord(content, code_block=True):
-    if not content.strip():
-        return
-    
-    # Split content into chunks of approximately 1900 characters (Discord limit is 2000)
-    max_length = 1900
-    chunks = []
-    current_chunk = ""
-    
-    for line in content.split('\n'):
-        if len(current_chunk) + len(line) + 2 > max_length:  # +2 for newline chars
-            chunks.append(current_chunk)
-            current_chunk = line
-        else:
-            current_chunk += (line + '\n')
-    
-    if current_chunk:
-        chunks.append(current_chunk)
-    
-    # Send each chunk
-    for chunk in chunks:
-        payload = {
-            "content": f"```{chunk}```" if code_block else chunk
-        }
-        response = requests.post(DISCORD_WEBHOOK_URL, json=payload)
-        if response.status_code != 204:
-            print(f"Failed to send Discord message: {response.status_code}")
-        time.sleep(1)  # Add delay between messages to avoid rate limiting
+    discord.send(content, code_block)
 
-def send_arbitrage_opportunities():
-    # Get the most recent arbitrage file
-    list_of_files = glob.glob('arbOutput/arbitrage_opportunities_*.txt')
-    if not list_of_files:
+def send_arbitrage_opportunities(records):
+    """Alert Discord with a scan's opportunity records; rendered in memory, nothing is read back from disk"""
+    if not records:
         return
-    latest_file = max(list_of_files, key=os.path.getctime)
-    
+
     # Send current date and time first
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     send_to_discord(f"🔍 New Arbitrage Opportunities Found at: {current_time}", code_block=False)
-    
-    with open(latest_file, 'r') as file:
-        content = file.read()
-        # Split by the delimiter and filter out empty strings
-        opportunities = [opp.strip() for opp in content.split('--------------------------------------------------') if opp.strip()]
-        
-        # Send header separately
-        if opportunities and "ARBITRAGE OPPORTUNITIES" in opportunities[0]:
-            header = opportunities.pop(0)
-            send_to_discord(header)
-        
-        # Send each opportunity as a separate message
-        for opportunity in opportunities:
-            # Add some spacing and formatting
-            formatted_opp = f"\n{opportunity}\n"
-            send_to_discord(formatted_opp)
-            time.sleep(0.5)  # Small delay between opportunities
-    
+    send_to_discord(render_header(records[0]['scan_time'], len(records)))
+
+    # Opportunities are packed into as few messages as fit
+    for idx, record in enumerate(records, 1):
+        send_to_discord(render_opportunity(idx, record))
+
     # Send footer
     footer = "\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n📊 End of Arbitrage Report 📊\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
     send_to_discord(footer, code_block=False)
@@ -79,13 +45,55 @@ def fetch_polymarket_events():
     polymarket_api.get_and_save_all_events()
 
 if __name__ == "__main__":
-    fetch_polymarket_events()
-    nba_events = get_nba_events_from_file(file_path)
-    print("Writing NBA events from polymarket to file")
-    write_nba_events_to_file(file_path, nbaFilePath)
-    get_mira_nba_events()
-    find_matching_games()
-    send_arbitrage_opportunities()
+    parser = argparse.ArgumentParser(description="Scan Polymarket and sportsbook odds for arbitrage opportunities")
+    parser.add_argument("--write-snapshots", action="store_true",
+                        help="Also save the raw and filtered venue payloads under jsonOutputs/")
+    parser.add_argument("--no-kalshi", action="store_true", help="Leave Kalshi's NBA games out of the scan")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running, re-evaluating games as their quotes change and reporting new opportunities")
+    parser.add_argument("--odds-interval", type=float, default=15, help="Daemon: seconds between odds server polls")
+    parser.add_argument("--polymarket-interval", type=float, default=60, help="Daemon: seconds between Polymarket polls")
+    parser.add_argument("--no-order-books", action="store_true",
+                        help="Daemon: don't follow the matched games' Polymarket order books")
+    parser.add_argument("--book-poll", type=float, metavar="SECONDS",
+                        help="Daemon: poll the order books over REST this often instead of streaming the websocket")
+    parser.add_argument("--book-record", metavar="FILE", help="Daemon: append every websocket frame to this JSONL file")
+    parser.add_argument("--book-replay", metavar="FILE", help="Daemon: replay order book messages recorded with --book-record, at the recorded pace")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Don't append fetched quotes to the odds history store (jsonOutputs/odds_history.sqlite3)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Time each stage and fetch and save a run summary under arbOutput/metrics/ (or set ARB_METRICS=1)")
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable()
+    kalshi = None if args.no_kalshi else kalshi_api
+    history = None if args.no_history else OddsHistory()
+
+    if args.daemon:
+        def report_new(opportunities):
+            records, _ = save_scan(opportunities, clear_previous=False)
+            send_arbitrage_opportunities(records)
+
+        book_options = None if args.no_order_books else {
+            "replay_file": args.book_replay, "replay_speed": 1.0, "poll_interval": args.book_poll,
+            "record_to": args.book_record,
+        }
+        daemon = ScanDaemon(polymarket_api, on_new=report_new, kalshi_api=kalshi, history=history,
+                            odds_interval=args.odds_interval, polymarket_interval=args.polymarket_interval,
+                            book_options=book_options)
+        daemon.run()
+        metrics_path = daemon.metrics_path
+    else:
+        metrics_path = summary_path("scan")
+        records, report_file = run_scan(polymarket_api, write_snapshots=args.write_snapshots, kalshi_api=kalshi,
+                                        history=history)
+        send_arbitrage_opportunities(records)
+    # Give queued alerts a chance to go out before the process exits
+    if not discord.close(timeout=60):
+        print("Some Discord alerts were not delivered before exit")
+    if metrics.enabled:
+        print_summary(metrics.write_summary(metrics_path))
+        print(f"Saved run metrics to {metrics_path}")
     print("program finished")
 
 
@@ -0,0 +1,170 @@
+"""
+Backtest of the arbitrage rule against the odds history store.
+
+The history only holds a row when a quote changes, so each game is replayed as a dense
+(time steps x quote series) grid: one step per timestamp at which any of the game's quotes
+changed, one column per (venue, outcome), every quote forward-filled until its next row (a
+withdrawn quote is NaN). The live rule is then applied to every step at once: the best
+sportsbook implied probability per outcome (rounded like scan_arbitrage) is paired with each
+prediction-market outcome on the other side, and a step is an arbitrage when the two sum below
+1 - min_edge. Consecutive arbitrage steps form a window, whose length is how long the arb
+stayed open. Games are read from the store in batches, so memory stays bounded over a season.
+
+The store files every venue's quotes under the matcher's game key (teams and EST game date),
+so the replay pairs venues the way match_games does for one game a day; the 1-hour start-time
+tolerance can't be replayed because game start times aren't stored.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from common.odds_history import OddsHistory
+from nba.arbReport import VENUE_NAMES
+
+PREDICTION_VENUES = frozenset(VENUE_NAMES)
+EVENT_BATCH = 256
+EDGE_BUCKETS = (0.0, 0.005, 0.01, 0.02, 0.05, np.inf)
+
+
+class ArbWindow(NamedTuple):
+    event: str
+    venue: str                 # prediction market the outcome is bought on
+    outcome: str               # outcome bought there
+    bookmaker: str             # best book on the other outcome when the window opened
+    opened_ts: int
+    closed_ts: Optional[int]   # None if still open at the end of the replay
+    duration: int              # seconds, up to the last replayed step when still open
+    open_edge: float           # 1 - total probability when it opened
+    max_edge: float
+    steps: int                 # time steps the window spans
+
+
+def forward_fill(steps: np.ndarray, columns: np.ndarray, prices: np.ndarray, n_steps: int, n_columns: int) -> np.ndarray:
+    """Dense (steps x columns) grid holding each quote from its row until the next one; NaN before the first"""
+    grid = np.full((n_steps, n_columns), np.nan)
+    grid[steps, columns] = prices
+    last = np.full((n_steps, n_columns), -1, dtype=np.intp)
+    last[steps, columns] = steps
+    np.maximum.accumulate(last, axis=0, out=last)
+    filled = np.take_along_axis(grid, np.maximum(last, 0), axis=0)
+    return np.where(last >= 0, filled, np.nan)
+
+
+def replay_event(
+    rows: np.ndarray,
+    venue_names: Dict[int, str],
+    min_edges: Sequence[float],
+    start: Optional[int] = None
+) -> Dict[float, List[tuple]]:
+    """
+    Replay one game's quote rows (ts, venue id, outcome id, price; time ordered). Returns, per
+    min_edge, the windows as (venue id, outcome id, bookmaker id, opened_ts, closed_ts, duration,
+    open_edge, max_edge, steps) tuples.
+    """
+    windows = {min_edge: [] for min_edge in min_edges}
+    outcome_ids, outcome = np.unique(rows[:, 2].astype(np.int64), return_inverse=True)
+    if len(outcome_ids) != 2:
+        return windows  # Only two-team moneylines can be paired
+
+    step_ts, step = np.unique(rows[:, 0].astype(np.int64), return_inverse=True)
+    venue = rows[:, 1].astype(np.int64)
+    series, column = np.unique(venue * 2 + outcome, return_inverse=True)
+    grid = forward_fill(step, column, rows[:, 3], len(step_ts), len(series))
+
+    series_venue, series_outcome = series // 2, series % 2
+    is_market = np.array([venue_names.get(int(v)) in PREDICTION_VENUES for v in series_venue])
+    books = np.flatnonzero(~is_market)
+    markets = np.flatnonzero(is_market)
+    if not len(books) or not len(markets):
+        return windows
+
+    # Best book per outcome at every step, missing quotes never win
+    book_prob = np.round(grid[:, books], 3)
+    book_prob = np.where(np.isnan(book_prob), np.inf, book_prob)
+    best_prob = np.full((len(step_ts), 2), np.inf)
+    best_book = np.zeros((len(step_ts), 2), dtype=np.int64)
+    for k in (0, 1):
+        cols = np.flatnonzero(series_outcome[books] == k)
+        if len(cols):
+            pick = book_prob[:, cols].argmin(axis=1)
+            best_prob[:, k] = book_prob[np.arange(len(step_ts)), cols[pick]]
+            best_book[:, k] = series_venue[books][cols[pick]]
+
+    # Every prediction-market column against the best book on the other outcome
+    other = 1 - series_outcome[markets]
+    total = grid[:, markets] + best_prob[:, other]
+    edge = 1 - total
+    edge = np.where(np.isfinite(edge), edge, -np.inf)
+    if start is not None:
+        edge[step_ts < start] = -np.inf
+
+    for min_edge in min_edges:
+        is_arb = edge > min_edge
+        if not is_arb.any():
+            continue
+        padded = np.zeros((len(step_ts) + 2, len(markets)), dtype=np.int8)
+        padded[1:-1] = is_arb
+        change = np.diff(padded, axis=0).T  # (columns, steps + 1)
+        open_col, opens = np.nonzero(change == 1)
+        _, closes = np.nonzero(change == -1)  # Row-major, so paired with opens column by column
+        max_edge = np.maximum.reduceat(np.where(is_arb, edge, -np.inf).T.ravel(), open_col * len(step_ts) + opens)
+        for j, o, c, peak in zip(open_col, opens, closes, max_edge):
+            still_open = c >= len(step_ts)
+            end_ts = step_ts[-1] if still_open else step_ts[c]
+            windows[min_edge].append((
+                int(series_venue[markets[j]]), int(outcome_ids[series_outcome[markets[j]]]),
+                int(best_book[o, other[j]]), int(step_ts[o]), None if still_open else int(step_ts[c]),
+                int(end_ts - step_ts[o]), float(edge[o, j]), float(peak), int(c - o),
+            ))
+    return windows
+
+
+def run_backtest(
+    history: OddsHistory,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    min_edges: Sequence[float] = (0.0,),
+    batch_size: int = EVENT_BATCH
+) -> Dict[float, List[ArbWindow]]:
+    """Replay every game with quotes in [start, end]; returns the arbitrage windows found per min_edge"""
+    venues, outcomes, events = history.names("venues"), history.names("outcomes"), history.names("events")
+    found = {min_edge: [] for min_edge in min_edges}
+    event_ids = history.event_ids(start, end)
+
+    for i in range(0, len(event_ids), batch_size):
+        rows = np.array(history.quote_rows(event_ids[i:i + batch_size], end), dtype=float)
+        if not len(rows):
+            continue
+        # Rows come ordered by event, split them into one block per game
+        bounds = np.flatnonzero(np.diff(rows[:, 0])) + 1
+        for block in np.split(rows, bounds):
+            event = events[int(block[0, 0])]
+            for min_edge, windows in replay_event(block[:, 1:], venues, min_edges, start).items():
+                found[min_edge].extend(
+                    ArbWindow(event, venues[v], outcomes[o], venues[b], *rest) for v, o, b, *rest in windows
+                )
+    return found
+
+
+def summarize(windows: List[ArbWindow]) -> dict:
+    """Counts, edge distribution and open durations of a list of windows"""
+    if not windows:
+        return {'windows': 0}
+    max_edge = np.array([w.max_edge for w in windows])
+    duration = np.array([w.duration for w in windows], dtype=float)
+    counts, _ = np.histogram(max_edge, bins=EDGE_BUCKETS)
+    by_venue = {}
+    for w in windows:
+        by_venue[w.venue] = by_venue.get(w.venue, 0) + 1
+    return {
+        'windows': len(windows),
+        'games': len({w.event for w in windows}),
+        'by_venue': by_venue,
+        'still_open': sum(w.closed_ts is None for w in windows),
+        'max_edge_pct': {q: round(float(np.percentile(max_edge, q)) * 100, 3) for q in (50, 90, 99, 100)},
+        'max_edge_histogram': {
+            f"{low:.1%}-{high:.1%}" if np.isfinite(high) else f">{low:.1%}": int(count)
+            for low, high, count in zip(EDGE_BUCKETS[:-1], EDGE_BUCKETS[1:], counts)
+        },
+        'duration_s': {q: round(float(np.percentile(duration, q)), 1) for q in (50, 90, 99, 100)},
+    }
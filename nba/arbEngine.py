@@ -0,0 +1,173 @@
+"""
+Vectorized cross-venue arbitrage scan.
+
+Every matched game is packed into fixed-shape arrays (games x bookmakers x outcomes), the best
+sportsbook price per outcome is taken with array reductions, and every Polymarket outcome is
+checked against the best price on the opposing outcome in one pass. This replaces the per
+bookmaker / per team Python loops, so a full multi-league slate costs a few array operations.
+"""
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Tuple
+
+import numpy as np
+
+from secondaryMarkets.models import EventQuotes, MarketQuote
+
+GameData = Dict[str, Any]
+MatchedGame = Tuple[GameData, EventQuotes, FrozenSet[str]]  # (odds api game, polymarket event, normalized teams)
+
+
+class PackedGames(NamedTuple):
+    """Array view of the matched games. Outcome axis k is the k-th Polymarket outcome."""
+    primary_odds: np.ndarray      # (games, bookmakers, 2) decimal odds, NaN where a book has no price
+    poly_prob: np.ndarray         # (games, 2) Polymarket price per outcome, NaN where missing
+    opposing: np.ndarray          # (games, 2) index of the opposing outcome, -1 if it can't be paired
+    bookmakers: List[List[str]]   # bookmaker names per game, in column order
+    poly_outcomes: List[List[str]]  # Polymarket outcome names per game
+    teams: List[List[str]]        # normalized team per outcome column
+
+
+class ArbitrageHit(NamedTuple):
+    game: int             # index into the matched games
+    poly_team: str        # Polymarket outcome name as quoted
+    poly_prob: float
+    primary_team: str     # normalized opposing team
+    primary_prob: float
+    bookmaker: str
+
+
+_name = itemgetter('name')
+_odds = itemgetter('odds')
+
+
+class _TeamColumns(dict):
+    """Outcome column of each raw team name in one game (-1 if Polymarket doesn't list it), filled on first lookup"""
+
+    def __init__(self, column, normalized, normalize):
+        super().__init__()
+        self.column = column
+        self.normalized = normalized  # Shared across games, the same few names repeat across every book
+        self.normalize = normalize
+
+    def __missing__(self, team):
+        name = self.normalized.get(team)
+        if name is None:
+            name = self.normalized[team] = self.normalize(team)
+        k = self[team] = self.column.get(name, -1)
+        return k
+
+
+def pack_matched_games(
+    matches: List[MatchedGame],
+    poly_markets: List[MarketQuote],
+    normalize: Callable[[str], str],
+) -> PackedGames:
+    """
+    Lay out the matched games as arrays, aligning every bookmaker on the Polymarket outcome order.
+    poly_markets holds the Polymarket market quoted for each match.
+    """
+    n_games = len(matches)
+    n_books = max((len(mira_game['bookmakers']) for mira_game, _, _ in matches), default=0)
+
+    poly_prob = np.full((n_games, 2), np.nan)
+    opposing = np.full((n_games, 2), -1, dtype=np.intp)
+    bookmakers, poly_outcomes, teams = [], [], []
+
+    # Every game's odds are flattened with C-level iteration (chain/map) into one list of prices,
+    # the team of each price and the book slot it belongs to; the array is then filled in one go
+    flat_teams, flat_odds, book_slots, book_sizes = [], [], [], []
+    normalized = {}  # Raw team name -> normalized
+    for g, ((mira_game, _, mira_teams), market) in enumerate(zip(matches, poly_markets)):
+        outcomes, prices = list(market.outcomes[:2]), market.prices[:2]
+        outcome_teams = [normalize(outcome) for outcome in outcomes]
+
+        poly_outcomes.append(outcomes)
+        teams.append(outcome_teams)
+        poly_prob[g, :len(prices)] = prices
+
+        # An outcome can only be paired when the game is a two-team matchup containing it
+        if len(mira_teams) == 2 and len(set(outcome_teams)) == 2 and set(outcome_teams) == mira_teams:
+            opposing[g] = (1, 0)
+        column = {team: k for k, team in enumerate(outcome_teams)}
+
+        game_books = mira_game['bookmakers']
+        bookmakers.append(list(map(_name, game_books)))
+        odds_dicts = list(map(_odds, game_books))
+        team_column = _TeamColumns(column, normalized, normalize)
+        flat_teams.extend(map(team_column.__getitem__, chain.from_iterable(odds_dicts)))
+        flat_odds.extend(chain.from_iterable(map(dict.values, odds_dicts)))
+        book_slots.extend(range(g * n_books, g * n_books + len(game_books)))
+        book_sizes.extend(map(len, odds_dicts))
+
+    primary_odds = np.full(n_games * n_books * 2, np.nan)
+    if flat_odds:
+        k = np.array(flat_teams, dtype=np.intp)
+        slot = np.repeat(np.array(book_slots, dtype=np.intp), book_sizes)
+        priced = k >= 0
+        primary_odds[2 * slot[priced] + k[priced]] = np.array(flat_odds, dtype=float)[priced]
+    primary_odds = primary_odds.reshape(n_games, n_books, 2)
+
+    return PackedGames(primary_odds, poly_prob, opposing, bookmakers, poly_outcomes, teams)
+
+
+def _best_opposing(packed: PackedGames) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    For every Polymarket outcome: the best (lowest) implied probability across bookmakers on its
+    opposing outcome, the bookmaker column quoting it, and whether the outcome can be paired at all.
+    """
+    # Implied probabilities, rounded like decimal_to_implied_probability; missing prices never win
+    with np.errstate(divide='ignore', invalid='ignore'):
+        implied = np.round(1 / packed.primary_odds, 3)
+    implied = np.where(np.isnan(implied), np.inf, implied)
+
+    # Best (lowest) implied probability per outcome across bookmakers, first book wins ties
+    best_book = implied.argmin(axis=1)                                               # (games, 2)
+    best_prob = np.take_along_axis(implied, best_book[:, None, :], axis=1)[:, 0, :]  # (games, 2)
+
+    # Pair each Polymarket outcome with the best price on its opposing outcome
+    pairable = packed.opposing >= 0
+    opposing = np.where(pairable, packed.opposing, 0)
+    primary_prob = np.take_along_axis(best_prob, opposing, axis=1)
+    primary_book = np.take_along_axis(best_book, opposing, axis=1)
+    return primary_prob, primary_book, pairable
+
+
+def scan_arbitrage(packed: PackedGames) -> List[ArbitrageHit]:
+    """
+    Find every (Polymarket outcome, best sportsbook price on the opposing outcome) pair whose
+    implied probabilities sum below 1. Hits come back in game order, then Polymarket outcome order.
+    """
+    if packed.primary_odds.shape[0] == 0 or packed.primary_odds.shape[1] == 0:
+        return []
+
+    primary_prob, primary_book, pairable = _best_opposing(packed)
+    with np.errstate(invalid='ignore'):
+        is_arb = pairable & ((packed.poly_prob + primary_prob) < 1)
+
+    hits = []
+    for g, k in zip(*np.nonzero(is_arb)):
+        opposing_k = packed.opposing[g, k]
+        hits.append(ArbitrageHit(
+            game=int(g),
+            poly_team=packed.poly_outcomes[g][k],
+            poly_prob=float(packed.poly_prob[g, k]),
+            primary_team=packed.teams[g][opposing_k],
+            primary_prob=float(primary_prob[g, k]),
+            bookmaker=packed.bookmakers[g][primary_book[g, k]],
+        ))
+    return hits
+
+
+def arb_thresholds(packed: PackedGames) -> np.ndarray:
+    """
+    (games, 2) highest Polymarket price per outcome that is still an arbitrage against the best
+    sportsbook price on the opposing outcome; NaN where the outcome can't be paired or isn't priced.
+    """
+    thresholds = np.full(packed.poly_prob.shape, np.nan)
+    if packed.primary_odds.shape[0] == 0 or packed.primary_odds.shape[1] == 0:
+        return thresholds
+    primary_prob, _, pairable = _best_opposing(packed)
+    priced = pairable & np.isfinite(primary_prob)
+    thresholds[priced] = 1 - primary_prob[priced]
+    return thresholds
@@ -0,0 +1,201 @@
+"""
+Arbitrage opportunity records and the reports rendered from them.
+
+Every opportunity found by a scan becomes one JSON record appended to arbOutput/opportunities.jsonl,
+which is the machine-readable source of truth. The text report in arbOutput/ and the Discord
+alerts are both rendered in memory from those same records.
+"""
+import glob
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from common.timeutil import now_epoch
+from nba.arbSizing import MIN_EDGE
+
+REPORT_DIR = 'arbOutput'
+OPPORTUNITIES_FILE = os.path.join(REPORT_DIR, 'opportunities.jsonl')
+VENUE_NAMES = {"polymarket": "Polymarket", "kalshi": "Kalshi"}
+
+OpportunityRecord = Dict[str, Any]
+
+
+def venue_name(opp: Dict[str, Any]) -> str:
+    venue = opp.get('venue', 'polymarket')
+    return VENUE_NAMES.get(venue, venue)
+
+
+def opportunity_records(opportunities: List[Dict[str, Any]], scan_ts: Optional[int] = None) -> List[OpportunityRecord]:
+    """One flat record per opportunity, stamped with the scan it came from"""
+    scan_ts = scan_ts or now_epoch()
+    scan_time = datetime.fromtimestamp(scan_ts).strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        dict(opp, scan_ts=scan_ts, scan_time=scan_time, opportunity_id=f"{scan_ts}-{idx}")
+        for idx, opp in enumerate(opportunities, 1)
+    ]
+
+
+def append_records(records: List[OpportunityRecord], path: str = OPPORTUNITIES_FILE) -> None:
+    """Append records as JSON Lines in a single buffered write"""
+    if not records:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(payload)
+
+
+def read_records(path: str = OPPORTUNITIES_FILE) -> List[OpportunityRecord]:
+    """Every record written so far, oldest first"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def render_header(scan_time: str, count: int) -> str:
+    lines = [
+        "╔══════════════════════════════════════════════════════════════╗",
+        "║                  ARBITRAGE OPPORTUNITIES                      ║",
+        "╚══════════════════════════════════════════════════════════════╝",
+        "",
+        # Add timestamp and scan summary
+        f"📅 Scan Time: {scan_time}",
+        f"📊 Opportunities Found: {count}",
+        "═" * 65,
+        "",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_empty() -> str:
+    lines = [
+        "🔍 No arbitrage opportunities found in this scan.",
+        "",
+        "💡 Possible reasons:",
+        "   • No matching games between markets",
+        "   • No profitable odds differences",
+        "   • All current games already started",
+        "",
+        "╠" + "═" * 63 + "╣",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_opportunity(idx: int, opp: OpportunityRecord) -> str:
+    """The report block for one opportunity"""
+    venue = venue_name(opp)
+    bet_details = opp['bet_details']
+    lines = [
+        f"📊 Opportunity #{idx}",
+        "═" * 65,
+        "",
+        # Event Details Section with enhanced matchup visibility
+        "🏀 EVENT DETAILS:",
+        "─" * 30,
+        f"Date: {opp['polymarket_date']}",
+        "",
+        "╭" + "─" * 40 + "╮",
+        "│" + " " * 40 + "│",
+        "│" + f"🏀  {opp['polymarket_team']} vs {opp['primary_team']}".center(40) + "│",
+        "│" + " " * 40 + "│",
+        "╰" + "─" * 40 + "╯",
+        "",
+        # Odds Section
+        "📈 ODDS COMPARISON:",
+        "─" * 30,
+        f"{venue} ({opp['polymarket_team']}):",
+        f"  • Decimal Odds: {opp['polymarket_decimal']:.2f}",
+        f"  • Implied Probability: {opp['polymarket_prob']:.1%}",
+        "",
+        f"{opp['bookmaker']} ({opp['primary_team']}):",
+        f"  • Decimal Odds: {opp['primary_decimal']:.2f}",
+        f"  • Implied Probability: {opp['primary_prob']:.1%}",
+        "",
+        # Profit Analysis Section
+        "💰 PROFIT ANALYSIS:",
+        "─" * 30,
+        f"Total Market Probability: {opp['total_probability']:.1%}",
+        f"Theoretical Edge: {opp['theoretical_profit']:.2f}%",
+        "",
+        # Betting Strategy Section
+        "🎯 RECOMMENDED BETS:",
+        "─" * 30,
+        f"Primary Market ({opp['bookmaker']}):",
+        f"  • CAD ${bet_details['primary_bet_cad']:.2f}",
+        "",
+        f"{venue}:",
+        f"  • CAD ${bet_details['polymarket_bet_cad']:.2f}",
+        f"  • USD ${bet_details['polymarket_bet_usd']:.2f}",
+        "",
+        "Expected Profit:",
+        f"  • CAD ${bet_details['potential_profit_cad']:.2f}",
+    ]
+
+    depth = opp.get('depth')
+    if depth:
+        lines += [
+            "",
+            "📚 ORDER BOOK DEPTH:",
+            "─" * 30,
+            f"Max Size (edge ≥ {MIN_EDGE:.1%}):",
+            f"  • {depth['max_shares']:.2f} shares for USD ${depth['max_stake_usd']:.2f}",
+            f"  • Hedge: USD ${depth['primary_stake_usd']:.2f}",
+            f"  • Profit: USD ${depth['profit_usd']:.2f} (edge {depth['edge']:.2%})",
+            "Most Profitable Size:",
+            f"  • {depth['best_shares']:.2f} shares, profit USD ${depth['best_profit_usd']:.2f} (edge {depth['best_edge']:.2%})",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def render_footer(count: int) -> str:
+    lines = [
+        "╔══════════════════════════════════════════════════════════════╗",
+        f"║ Total Opportunities: {count}".ljust(63) + "║",
+        "╚══════════════════════════════════════════════════════════════╝",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_report(records: List[OpportunityRecord], scan_time: str) -> str:
+    """The full text report for one scan"""
+    parts = [render_header(scan_time, len(records))]
+    if not records:
+        parts.append(render_empty())
+        return "".join(parts)
+
+    for idx, record in enumerate(records, 1):
+        parts.append(render_opportunity(idx, record))
+        # Separator between opportunities
+        parts.append("\n" + "╠" + "═" * 63 + "╣\n\n")
+    parts.append(render_footer(len(records)))
+    return "".join(parts)
+
+
+def save_scan(opportunities: List[Dict[str, Any]], clear_previous: bool = True) -> Tuple[List[OpportunityRecord], str]:
+    """
+    Record a scan: append its opportunities to the JSONL log and write the text report rendered
+    from them. One-shot scans replace the previous text report; the scan daemon keeps every one.
+    Returns (records, report path).
+    """
+    os.makedirs(REPORT_DIR, exist_ok=True)
+
+    # Clear previous files
+    for file in (glob.glob(os.path.join(REPORT_DIR, 'arbitrage_opportunities_*.txt')) if clear_previous else ()):
+        try:
+            os.remove(file)
+            print(f"Deleted previous file: {file}")
+        except Exception as e:
+            print(f"Error deleting file {file}: {e}")
+
+    scan_ts = now_epoch()
+    records = opportunity_records(opportunities, scan_ts)
+    append_records(records)
+
+    timestamp = datetime.fromtimestamp(scan_ts).strftime('%Y%m%d_%H%M%S')
+    filename = os.path.join(REPORT_DIR, f'arbitrage_opportunities_{timestamp}.txt')
+    with open(filename, 'w') as f:
+        f.write(render_report(records, datetime.fromtimestamp(scan_ts).strftime("%Y-%m-%d %H:%M:%S")))
+    return records, filename
@@ -0,0 +1,151 @@
+"""
+Depth-aware sizing of arbitrage opportunities.
+
+An opportunity buys shares of one outcome on a prediction market (Polymarket CLOB asks, or
+Kalshi asks) and hedges with a sportsbook bet on the opposing team at decimal odds D. Buying n
+shares for C(n) and staking n / D at the sportsbook pays out n whichever side wins, so
+
+    profit(n) = n * (1 - 1/D) - C(n)
+
+C(n) walks up the ask levels, so profit is concave in n: it grows while the level price is
+below 1 - 1/D and shrinks after. The max size reported is the largest n whose edge (profit over
+total stake) is still at least min_edge; requiring edge >= e is the same as requiring zero
+profit against the tighter margin (m - e(1 - m)) / (1 + e), m = 1 - 1/D, so one walk does both.
+
+Every candidate in a scan is sized in one batch: ask ladders are padded into (candidates x
+levels) arrays, cumulative shares and cost come from cumsum, and the crossing point is found
+with array reductions instead of walking each book in Python.
+"""
+from itertools import chain
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+Levels = Sequence[Tuple[float, float]]  # [(price 0-1, size in shares), ...] best ask first
+
+MIN_EDGE = 0.005  # Smallest edge worth taking the extra size for
+
+
+class DepthSizing(NamedTuple):
+    """Per-candidate arrays; every size is 0 where nothing is profitable"""
+    shares: np.ndarray         # largest number of shares with edge >= min_edge (= guaranteed payout, USD)
+    market_cost: np.ndarray    # USD paid for those shares across the ask levels
+    primary_stake: np.ndarray  # sportsbook stake that hedges them, in payout currency (USD)
+    profit: np.ndarray         # guaranteed profit at that size, USD
+    edge: np.ndarray           # profit / total stake at that size
+    best_shares: np.ndarray    # size with the highest profit
+    best_profit: np.ndarray
+    best_edge: np.ndarray
+
+
+def pack_levels(ladders: List[Levels]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pad ask ladders into (candidates, levels) price and size arrays; padding never fills"""
+    n_levels = max((len(ladder) for ladder in ladders), default=0)
+    prices = np.full((len(ladders), n_levels), np.inf)
+    sizes = np.zeros((len(ladders), n_levels))
+    for i, ladder in enumerate(ladders):
+        if ladder:
+            level_prices, level_sizes = zip(*ladder)
+            prices[i, :len(ladder)] = level_prices
+            sizes[i, :len(ladder)] = level_sizes
+    return prices, sizes
+
+
+def size_opportunities(ladders: List[Levels], primary_decimal: Sequence[float], min_edge: float = MIN_EDGE) -> DepthSizing:
+    """
+    Size every candidate at once. ladders[i] is the ask side for the prediction-market leg of
+    candidate i, primary_decimal[i] the sportsbook decimal odds on the opposing outcome.
+    """
+    prices, sizes = pack_levels(ladders)
+    margin = 1 - 1 / np.asarray(primary_decimal, dtype=float)[:, None]  # payout per share left after the hedge
+    required = (margin - min_edge * (1 - margin)) / (1 + min_edge)    # same, net of the edge we insist on
+
+    if prices.shape[1] == 0:
+        zeros = np.zeros(len(ladders))
+        return DepthSizing(*(zeros,) * 8)
+
+    finite = np.isfinite(prices)
+    level_cost = np.where(finite, prices, 0.0) * sizes
+    cum_shares = np.cumsum(sizes, axis=1)
+    cum_cost = np.cumsum(level_cost, axis=1)
+    cum_surplus = cum_shares * required - cum_cost  # >= 0 while the edge holds after each full level
+
+    # Concave with surplus(0) = 0, so the levels that keep the edge form a prefix
+    full = np.sum((cum_surplus >= 0) & finite, axis=1)
+    rows = np.arange(len(ladders))
+
+    prev_shares = np.where(full > 0, cum_shares[rows, np.maximum(full - 1, 0)], 0.0)
+    prev_cost = np.where(full > 0, cum_cost[rows, np.maximum(full - 1, 0)], 0.0)
+    prev_surplus = prev_shares * required[:, 0] - prev_cost
+
+    # Part of the next level, up to where the edge drops to min_edge
+    has_next = full < prices.shape[1]
+    next_index = np.minimum(full, prices.shape[1] - 1)
+    next_price = np.where(has_next, prices[rows, next_index], np.inf)
+    next_size = np.where(has_next, sizes[rows, next_index], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        extra = np.where(
+            np.isfinite(next_price) & (next_price > required[:, 0]),
+            np.minimum(prev_surplus / (next_price - required[:, 0]), next_size),
+            0.0,
+        )
+    extra = np.maximum(np.nan_to_num(extra), 0.0)
+
+    shares = prev_shares + extra
+    market_cost = prev_cost + np.where(extra > 0, next_price, 0.0) * extra
+    primary_stake = shares * (1 - margin[:, 0])
+    profit = shares - market_cost - primary_stake
+
+    # Highest profit: take every level priced below the margin
+    cheap = finite & (prices < margin)
+    best_shares = np.sum(np.where(cheap, sizes, 0.0), axis=1)
+    best_cost = np.sum(np.where(cheap, level_cost, 0.0), axis=1)
+    best_profit = best_shares * margin[:, 0] - best_cost
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edge = np.where(shares > 0, profit / (market_cost + primary_stake), 0.0)
+        best_edge = np.where(best_shares > 0, best_profit / (best_cost + best_shares * (1 - margin[:, 0])), 0.0)
+
+    return DepthSizing(shares, market_cost, primary_stake, profit, edge, best_shares, best_profit, best_edge)
+
+
+def kalshi_ask_levels(orderbook, side: str = "yes") -> List[Tuple[float, float]]:
+    """
+    Ask ladder for one side of a Kalshi market from its /orderbook response. Kalshi only lists
+    bids (in cents); buying YES at 100 - p fills against a NO bid at p, and vice versa.
+    """
+    book = orderbook.get("orderbook", orderbook) or {}
+    opposite = book.get("no" if side == "yes" else "yes") or []
+    return sorted((round((100 - price) / 100, 4), float(quantity)) for price, quantity in opposite)
+
+
+def kalshi_team_ask_levels(team_orderbook, other_orderbook) -> List[Tuple[float, float]]:
+    """
+    Ask ladder for backing one team of a Kalshi game (one "will <team> win" market per team):
+    YES on the team's market or NO on the other team's, merged by price, best first. Either
+    order book may be None when it couldn't be fetched.
+    """
+    sizes = {}
+    for price, size in chain(
+        kalshi_ask_levels(team_orderbook, "yes") if team_orderbook else (),
+        kalshi_ask_levels(other_orderbook, "no") if other_orderbook else (),
+    ):
+        sizes[price] = sizes.get(price, 0.0) + size
+    return sorted(sizes.items())
+
+
+def sizing_report(sizing: DepthSizing, i: int, cad_to_usd_rate: Optional[float] = None) -> dict:
+    """Candidate i's sizing as plain floats for an opportunity record"""
+    report = {
+        'max_shares': round(float(sizing.shares[i]), 2),
+        'max_stake_usd': round(float(sizing.market_cost[i]), 2),
+        'primary_stake_usd': round(float(sizing.primary_stake[i]), 2),
+        'profit_usd': round(float(sizing.profit[i]), 2),
+        'edge': round(float(sizing.edge[i]), 5),
+        'best_shares': round(float(sizing.best_shares[i]), 2),
+        'best_profit_usd': round(float(sizing.best_profit[i]), 2),
+        'best_edge': round(float(sizing.best_edge[i]), 5),
+    }
+    if cad_to_usd_rate:
+        report['primary_stake_cad'] = round(float(sizing.primary_stake[i]) / cad_to_usd_rate, 2)
+    return report
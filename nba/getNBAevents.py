@@ -1,75 +1,96 @@
 import json
 import re
-from datetime import datetime, timezone
-from pytz import timezone as pytz_timezone, utc
 import requests
 import os
+from common.http_client import http_client
+from common.timeutil import format_local, now_epoch, to_epoch
+from common.json_stream import iter_json_file
+from common.metrics import metrics
 
 # Load data from the specified file
 file_path = 'jsonOutputs/gamma_events.json'
 nbaFilePath = 'jsonOutputs/nbaEvents.json'
+ODDS_SERVER_URL = os.getenv('ODDS_SERVER_URL', 'http://127.0.0.1:8080')
 
-# Function to retrieve all NBA events and adjust time to EST
-def get_nba_events_from_file(file_path):
+class EventPredicate:
+    """
+    Precompiled test for whether a Polymarket event belongs to a league.
+
+    An event matches if the league name appears as a word in one of the text fields, if one of
+    its tags has a matching label/slug, or if its slug/ticker starts with one of slug_prefixes.
+    """
+
+    def __init__(self, league, tags=(), slug_prefixes=(), fields=("title", "ticker", "description")):
+        self.league = league
+        self.pattern = re.compile(rf'\b({re.escape(league.upper())}|{re.escape(league.lower())})\b')
+        self.tags = {tag.lower() for tag in tags}
+        self.slug_prefixes = tuple(prefix.lower() for prefix in slug_prefixes)
+        self.fields = fields
+
+    def __call__(self, event):
+        if self.slug_prefixes:
+            slug = str(event.get("slug") or event.get("ticker") or "").lower()
+            if slug.startswith(self.slug_prefixes):
+                return True
+
+        if self.tags:
+            for tag in event.get("tags") or ():
+                if isinstance(tag, dict) and {str(tag.get("label", "")).lower(), str(tag.get("slug", "")).lower()} & self.tags:
+                    return True
+
+        search = self.pattern.search
+        return any(search(str(event.get(field, ""))) for field in self.fields)
+
+NBA_EVENT_PREDICATE = EventPredicate("NBA")
+
+def iter_matching_events(events, predicate=NBA_EVENT_PREDICATE):
+    """Lazily yield only the events accepted by predicate"""
+    return (event for event in events if predicate(event))
+
+# Function to keep the NBA events from an iterable of Polymarket events and adjust time to EST
+def filter_nba_events(events, predicate=NBA_EVENT_PREDICATE):
+    nba_events = []
+    current_ts = now_epoch()
+    print("Current Time EST", format_local(current_ts))
+
+    for event in iter_matching_events(events, predicate):
+        end_date = event.get("endDate")
+        if end_date:
+            # Parsed once into a UTC epoch, everything below is integer comparisons
+            end_ts = to_epoch(end_date)
+            if end_ts is None:
+                print(f"Warning: Could not parse date {end_date}")
+                continue
+
+            # Skip if event is in the past
+            if end_ts < current_ts:
+                continue
+            
+            # Snapshot/report display format, EST with space separator
+            formatted_end_date = format_local(end_ts)
+        else:
+            end_ts = None
+            formatted_end_date = None
+
+        nba_event_info = {
+            "id": event.get("id"),
+            "title": event.get("title"),
+            "ticker": event.get("ticker"),
+            "description": event.get("description"),
+            "endDate": formatted_end_date,
+            "markets": event.get("markets", [])
+        }
+        nba_events.append((end_ts, nba_event_info))
+
+    # Sorting by the endDate, closest to current time
+    nba_events.sort(key=lambda item: abs(item[0] - current_ts) if item[0] is not None else float('inf'))
+
+    return [nba_event_info for _, nba_event_info in nba_events]
+
+# Function to retrieve all NBA events from a saved Polymarket snapshot, parsing one event at a time
+def get_nba_events_from_file(file_path, predicate=NBA_EVENT_PREDICATE):
     try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-
-        nba_events = []
-        current_time = datetime.now(timezone.utc)
-        est_timezone = pytz_timezone('US/Eastern')
-        print("Time Zone", est_timezone)
-        current_time_est = current_time.astimezone(est_timezone)
-        print("Current Time EST", current_time_est)
-
-        for event in data:
-            pattern = r'\b(NBA|nba)\b'
-            if any(re.search(pattern, str(event.get(field, ""))) 
-                  for field in ["title", "ticker", "description"]):
-                
-                end_date = event.get("endDate")
-                if end_date:
-                    try:
-                        # Try parsing with 'T' separator first
-                        event_end_time = datetime.strptime(end_date, "%Y-%m-%dT%H:%M:%S%z")
-                    except ValueError:
-                        try:
-                            # If that fails, try parsing with space separator
-                            event_end_time = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S%z")
-                        except ValueError:
-                            print(f"Warning: Could not parse date {end_date}")
-                            continue
-
-                    # Skip if event is in the past (using EST timezone)
-                    event_end_time_est = event_end_time.astimezone(est_timezone)
-                    if event_end_time_est < current_time_est:
-                        continue
-                    
-                    # Convert end_date from UTC to EST
-                    est_timezone = pytz_timezone('US/Eastern')
-                    event_end_time_est = event_end_time.astimezone(est_timezone)
-                    # Formatting with space separator
-                    formatted_end_date = event_end_time_est.strftime("%Y-%m-%d %H:%M:%S%z")
-                else:
-                    formatted_end_date = None
-
-                nba_event_info = {
-                    "id": event.get("id"),
-                    "title": event.get("title"),
-                    "ticker": event.get("ticker"),
-                    "description": event.get("description"),
-                    "endDate": formatted_end_date,
-                    "markets": event.get("markets", [])
-                }
-                nba_events.append(nba_event_info)
-
-        # Sorting by the endDate, closest to current time
-        nba_events.sort(
-            key=lambda x: abs((datetime.strptime(x["endDate"], "%Y-%m-%d %H:%M:%S%z") - current_time).total_seconds())
-            if x.get("endDate") else float('inf')
-        )
-
-        return nba_events
+        return filter_nba_events(iter_json_file(file_path), predicate)
     except FileNotFoundError:
         return "File not found. Please check the file path and try again."
 
@@ -84,6 +105,46 @@ def write_nba_events_to_file(file_path, output_path='jsonOutputs/nbaEvents.json'
     else:
         return nba_events  # Return the error message
     
+# Sports each scan cycle fetches, all in one call to the odds server's batch endpoint
+SCAN_SPORTS = ("basketball_nba",)
+
+# Last batch response per sports list, revalidated with If-None-Match so unchanged odds cost a 304
+_mira_last = {}  # sports -> (etag, data)
+
+def fetch_mira_odds(sports=SCAN_SPORTS):
+    """
+    Odds for several sports in one call to the odds server's batch endpoint.
+    Returns {"sports": {sport: payload}, "timing_ms": ..., "failed": [...], "remaining_requests": ...},
+    the same object as last time while the server answers 304, or None on failure.
+    """
+    sports = tuple(sports)
+    etag, last = _mira_last.get(sports, (None, None))
+    headers = {"If-None-Match": etag} if etag else {}
+    try:
+        with metrics.span("page_fetch_seconds", venue="odds_server"):
+            response = http_client.get(f'{ODDS_SERVER_URL}/api/odds', params={"sports": ",".join(sports)}, headers=headers)
+        metrics.incr("pages_fetched_total", venue="odds_server", status=response.status_code)
+        if response.status_code == 304 and last is not None:
+            return last
+        response.raise_for_status()
+        metrics.incr("bytes_fetched_total", len(response.content), venue="odds_server")
+        data = response.json()
+        _mira_last[sports] = (response.headers.get("ETag"), data)
+        return data
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching odds for {', '.join(sports)}: {e}")
+        return None
+
+def fetch_mira_nba_events():
+    """NBA odds out of the cycle's batch call. Returns the sport's payload, or None on failure."""
+    batch = fetch_mira_odds()
+    payload = batch["sports"].get("basketball_nba") if batch else None
+    if payload is None or "error" in payload:
+        if batch:
+            print(f"Error fetching NBA events: {(payload or {}).get('error', 'missing from the batch response')}")
+        return None
+    return payload
+
 def get_mira_nba_events():
     file_path = 'jsonOutputs/miraNBAEvents.json'
     
@@ -95,18 +156,16 @@ def get_mira_nba_events():
         open(file_path, 'w').close()
         
         # Fetch new data
-        response = requests.get('http://127.0.0.1:8080/api/basketball_nba/odds')
-        response.raise_for_status()
+        mira_data = fetch_mira_nba_events()
+        if mira_data is None:
+            return "Failed to fetch NBA events"
         
         # Write new data to the file
         with open(file_path, 'w') as f:
-            json.dump(response.json(), f, indent=4)
+            json.dump(mira_data, f, indent=4)
             
         return "NBA events have been successfully written to miraNBAEvents.json"
         
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching NBA events: {e}")
-        return "Failed to fetch NBA events"
     except IOError as e:
         print(f"Error handling file operations: {e}")
         return "Failed to write to file"
@@ -1,57 +1,84 @@
 import json
-import os
-from datetime import datetime, timezone
 import requests
-from typing import Optional, Set, Dict, Any, List
-import pytz
-import glob
+from datetime import date, datetime
+from common.fx_rate import fx_rates
+from common.metrics import metrics
+from common.timeutil import local_date, now_epoch, to_epoch, to_local
+from typing import Optional, Set, Dict, Any, List, Tuple, FrozenSet
+from nba.arbEngine import MatchedGame, arb_thresholds, pack_matched_games, scan_arbitrage
+from nba.arbReport import VENUE_NAMES, save_scan, venue_name
+from nba.arbSizing import kalshi_team_ask_levels, size_opportunities, sizing_report
+from secondaryMarkets.models import EventQuotes, MarketQuote, polymarket_events_from_gamma
 
 # Constants
 POLYMARKET_NBA = "jsonOutputs/nbaEvents.json"
 MIRA_NBA = "jsonOutputs/miraNBAEvents.json"
-DEFAULT_EXCHANGE_RATE = 0.73
-EXCHANGE_RATE_API = "https://api.exchangerate-api.com/v4/latest/CAD"
+MATCH_TOLERANCE_SECONDS = 3600  # Max start time difference between venues for the same game
 
 # Type aliases
 GameData = Dict[str, Any]
 ArbitrageOpportunity = Dict[str, Any]
+GameKey = Tuple[FrozenSet[str], date]
+
+# Full Odds API names to the short names Polymarket uses in its titles
+TEAM_NAME_MAPPING = {
+    "Philadelphia 76ers": "76ers",
+    "Golden State Warriors": "Warriors",
+    "Los Angeles Lakers": "Lakers",
+    "Los Angeles Clippers": "Clippers",
+    "New York Knicks": "Knicks",
+    "Brooklyn Nets": "Nets",
+    "New Orleans Pelicans": "Pelicans",
+    "San Antonio Spurs": "Spurs",
+    "Portland Trail Blazers": "Trail Blazers",
+    "Oklahoma City Thunder": "Thunder",
+    "Charlotte Hornets": "Hornets",
+    "Milwaukee Bucks": "Bucks",
+    "Phoenix Suns": "Suns",
+    "Miami Heat": "Heat",
+    "Detroit Pistons": "Pistons",
+    "Boston Celtics": "Celtics",
+    "Toronto Raptors": "Raptors",
+    "Denver Nuggets": "Nuggets",
+    "Minnesota Timberwolves": "Timberwolves",
+    "Sacramento Kings": "Kings",
+    "Memphis Grizzlies": "Grizzlies",
+    "Cleveland Cavaliers": "Cavaliers",
+    "Indiana Pacers": "Pacers",
+    "Chicago Bulls": "Bulls",
+    "Atlanta Hawks": "Hawks",
+    "Dallas Mavericks": "Mavericks",
+    "Houston Rockets": "Rockets",
+    "Washington Wizards": "Wizards",
+    "Utah Jazz": "Jazz",
+}
+
+def _team_aliases() -> Dict[str, str]:
+    """Other spellings venues use for a team: 'Boston', 'Los Angeles L', 'LA Clippers', ..."""
+    aliases, cities = {}, {}
+    for full_name, short_name in TEAM_NAME_MAPPING.items():
+        city = full_name[:-len(short_name)].strip()
+        cities.setdefault(city, []).append(short_name)
+        aliases[short_name] = short_name
+        aliases[f"{city} {short_name[0]}"] = short_name
+    for city, short_names in cities.items():
+        if len(short_names) == 1:  # 'Los Angeles' alone can't be resolved
+            aliases[city] = short_names[0]
+    aliases["LA Lakers"], aliases["LA Clippers"] = "Lakers", "Clippers"
+    return aliases
+
+TEAM_ALIASES = _team_aliases()
 
 def normalize_team_name(team_name: str) -> str:
     """
     Normalize team names to a common format by removing city/location names.
     """
-    name_mapping = {
-        "Philadelphia 76ers": "76ers",
-        "Golden State Warriors": "Warriors",
-        "Los Angeles Lakers": "Lakers",
-        "Los Angeles Clippers": "Clippers",
-        "New York Knicks": "Knicks",
-        "Brooklyn Nets": "Nets",
-        "New Orleans Pelicans": "Pelicans",
-        "San Antonio Spurs": "Spurs",
-        "Portland Trail Blazers": "Trail Blazers",
-        "Oklahoma City Thunder": "Thunder",
-        "Charlotte Hornets": "Hornets",
-        "Milwaukee Bucks": "Bucks",
-        "Phoenix Suns": "Suns",
-        "Miami Heat": "Heat",
-        "Detroit Pistons": "Pistons",
-        "Boston Celtics": "Celtics",
-        "Toronto Raptors": "Raptors",
-        "Denver Nuggets": "Nuggets",
-        "Minnesota Timberwolves": "Timberwolves",
-        "Sacramento Kings": "Kings",
-        "Memphis Grizzlies": "Grizzlies",
-        "Cleveland Cavaliers": "Cavaliers",
-        "Indiana Pacers": "Pacers",
-        "Chicago Bulls": "Bulls",
-        "Atlanta Hawks": "Hawks",
-        "Dallas Mavericks": "Mavericks",
-        "Houston Rockets": "Rockets",
-        "Washington Wizards": "Wizards",
-        "Utah Jazz": "Jazz",
-    }
-    return name_mapping.get(team_name, team_name)
+    return TEAM_NAME_MAPPING.get(team_name, team_name)
+
+def resolve_team_name(team_name: str) -> str:
+    """Like normalize_team_name, also accepting city-only labels such as Kalshi's ('Boston', 'Los Angeles L')"""
+    team_name = team_name.strip()
+    return TEAM_NAME_MAPPING.get(team_name) or TEAM_ALIASES.get(team_name, team_name)
 
 def get_teams_from_title(title: str) -> Set[str]:
     """
@@ -69,16 +96,8 @@ def decimal_to_implied_probability(decimal_odds: float) -> float:
     return round(1 / decimal_odds, 3)
 
 def get_exchange_rate() -> float:
-    """Get CAD to USD exchange rate from Exchange Rate API"""
-    try:
-        response = requests.get(EXCHANGE_RATE_API, timeout=5)
-        if response.status_code == 200:
-            return response.json()['rates']['USD']
-    except Exception as e:
-        print(f"Warning: Could not fetch exchange rate: {e}")
-    
-    print(f"Using default CAD/USD rate of {DEFAULT_EXCHANGE_RATE}")
-    return DEFAULT_EXCHANGE_RATE
+    """Get CAD to USD exchange rate, served from the shared TTL cache"""
+    return fx_rates.get_rate()
 
 def calculate_arbitrage_bets(
     primary_prob: float, 
@@ -116,20 +135,11 @@ def calculate_arbitrage_bets(
 
 def convert_to_est(date_str: str) -> datetime:
     """Convert date string to EST datetime object"""
-    try:
-        # Try parsing with timezone
-        dt = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S%z")
-    except ValueError:
-        try:
-            # Try parsing without timezone and assume UTC
-            dt = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-            dt = dt.replace(tzinfo=timezone.utc)
-        except ValueError:
-            print(f"Warning: Could not parse date {date_str}")
-            raise
-    
-    est_tz = pytz.timezone('US/Eastern')
-    return dt.astimezone(est_tz)
+    ts = to_epoch(date_str)
+    if ts is None:
+        print(f"Warning: Could not parse date {date_str}")
+        raise ValueError(f"Could not parse date {date_str}")
+    return to_local(ts)
 
 def process_arbitrage_opportunity(
     poly_team: str,
@@ -138,12 +148,14 @@ def process_arbitrage_opportunity(
     primary_prob: float,
     bookmaker: str,
     poly_date: str,
-    mira_date: str
+    mira_date: str,
+    cad_to_usd_rate: Optional[float] = None,
+    venue: str = "polymarket"
 ) -> ArbitrageOpportunity:
     """Process and format an arbitrage opportunity"""
     poly_decimal = 1 / poly_prob
     primary_decimal = 1 / primary_prob
-    bet_details = calculate_arbitrage_bets(primary_prob, poly_prob)
+    bet_details = calculate_arbitrage_bets(primary_prob, poly_prob, cad_to_usd_rate=cad_to_usd_rate)
     
     return {
         'polymarket_team': poly_team,
@@ -157,99 +169,267 @@ def process_arbitrage_opportunity(
         'theoretical_profit': ((1 - (poly_prob + primary_prob)) * 100),
         'bet_details': bet_details,
         'polymarket_date': poly_date,
-        'primary_date': mira_date
+        'primary_date': mira_date,
+        'venue': venue  # Prediction market the polymarket_* fields were quoted on
     }
 
-def save_arbitrage_opportunities(opportunities: List[ArbitrageOpportunity]) -> None:
-    """Save arbitrage opportunities to a file with improved visual formatting"""
-    os.makedirs('arbOutput', exist_ok=True)
-    
-    # Clear previous files
-    for file in glob.glob('arbOutput/arbitrage_opportunities_*.txt'):
-        try:
-            os.remove(file)
-            print(f"Deleted previous file: {file}")
-        except Exception as e:
-            print(f"Error deleting file {file}: {e}")
-    
-    # Write new opportunities
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f'arbOutput/arbitrage_opportunities_{timestamp}.txt'
-    
-    with open(filename, 'w') as f:
-        f.write("╔══════════════════════════════════════════════════════════════╗\n")
-        f.write("║                  ARBITRAGE OPPORTUNITIES                      ║\n")
-        f.write("╚══════════════════════════════════════════════════════════════╝\n\n")
+def save_arbitrage_opportunities(opportunities: List[ArbitrageOpportunity], clear_previous: bool = True) -> str:
+    """
+    Append the opportunities to the JSONL record log, write the text report rendered from them
+    and return the report's path.
+    """
+    return save_scan(opportunities, clear_previous)[1]
+
+def build_event_index(
+    events: List[EventQuotes],
+    now_ts: int,
+    exact_times: bool = True
+) -> Dict[GameKey, List[Tuple[Optional[int], EventQuotes]]]:
+    """
+    Index upcoming games by (normalized team set, EST game date).
+
+    Team names are normalized once per event here, so matching an Odds API game is a
+    dict lookup plus a time window check over the (usually single) game in its bucket.
+    Venues that only give a game date (exact_times=False, Kalshi) are matched on the date alone.
+    """
+    index = {}
+    today = local_date(now_ts)
+    for poly_game in events:
+        if poly_game.end_ts is None or not poly_game.markets or not poly_game.title:
+            print(f"Skipping incomplete {poly_game.venue} event {poly_game.title or poly_game.event_id}")
+            continue
+
+        if exact_times and poly_game.end_ts < now_ts:
+            continue
+        if not exact_times and local_date(poly_game.end_ts) < today:
+            continue
+
+        poly_teams = frozenset(normalize_team_name(team) for team in get_teams_from_title(poly_game.title))
+
+        game_ts = poly_game.end_ts if exact_times else None
+        index.setdefault((poly_teams, local_date(poly_game.end_ts)), []).append((game_ts, poly_game))
+    return index
+
+def build_polymarket_index(poly_events: List[EventQuotes], now_ts: int) -> Dict[GameKey, List[Tuple[int, EventQuotes]]]:
+    """Index upcoming Polymarket games, see build_event_index"""
+    return build_event_index(poly_events, now_ts)
+
+def build_kalshi_index(kalshi_events: List[EventQuotes], now_ts: int) -> Dict[GameKey, List[Tuple[None, EventQuotes]]]:
+    """Index Kalshi games from today on; Kalshi only tells us the game date"""
+    return build_event_index(kalshi_events, now_ts, exact_times=False)
+
+def lookup_polymarket_games(
+    index: Dict[GameKey, List[Tuple[Optional[int], EventQuotes]]],
+    teams: FrozenSet[str],
+    game_ts: int
+) -> List[EventQuotes]:
+    """Return the indexed games for these teams starting within the match tolerance (or on the same date)"""
+    return [
+        poly_game for poly_ts, poly_game in index.get((teams, local_date(game_ts)), ())
+        if poly_ts is None or abs(poly_ts - game_ts) <= MATCH_TOLERANCE_SECONDS
+    ]
+
+def print_arbitrage_opportunity(opp: ArbitrageOpportunity) -> None:
+    bet_details = opp['bet_details']
+    print(f"\nARBITRAGE OPPORTUNITY FOUND!")
+    print(f"{venue_name(opp)} Team: {opp['polymarket_team']} (odds: {opp['polymarket_decimal']:.2f}, prob: {opp['polymarket_prob']:.3f})")
+    print(f"Bookmaker: {opp['bookmaker']}")
+    print(f"Primary Market Team: {opp['primary_team']} (odds: {opp['primary_decimal']:.2f}, prob: {opp['primary_prob']:.3f})")
+    print(f"Total probability: {opp['total_probability']:.3f}")
+    print(f"Theoretical profit: {opp['theoretical_profit']:.2f}%")
+    print(f"Bet Details:")
+    print(f"  Primary Market Bet (CAD): ${bet_details['primary_bet_cad']:.2f}")
+    print(f"  {venue_name(opp)} Bet (CAD): ${bet_details['polymarket_bet_cad']:.2f}")
+    print(f"  {venue_name(opp)} Bet (USD): ${bet_details['polymarket_bet_usd']:.2f}")
+    print(f"  Theoretical Profit (CAD): ${bet_details['potential_profit_cad']:.2f}")
+    depth = opp.get('depth')
+    if depth:
+        print(f"Order Book Depth:")
+        print(f"  Max Size: {depth['max_shares']:.2f} shares for USD ${depth['max_stake_usd']:.2f} (edge {depth['edge']:.2%})")
+        print(f"  Best Size: {depth['best_shares']:.2f} shares, profit USD ${depth['best_profit_usd']:.2f} (edge {depth['best_edge']:.2%})")
+
+def evaluate_matched_games(matches: List[MatchedGame], order_books=None, kalshi_api=None) -> List[ArbitrageOpportunity]:
+    """
+    Compare the best bookmaker odds against Polymarket prices for all matched games in one vectorized pass.
+    With live order_books (an OrderBookManager) Polymarket is priced at each book's best ask and its
+    opportunities are sized against the book's ask depth; with a kalshi_api, Kalshi opportunities
+    are sized against the order books fetched for them.
+    """
+    return [opp for _, opp in evaluate_matched_games_by_game(matches, order_books, kalshi_api)]
+
+def kalshi_depth(kalshi_api, market: MarketQuote, k: int, orderbooks: Dict[str, Any]) -> List[Tuple[float, float]]:
+    """
+    Ask ladder for outcome k of a Kalshi game, from both team markets' order books; empty if
+    unavailable. orderbooks caches the books by ticker, both outcomes of a game use the same two.
+    """
+    if len(market.token_ids) != 2:
+        return []
+    tickers = (market.token_ids[k], market.token_ids[1 - k])
+    try:
+        for ticker in tickers:
+            if ticker not in orderbooks:
+                orderbooks[ticker] = kalshi_api.get_market_orderbook(ticker)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching Kalshi order books for {market.market_id}: {e}")
+        return []
+    return kalshi_team_ask_levels(*(orderbooks[ticker] for ticker in tickers))
+
+def add_depth_sizing(
+    opportunities: List[Tuple[int, ArbitrageOpportunity]],
+    matches: List[MatchedGame],
+    order_books=None,
+    kalshi_api=None,
+    cad_to_usd_rate: Optional[float] = None
+) -> None:
+    """
+    Size every opportunity whose market depth is known in one batch, stored under 'depth':
+    Polymarket ones against the live order_books, Kalshi ones against books fetched through kalshi_api.
+    """
+    sized, ladders, primary_decimal = [], [], []
+    kalshi_orderbooks = {}
+    for game, opp in opportunities:
+        market = matches[game][1].markets[0]
+        if opp['polymarket_team'] not in market.outcomes:
+            continue
+        k = market.outcomes.index(opp['polymarket_team'])
+        if market.venue == "kalshi":
+            ladder = kalshi_depth(kalshi_api, market, k, kalshi_orderbooks) if kalshi_api is not None else []
+        else:
+            ladder = order_books.ask_levels(market.token_ids[k]) if order_books is not None and k < len(market.token_ids) else []
+        if not ladder:
+            continue
+        sized.append(opp)
+        ladders.append(ladder)
+        primary_decimal.append(opp['primary_decimal'])
+
+    if not sized:
+        return
+    sizing = size_opportunities(ladders, primary_decimal)
+    for i, opp in enumerate(sized):
+        opp['depth'] = sizing_report(sizing, i, cad_to_usd_rate)
+
+def live_moneylines(matches: List[MatchedGame], order_books=None) -> List[MarketQuote]:
+    """Each game's moneyline (the event's first market), Polymarket outcomes priced at their book's best ask when it has one"""
+    markets = []
+    for _, poly_game, _ in matches:
+        market = poly_game.markets[0]
+        if order_books is not None and market.venue == "polymarket":
+            asks = [order_books.best_ask(token_id) for token_id in market.token_ids[:len(market.prices)]]
+            if any(ask is not None for ask in asks):
+                prices = [price if ask is None else ask for price, ask in zip(market.prices, asks)]
+                market = MarketQuote(**dict(market.to_dict(), prices=prices + list(market.prices[len(prices):])))
+        markets.append(market)
+    return markets
+
+def order_book_thresholds(matches: List[MatchedGame]) -> List[Tuple[int, str, float]]:
+    """
+    (game index, token id, highest ask that is still an arbitrage) for both outcomes of every
+    Polymarket moneyline; the ask is NaN where the outcome can't be paired with a sportsbook price.
+    """
+    markets = [poly_game.markets[0] for _, poly_game, _ in matches]
+    thresholds = arb_thresholds(pack_matched_games(matches, markets, normalize_team_name))
+    return [
+        (g, token_id, float(thresholds[g, k]))
+        for g, market in enumerate(markets) if market.venue == "polymarket"
+        for k, token_id in enumerate(market.token_ids[:2])
+    ]
+
+def evaluate_matched_games_by_game(matches: List[MatchedGame], order_books=None, kalshi_api=None) -> List[Tuple[int, ArbitrageOpportunity]]:
+    """Like evaluate_matched_games, with the index in matches of the game each opportunity belongs to"""
+    packed = pack_matched_games(matches, live_moneylines(matches, order_books), normalize_team_name)
+    hits = scan_arbitrage(packed)
+
+    # One rate for every opportunity in the scan
+    cad_to_usd_rate = get_exchange_rate() if hits else None
+
+    arbitrage_opportunities = []
+    for hit in hits:
+        mira_game, poly_game, _ = matches[hit.game]
+        arb_opportunity = process_arbitrage_opportunity(
+            hit.poly_team,
+            hit.poly_prob,
+            hit.primary_team,
+            hit.primary_prob,
+            hit.bookmaker,
+            poly_game.end_date,
+            mira_game['commence_time'],
+            cad_to_usd_rate,
+            poly_game.venue
+        )
+        arbitrage_opportunities.append((hit.game, arb_opportunity))
+
+    if arbitrage_opportunities and (order_books is not None or kalshi_api is not None):
+        add_depth_sizing(arbitrage_opportunities, matches, order_books, kalshi_api, cad_to_usd_rate)
+
+    for _, arb_opportunity in arbitrage_opportunities:
+        print_arbitrage_opportunity(arb_opportunity)
+
+    return arbitrage_opportunities
+
+def match_games(
+    mira_data: Dict[str, Any],
+    poly_index: Dict[GameKey, List[Tuple[int, EventQuotes]]],
+    now_ts: int,
+    kalshi_index: Optional[Dict[GameKey, List[Tuple[None, EventQuotes]]]] = None
+) -> List[MatchedGame]:
+    """Pair every upcoming Odds API game with the indexed Polymarket (and Kalshi) games for the same matchup"""
+    indexes = [poly_index] if kalshi_index is None else [poly_index, kalshi_index]
+    matches = []
+
+    # Main matching logic, one index lookup per Odds API game
+    for game_id, mira_game in mira_data['odds_data'].items():
+        # The odds server sends commence_ts; older payloads only have the UTC commence_time string
+        mira_ts = mira_game.get('commence_ts') or to_epoch(mira_game.get('commence_time'))
+        if mira_ts is None:
+            print(f"Error parsing date for game {game_id}: {mira_game.get('commence_time')}")
+            continue
         
-        # Add timestamp and scan summary
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        f.write(f"📅 Scan Time: {current_time}\n")
-        f.write(f"📊 Opportunities Found: {len(opportunities)}\n")
-        f.write("═" * 65 + "\n\n")
-
-        if not opportunities:
-            f.write("🔍 No arbitrage opportunities found in this scan.\n\n")
-            f.write("💡 Possible reasons:\n")
-            f.write("   • No matching games between markets\n")
-            f.write("   • No profitable odds differences\n")
-            f.write("   • All current games already started\n\n")
-            f.write("╠" + "═" * 63 + "╣\n")
-            return
-
-        for idx, opp in enumerate(opportunities, 1):
-            f.write(f"📊 Opportunity #{idx}\n")
-            f.write("═" * 65 + "\n\n")
-            
-            # Event Details Section with enhanced matchup visibility
-            f.write("🏀 EVENT DETAILS:\n")
-            f.write("─" * 30 + "\n")
-            f.write(f"Date: {opp['polymarket_date']}\n")
-            f.write("\n")
-            f.write("╭" + "─" * 40 + "╮\n")
-            f.write("│" + " " * 40 + "│\n")
-            f.write("│" + f"🏀  {opp['polymarket_team']} vs {opp['primary_team']}".center(40) + "│\n")
-            f.write("│" + " " * 40 + "│\n")
-            f.write("╰" + "─" * 40 + "╯\n\n")
-            
-            # Odds Section
-            f.write("📈 ODDS COMPARISON:\n")
-            f.write("─" * 30 + "\n")
-            f.write(f"Polymarket ({opp['polymarket_team']}):\n")
-            f.write(f"  • Decimal Odds: {opp['polymarket_decimal']:.2f}\n")
-            f.write(f"  • Implied Probability: {opp['polymarket_prob']:.1%}\n\n")
-            
-            f.write(f"{opp['bookmaker']} ({opp['primary_team']}):\n")
-            f.write(f"  • Decimal Odds: {opp['primary_decimal']:.2f}\n")
-            f.write(f"  • Implied Probability: {opp['primary_prob']:.1%}\n\n")
-            
-            # Profit Analysis Section
-            f.write("💰 PROFIT ANALYSIS:\n")
-            f.write("─" * 30 + "\n")
-            f.write(f"Total Market Probability: {opp['total_probability']:.1%}\n")
-            f.write(f"Theoretical Edge: {opp['theoretical_profit']:.2f}%\n\n")
-            
-            # Betting Strategy Section
-            f.write("🎯 RECOMMENDED BETS:\n")
-            f.write("─" * 30 + "\n")
-            f.write(f"Primary Market ({opp['bookmaker']}):\n")
-            f.write(f"  • CAD ${opp['bet_details']['primary_bet_cad']:.2f}\n\n")
-            f.write("Polymarket:\n")
-            f.write(f"  • CAD ${opp['bet_details']['polymarket_bet_cad']:.2f}\n")
-            f.write(f"  • USD ${opp['bet_details']['polymarket_bet_usd']:.2f}\n\n")
-            
-            f.write("Expected Profit:\n")
-            f.write(f"  • CAD ${opp['bet_details']['potential_profit_cad']:.2f}\n")
-            
-            # Separator between opportunities
-            f.write("\n" + "╠" + "═" * 63 + "╣\n\n")
+        if mira_ts < now_ts:
+            continue
         
-        # Add summary footer
-        f.write("╔══════════════════════════════════════════════════════════════╗\n")
-        f.write(f"║ Total Opportunities: {len(opportunities)}".ljust(63) + "║\n")
-        f.write("╚══════════════════════════════════════════════════════════════╝\n")
+        mira_teams = frozenset(normalize_team_name(team) for team in 
+                               ([mira_game['away_team']] + list(mira_game['bookmakers'][0]['odds'].keys())))
+        print(f"\nLooking for match for Mira game: {set(mira_teams)}")
+        
+        matched = len(matches)
+        for index in indexes:
+            for poly_game in lookup_polymarket_games(index, mira_teams, mira_ts):
+                print(f"Found matching {VENUE_NAMES.get(poly_game.venue, poly_game.venue)} game: {poly_game.title}")
+                matches.append((mira_game, poly_game, mira_teams))
+                metrics.incr("games_matched_total", venue=poly_game.venue)
+        if metrics.enabled and len(matches) > matched:
+            observe_quote_ages(mira_game, [poly_game for _, poly_game, _ in matches[matched:]], now_ts)
+
+    return matches
+
+def observe_quote_ages(mira_game: Dict[str, Any], poly_games: List[EventQuotes], now_ts: int) -> None:
+    """How old the quotes of a matched game were when it was evaluated, per venue"""
+    for bookmaker in mira_game['bookmakers']:
+        if bookmaker.get('last_update_ts') is not None:
+            metrics.observe("quote_age_seconds", now_ts - bookmaker['last_update_ts'], venue="sportsbook")
+    for poly_game in poly_games:
+        if poly_game.markets and poly_game.markets[0].updated_ts is not None:
+            metrics.observe("quote_age_seconds", now_ts - poly_game.markets[0].updated_ts, venue=poly_game.venue)
+
+def find_arbitrage_opportunities(
+    mira_data: Dict[str, Any],
+    poly_events: List[EventQuotes],
+    kalshi_events: Optional[List[EventQuotes]] = None,
+    kalshi_api=None
+) -> List[ArbitrageOpportunity]:
+    """
+    Match Odds API games against Polymarket (and Kalshi) NBA events in memory and collect arbitrage
+    opportunities. With a kalshi_api, Kalshi opportunities are sized against their order books.
+    """
+    now_ts = now_epoch()
+    kalshi_index = build_kalshi_index(kalshi_events, now_ts) if kalshi_events else None
+    matches = match_games(mira_data, build_polymarket_index(poly_events, now_ts), now_ts, kalshi_index)
 
-def find_matching_games():
-    """Find matching games between Mira and Polymarket data and identify arbitrage opportunities"""
+    print(f"\nEvaluating {len(matches)} matched games")
+    return evaluate_matched_games(matches, kalshi_api=kalshi_api)
+
+def find_matching_games() -> Optional[str]:
+    """Find matching games between the saved Mira and Polymarket snapshots and write the arbitrage report"""
     print("\nStarting to find matching games...")
     
     # Load data files
@@ -260,118 +440,10 @@ def find_matching_games():
             poly_data = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error loading data files: {e}")
-        return
-    
-    arbitrage_opportunities = []
+        return None
     
-    # Main matching logic
-    for game_id, mira_game in mira_data['odds_data'].items():
-        try:
-            mira_date = datetime.strptime(mira_game['commence_time'], "%Y-%m-%d %H:%M:%S")
-            mira_date = mira_date.replace(tzinfo=timezone.utc)  # Assume UTC if no timezone
-            mira_date_est = mira_date.astimezone(pytz.timezone('US/Eastern'))
-            
-            if mira_date_est < datetime.now(pytz.timezone('US/Eastern')):
-                continue
-                
-        except (ValueError, TypeError) as e:
-            print(f"Error parsing date for game {game_id}: {e}")
-            continue
-        
-        mira_teams = {normalize_team_name(team) for team in 
-                     ([mira_game['away_team']] + list(mira_game['bookmakers'][0]['odds'].keys()))}
-        print(f"\nLooking for match for Mira game: {mira_teams}")
-        
-        for poly_game in poly_data:
-            try:
-                poly_date = datetime.strptime(poly_game['endDate'], "%Y-%m-%d %H:%M:%S%z")
-                poly_date_est = poly_date.astimezone(pytz.timezone('US/Eastern'))
-                
-                if poly_date_est < datetime.now(pytz.timezone('US/Eastern')):
-                    continue
-                
-                if (poly_date_est.date() != mira_date_est.date() or 
-                    abs((poly_date_est - mira_date_est).total_seconds()) > 3600):  # 1 hour tolerance
-                    continue
-                
-                poly_teams = {normalize_team_name(team) for team in get_teams_from_title(poly_game['title'])}
-                
-                if mira_teams == poly_teams:
-                    print(f"\nFound matching game!")
-                    
-                    best_primary_odds = {}
-                    best_bookmakers = {}
-                    for team in mira_teams:
-                        best_primary_odds[team] = float('inf')
-                    
-                    print(f"Mira odds:")
-                    for bookmaker in mira_game['bookmakers']:
-                        print(f"\n{bookmaker['name']}:")
-                        total_implied_prob = 0
-                        for team, odds in bookmaker['odds'].items():
-                            normalized_team = normalize_team_name(team)
-                            implied_prob = decimal_to_implied_probability(odds)
-                            total_implied_prob += implied_prob
-                            print(f"{team}: {odds} (implied prob: {implied_prob:.3f})")
-                            if implied_prob < best_primary_odds[normalized_team]:
-                                best_primary_odds[normalized_team] = implied_prob
-                                best_bookmakers[normalized_team] = bookmaker['name']
-                        print(f"Net implied probability: {total_implied_prob:.3f}")
-                    
-                    print(f"\nPolymarket odds:")
-                    outcomes = eval(poly_game['markets'][0]['outcomes'])
-                    prices = [float(price.strip('"')) for price in eval(poly_game['markets'][0]['outcomePrices'])]
-                    poly_odds = {}
-                    total_poly_prob = 0
-                    for outcome, prob in zip(outcomes, prices):
-                        print(f"{outcome}: {prob}")
-                        poly_odds[outcome] = prob
-                        total_poly_prob += prob
-                    print(f"Net implied probability: {total_poly_prob}")
-                    
-                    for poly_team, poly_prob in poly_odds.items():
-                        opposing_teams = mira_teams - {normalize_team_name(poly_team)}
-                        if len(opposing_teams) != 1:
-                            continue
-                        opposing_team = list(opposing_teams)[0]
-                        
-                        primary_prob = best_primary_odds[opposing_team]
-                        
-                        if poly_prob + primary_prob < 1:
-                            bet_details = calculate_arbitrage_bets(primary_prob, poly_prob)
-                            poly_decimal = 1 / poly_prob
-                            primary_decimal = 1 / primary_prob
-                            
-                            arb_opportunity = process_arbitrage_opportunity(
-                                poly_team,
-                                poly_prob,
-                                opposing_team,
-                                primary_prob,
-                                best_bookmakers[opposing_team],
-                                poly_game['endDate'],
-                                mira_game['commence_time']
-                            )
-                            arbitrage_opportunities.append(arb_opportunity)
-                            
-                            print(f"\nARBITRAGE OPPORTUNITY FOUND!")
-                            print(f"Polymarket Team: {poly_team} (odds: {poly_decimal:.2f}, prob: {poly_prob:.3f})")
-                            print(f"Bookmaker: {best_bookmakers[opposing_team]}")
-                            print(f"Primary Market Team: {opposing_team} (odds: {primary_decimal:.2f}, prob: {primary_prob:.3f})")
-                            print(f"Total probability: {poly_prob + primary_prob:.3f}")
-                            print(f"Theoretical profit: {((1 - (poly_prob + primary_prob)) * 100):.2f}%")
-                            print(f"Bet Details:")
-                            print(f"  Primary Market Bet (CAD): ${bet_details['primary_bet_cad']:.2f}")
-                            print(f"  Polymarket Bet (CAD): ${bet_details['polymarket_bet_cad']:.2f}")
-                            print(f"  Polymarket Bet (USD): ${bet_details['polymarket_bet_usd']:.2f}")
-                            print(f"  Theoretical Profit (CAD): ${bet_details['potential_profit_cad']:.2f}")
-                    
-                    print("-" * 50)
-                
-            except (ValueError, TypeError, AttributeError) as e:
-                print(f"Error processing dates for game {poly_game.get('title', 'Unknown')}: {e}")
-                continue
-
-    save_arbitrage_opportunities(arbitrage_opportunities)
+    poly_events = list(polymarket_events_from_gamma(poly_data))
+    return save_arbitrage_opportunities(find_arbitrage_opportunities(mira_data, poly_events))
 
 if __name__ == "__main__":
     find_matching_games()
@@ -0,0 +1,89 @@
+"""
+NBA quotes into the odds history store.
+
+Every venue's quotes for a game are filed under one event name built the same way the matcher
+keys games: the normalized team names and the EST game date, e.g. "nba:2025-02-02:Bulls|Pistons".
+Sportsbooks are recorded under their bookmaker name, prediction markets under their venue.
+"""
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from common.odds_history import OddsHistory
+from common.timeutil import local_date, now_epoch, to_epoch
+from nba.nbaSimSearch import get_teams_from_title, normalize_team_name
+from secondaryMarkets.models import EventQuotes
+
+LEAGUE = "nba"
+
+HistoryQuote = Tuple[str, str, str, float]  # venue, event, outcome, implied probability
+
+
+def game_event_name(teams: FrozenSet[str], game_ts: int) -> str:
+    return f"{LEAGUE}:{local_date(game_ts).isoformat()}:{'|'.join(sorted(teams))}"
+
+
+def mira_history_quotes(mira_data: Dict[str, Any]) -> Iterator[HistoryQuote]:
+    """Every bookmaker's moneyline for every Odds API game"""
+    for mira_game in mira_data.get('odds_data', {}).values():
+        game_ts = mira_game.get('commence_ts') or to_epoch(mira_game.get('commence_time'))
+        bookmakers = mira_game.get('bookmakers') or []
+        if game_ts is None or not bookmakers:
+            continue
+        teams = frozenset(normalize_team_name(team) for team in bookmakers[0]['odds'])
+        event = game_event_name(teams, game_ts)
+        for bookmaker in bookmakers:
+            for team, decimal_odds in bookmaker['odds'].items():
+                if decimal_odds:
+                    yield bookmaker['name'], event, normalize_team_name(team), 1 / decimal_odds
+
+
+def head_to_head_teams(event: EventQuotes) -> Optional[FrozenSet[str]]:
+    """
+    The two teams of a "<team> vs. <team>" game whose first market is their moneyline, else None.
+    Futures and props ("NBA Champion 2025", player markets) have no such pairing and are skipped,
+    the same games the arbitrage engine can't pair outcomes for.
+    """
+    if event.end_ts is None or not event.markets or not event.title or " vs. " not in event.title:
+        return None
+    teams = frozenset(normalize_team_name(team) for team in get_teams_from_title(event.title))
+    outcomes = event.markets[0].outcomes
+    if len(teams) != 2 or len(outcomes) != 2 or {normalize_team_name(outcome) for outcome in outcomes} != teams:
+        return None
+    return teams
+
+
+def event_history_quotes(events: List[EventQuotes]) -> Iterator[HistoryQuote]:
+    """The moneyline (first market) of every Polymarket or Kalshi head-to-head game"""
+    for event in events:
+        teams = head_to_head_teams(event)
+        if teams is None:
+            continue
+        market = event.markets[0]
+        name = game_event_name(teams, event.end_ts)
+        for outcome, price in zip(market.outcomes, market.prices):
+            yield event.venue, name, normalize_team_name(outcome), price
+
+
+def record_quotes(
+    history: OddsHistory,
+    mira_data: Optional[Dict[str, Any]] = None,
+    poly_events: Optional[List[EventQuotes]] = None,
+    kalshi_events: Optional[List[EventQuotes]] = None,
+    ts: Optional[int] = None
+) -> int:
+    """Append one snapshot of whichever venues are given; returns the number of quotes that changed"""
+    sources = (
+        ("odds", mira_data, mira_history_quotes),
+        ("polymarket", poly_events, event_history_quotes),
+        ("kalshi", kalshi_events, event_history_quotes),
+    )
+    ts = ts or now_epoch()
+    written = 0
+    for source, data, quotes in sources:
+        if data is None:
+            continue
+        try:
+            written += history.record(ts, quotes(data), source)
+        except Exception as e:
+            # History is a side-output, a full disk or locked file must not stop the scan
+            print(f"Error recording {source} odds history: {e}")
+    return written
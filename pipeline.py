@@ -0,0 +1,106 @@
+"""
+In-memory scan pipeline: each stage hands Python objects straight to the next one.
+
+Polymarket responses are filtered for NBA events while they download, the odds server payload
+is used as parsed, and the matcher works on both directly. The JSON files under jsonOutputs/
+are only written as a side-output when write_snapshots is set.
+"""
+import json
+import os
+from itertools import chain
+
+from common.json_stream import StreamingJsonArrayWriter
+from common.metrics import metrics
+from nba.getNBAevents import NBA_EVENT_PREDICATE, filter_nba_events, fetch_mira_nba_events
+from nba.arbReport import save_scan
+from nba.nbaSimSearch import find_arbitrage_opportunities, resolve_team_name
+from nba.quoteHistory import record_quotes
+from secondaryMarkets.models import polymarket_events_from_gamma
+
+NBA_EVENTS_FILE = 'jsonOutputs/nbaEvents.json'
+MIRA_EVENTS_FILE = 'jsonOutputs/miraNBAEvents.json'
+KALSHI_GAMES_FILE = 'jsonOutputs/kalshiNBAGames.json'
+
+
+def write_json_snapshot(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4)
+
+
+def fetch_polymarket_nba_events(polymarket_api, write_snapshots=False, predicate=NBA_EVENT_PREDICATE):
+    """Fetch the Polymarket catalogue and keep only the upcoming NBA events."""
+    if not write_snapshots:
+        # Filter each response body while it downloads so only matching events are ever held
+        pages = polymarket_api.iter_event_pages(predicate=predicate)
+        return filter_nba_events(chain.from_iterable(pages), predicate)
+
+    # Tee every raw page into the gamma_events.json snapshot while filtering
+    pages = polymarket_api.iter_event_pages()
+    with StreamingJsonArrayWriter(polymarket_api.output_file, indent=4) as writer:
+        def saved_pages():
+            for page in pages:
+                writer.write_page(page)
+                yield page
+
+        nba_events = filter_nba_events(chain.from_iterable(saved_pages()), predicate)
+
+    write_json_snapshot(NBA_EVENTS_FILE, nba_events)
+    return nba_events
+
+
+def fetch_kalshi_nba_games(kalshi_api):
+    """Kalshi NBA games as EventQuotes; an empty list if Kalshi can't be reached, so the scan goes on without it"""
+    try:
+        return kalshi_api.load_game_quotes(resolve_team_name)
+    except Exception as e:
+        print(f"Error fetching Kalshi NBA games: {e}")
+        return []
+
+
+def run_scan(polymarket_api, write_snapshots=False, kalshi_api=None, history=None):
+    """
+    Run one full scan. Returns (records, report_file): one record per opportunity, as appended
+    to the JSONL log, and the text report rendered from them. report_file is None when the
+    odds server could not be reached and nothing was matched. With a kalshi_api, Kalshi's NBA
+    games are matched too, and their opportunities sized against the Kalshi order books. With a
+    history (OddsHistory) every quote fetched is appended to it.
+    """
+    print("Fetching Polymarket events")
+    with metrics.span("stage_seconds", stage="fetch_polymarket"):
+        nba_events = fetch_polymarket_nba_events(polymarket_api, write_snapshots)
+    print(f"Kept {len(nba_events)} NBA events from polymarket")
+    # Parse outcomes, prices and timestamps once; the raw dicts are dropped here
+    with metrics.span("stage_seconds", stage="parse_polymarket"):
+        poly_events = list(polymarket_events_from_gamma(nba_events))
+    del nba_events
+    metrics.incr("games_loaded_total", len(poly_events), venue="polymarket")
+
+    kalshi_events = None
+    if kalshi_api is not None:
+        print("Fetching Kalshi NBA games")
+        with metrics.span("stage_seconds", stage="fetch_kalshi"):
+            kalshi_events = fetch_kalshi_nba_games(kalshi_api)
+        print(f"Kept {len(kalshi_events)} NBA games from kalshi")
+        metrics.incr("games_loaded_total", len(kalshi_events), venue="kalshi")
+        if write_snapshots:
+            write_json_snapshot(KALSHI_GAMES_FILE, [event.to_dict() for event in kalshi_events])
+
+    with metrics.span("stage_seconds", stage="fetch_odds"):
+        mira_data = fetch_mira_nba_events()
+    if mira_data is None:
+        return [], None
+    metrics.incr("games_loaded_total", len(mira_data.get('odds_data', {})), venue="odds_server")
+    if write_snapshots:
+        write_json_snapshot(MIRA_EVENTS_FILE, mira_data)
+
+    if history is not None:
+        with metrics.span("stage_seconds", stage="record_history"):
+            record_quotes(history, mira_data, poly_events, kalshi_events)
+
+    print("\nStarting to find matching games...")
+    with metrics.span("stage_seconds", stage="find_opportunities"):
+        opportunities = find_arbitrage_opportunities(mira_data, poly_events, kalshi_events, kalshi_api)
+    metrics.incr("opportunities_found_total", len(opportunities))
+    with metrics.span("stage_seconds", stage="save_report"):
+        return save_scan(opportunities)
@@ -0,0 +1,293 @@
+"""
+Long-running scanner: polls the venues on a schedule and keeps the matched games in memory.
+
+Each cycle refreshes whichever venues are due. A venue that fails keeps serving its last good
+data (until it is older than stale_after), so one outage never stops the loop. Matching is
+redone only when a venue hands back new data, and a matched game is only re-evaluated when its
+quotes changed: the change signal is every bookmaker's last_update plus the Polymarket prices
+and updatedAt of the moneyline market. New opportunities are passed to on_new as they open.
+With a history store, each venue's new data is also appended to it as it arrives. When metrics
+are enabled the run summary is rewritten every metrics_interval seconds.
+
+With book_options, live CLOB order books are kept for the matched Polymarket moneylines (the
+feed is restarted whenever the matched tokens change). Each outcome is watched with the highest
+ask that is still an arbitrage, and a book crossing that line re-evaluates its game right away,
+priced at the live ask, instead of waiting for the next Polymarket poll.
+"""
+import math
+import threading
+import time
+import traceback
+
+from nba.getNBAevents import fetch_mira_nba_events
+from nba.nbaSimSearch import (
+    build_kalshi_index, build_polymarket_index, evaluate_matched_games_by_game, match_games, order_book_thresholds,
+    resolve_team_name,
+)
+from nba.quoteHistory import record_quotes
+from common.metrics import metrics, summary_path
+from common.timeutil import now_epoch
+from pipeline import fetch_polymarket_nba_events
+from secondaryMarkets.models import polymarket_events_from_gamma
+
+
+def game_key(match):
+    """Stable identity of a matched game across polls"""
+    mira_game, poly_game, mira_teams = match
+    return mira_teams, mira_game.get('commence_ts') or mira_game.get('commence_time'), poly_game.event_id
+
+
+def quote_signature(match):
+    """Changes whenever a bookmaker updates or the Polymarket moneyline moves"""
+    mira_game, poly_game, _ = match
+    market = poly_game.markets[0]
+    books = tuple(
+        (bookmaker['name'], bookmaker.get('last_update_ts') or bookmaker.get('last_update'))
+        for bookmaker in mira_game['bookmakers']
+    )
+    return books, market.prices, market.updated_ts
+
+
+def opportunity_key(opp):
+    return opp['polymarket_team'], opp['primary_team'], opp['bookmaker']
+
+
+class VenueFeed:
+    """Last good payload of one venue, refreshed every interval seconds"""
+
+    def __init__(self, name, fetch, interval, stale_after):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.stale_after = stale_after
+        self.data = None
+        self.fetched_at = 0.0
+        self.next_poll = 0.0
+        self.failures = 0
+
+    def poll(self, now):
+        """Refresh if due. Returns True when new data arrived."""
+        if now < self.next_poll:
+            return False
+        self.next_poll = now + self.interval
+
+        try:
+            with metrics.span("poll_seconds", venue=self.name):
+                data = self.fetch()
+        except Exception as e:
+            print(f"Error polling {self.name}: {e}")
+            traceback.print_exc()
+            data = None
+
+        if data is None:
+            self.failures += 1
+            metrics.incr("poll_failures_total", venue=self.name)
+            print(f"{self.name} unavailable ({self.failures} failed polls), keeping last good data")
+            if self.data is not None and now - self.fetched_at > self.stale_after:
+                print(f"Dropping {self.name} data older than {self.stale_after}s")
+                self.data = None
+                return True
+            return False
+
+        self.failures = 0
+        self.fetched_at = now
+        if data is self.data:
+            return False  # Unchanged (the odds server answered 304)
+        self.data = data
+        return True
+
+
+class ScanDaemon:
+    def __init__(self, polymarket_api, on_new=None, odds_interval=15, polymarket_interval=60, stale_after=300,
+                 book_options=None, kalshi_api=None, kalshi_interval=60, history=None, metrics_interval=60):
+        self.on_new = on_new
+        self.metrics_interval = metrics_interval
+        self.metrics_path = summary_path("daemon")  # Rewritten in place while the daemon runs
+        self.history = history  # OddsHistory every fetched quote is appended to
+        self.polymarket_api = polymarket_api
+        self.book_options = book_options  # PolymarketAPI.order_book_feed options, None for no live books
+        self.order_books = None           # OrderBookManager once the first books are started
+        self._books_stop = None
+        self._book_games = {}             # token id -> game key, for the tokens the feed follows
+        self._crossed = set()             # game keys whose book crossed since the last cycle
+        self._crossed_lock = threading.Lock()
+        self.odds = VenueFeed("odds server", fetch_mira_nba_events, odds_interval, stale_after)
+        self.polymarket = VenueFeed(
+            "Polymarket",
+            lambda: list(polymarket_events_from_gamma(fetch_polymarket_nba_events(polymarket_api))),
+            polymarket_interval,
+            stale_after,
+        )
+        self.kalshi_api = kalshi_api  # Also sizes Kalshi opportunities against their order books
+        self.kalshi = None
+        if kalshi_api is not None:
+            # Errors are left to VenueFeed so a Kalshi outage keeps the last good games
+            self.kalshi = VenueFeed(
+                "Kalshi", lambda: kalshi_api.load_game_quotes(resolve_team_name), kalshi_interval, stale_after
+            )
+        self.matches = {}        # game key -> matched game
+        self.signatures = {}     # game key -> quote signature it was last evaluated with
+        self.opportunities = {}  # game key -> open opportunities for that game
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def _follow_books(self):
+        """Restart the book feed on the matched Polymarket moneyline tokens when they changed"""
+        book_games = {
+            token_id: key
+            for key, (_, poly_game, _) in self.matches.items() if poly_game.markets[0].venue == "polymarket"
+            for token_id in poly_game.markets[0].token_ids[:2]
+        }
+        if book_games.keys() == self._book_games.keys():
+            self._book_games = book_games
+            return
+        if self._books_stop is not None:
+            self._books_stop.set()
+            self._books_stop = None
+        self._book_games = book_games
+        if book_games:
+            print(f"Following {len(book_games)} Polymarket order books")
+            self.order_books, self._books_stop = self.polymarket_api.start_order_books(
+                list(book_games), on_cross=self._on_cross, manager=self.order_books, **self.book_options
+            )
+        elif self.order_books is not None:
+            self.order_books.track(())
+
+    def _watch_books(self, keys):
+        """Watch each game's outcomes with the highest ask that is still an arbitrage"""
+        for _, token_id, max_ask in order_book_thresholds([self.matches[key] for key in keys]):
+            if math.isnan(max_ask):
+                self.order_books.unwatch(token_id)
+            else:
+                self.order_books.watch(token_id, max_ask)
+
+    def _on_cross(self, token_id, asks, is_open):
+        """Feed thread: queue the token's game for re-evaluation and wake the loop"""
+        key = self._book_games.get(token_id)
+        if key is None:
+            return
+        best = f"{asks[0][0]}" if asks else "none"
+        print(f"Order book {token_id[:10]}... {'opened' if is_open else 'closed'} an arbitrage (best ask {best})")
+        metrics.incr("book_crosses_total", state="open" if is_open else "closed")
+        with self._crossed_lock:
+            self._crossed.add(key)
+        self._wake.set()
+
+    def _rematch(self, now_ts):
+        if self.odds.data is None or self.polymarket.data is None:
+            return {}
+        poly_index = build_polymarket_index(self.polymarket.data, now_ts)
+        kalshi_index = build_kalshi_index(self.kalshi.data, now_ts) if self.kalshi and self.kalshi.data else None
+        return {game_key(match): match for match in match_games(self.odds.data, poly_index, now_ts, kalshi_index)}
+
+    def _expire(self, now_ts):
+        """Forget games that have started since the last rematch"""
+        for key, (mira_game, _, _) in list(self.matches.items()):
+            commence_ts = mira_game.get('commence_ts')
+            if commence_ts is not None and commence_ts < now_ts:
+                self.matches.pop(key)
+
+    def scan_once(self):
+        """
+        Run one poll cycle. Returns the opportunities that opened in this cycle.
+        """
+        now = time.monotonic()
+        now_ts = now_epoch()
+        odds_changed = self.odds.poll(now)
+        polymarket_changed = self.polymarket.poll(now)
+        kalshi_changed = self.kalshi is not None and self.kalshi.poll(now)
+        changed = odds_changed or polymarket_changed or kalshi_changed
+
+        if self.history is not None and changed:
+            # A venue whose data went stale is recorded as empty, withdrawing its quotes
+            with metrics.span("stage_seconds", stage="record_history"):
+                record_quotes(
+                    self.history,
+                    (self.odds.data or {}) if odds_changed else None,
+                    (self.polymarket.data or []) if polymarket_changed else None,
+                    (self.kalshi.data or []) if kalshi_changed else None,
+                    now_ts,
+                )
+
+        if changed:
+            with metrics.span("stage_seconds", stage="match"):
+                self.matches = self._rematch(now_ts)
+            if self.book_options is not None:
+                self._follow_books()
+        else:
+            self._expire(now_ts)
+
+        # Drop state for games that are no longer matched
+        for key in list(self.signatures):
+            if key not in self.matches:
+                self.signatures.pop(key)
+                self.opportunities.pop(key, None)
+
+        dirty = []
+        for key, match in self.matches.items():
+            signature = quote_signature(match)
+            if self.signatures.get(key) != signature:
+                self.signatures[key] = signature
+                dirty.append(key)
+
+        with self._crossed_lock:
+            crossed, self._crossed = self._crossed, set()
+        # A crossed book is live data the quote signature can't see
+        dirty.extend(key for key in crossed if key in self.matches and key not in dirty)
+
+        if not dirty:
+            return []
+
+        print(f"\nRe-evaluating {len(dirty)} of {len(self.matches)} matched games with new quotes")
+        found = {key: [] for key in dirty}
+        # One vectorized pass over just the games whose quotes moved
+        with metrics.span("stage_seconds", stage="evaluate"):
+            for game, opp in evaluate_matched_games_by_game(
+                    [self.matches[key] for key in dirty], self.order_books, self.kalshi_api):
+                found[dirty[game]].append(opp)
+        if self.order_books is not None:
+            self._watch_books(dirty)
+
+        opened = []
+        for key, opps in found.items():
+            before = {opportunity_key(opp) for opp in self.opportunities.get(key, ())}
+            opened.extend(opp for opp in opps if opportunity_key(opp) not in before)
+            if opps:
+                self.opportunities[key] = opps
+            else:
+                self.opportunities.pop(key, None)
+        metrics.incr("opportunities_found_total", len(opened))
+        return opened
+
+    def run(self, tick=1.0):
+        """Poll until stop() is called (or Ctrl-C). Errors in a cycle are logged and the loop carries on."""
+        print(f"Scan daemon started: odds every {self.odds.interval}s, Polymarket every {self.polymarket.interval}s")
+        metrics_due = time.monotonic() + self.metrics_interval
+        try:
+            while not self._stop.is_set():
+                try:
+                    with metrics.span("stage_seconds", stage="cycle"):
+                        opened = self.scan_once()
+                    if opened and self.on_new:
+                        self.on_new(opened)
+                except Exception as e:
+                    print(f"Scan cycle failed: {e}")
+                    traceback.print_exc()
+                if metrics.enabled and time.monotonic() >= metrics_due:
+                    metrics_due = time.monotonic() + self.metrics_interval
+                    try:
+                        metrics.write_summary(self.metrics_path)
+                    except (OSError, TypeError, ValueError) as e:
+                        print(f"Error writing the metrics summary: {e}")
+                # A book cross wakes the loop early
+                self._wake.wait(tick)
+                self._wake.clear()
+        except KeyboardInterrupt:
+            print("Scan daemon stopped")
+        finally:
+            if self._books_stop is not None:
+                self._books_stop.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
@@ -1,59 +1,133 @@
-import requests
 import json
 import os
+import requests
+from common.http_client import http_client
+from common.json_stream import StreamingJsonArrayWriter, iter_json_file
+from common.metrics import metrics
+from secondaryMarkets.models import kalshi_event_from_api, kalshi_games_from_api
+
+# Series holding one event per NBA game, each with a "will <team> win" market per team
+KALSHI_NBA_SERIES = ("KXNBAGAME",)
+KALSHI_SPORTS_CATEGORY = "Sports"
+KALSHI_API_BASE = os.getenv("KALSHI_API_BASE", "https://trading-api.kalshi.com/trade-api/v2")
 
 class KalshiAPI:
     def __init__(self):
-        self.base_url = "https://trading-api.kalshi.com/trade-api/v2/events"
+        self.base_url = f"{KALSHI_API_BASE}/events"
+        self.markets_url = f"{KALSHI_API_BASE}/markets"
+        self.series_url = f"{KALSHI_API_BASE}/series"
         self.output_file = 'jsonOutputs/kalshi_events.json'
+        self.page_limit = 200
 
     def fetch_and_save_kalshi_events(self):
-        all_events = []
         cursor = None
 
-        while True:
-            url = f"{self.base_url}?limit=200&status=open&with_nested_markets=true"
-            if cursor:
-                url += f"&cursor={cursor}"
+        # Each page is streamed to a temp file as it arrives and renamed over the old snapshot at the end
+        with StreamingJsonArrayWriter(self.output_file, indent=2) as writer:
+            while True:
+                url = f"{self.base_url}?limit={self.page_limit}&status=open&with_nested_markets=true"
+                if cursor:
+                    url += f"&cursor={cursor}"
 
-            response = requests.get(url)
+                response = http_client.get(url)
 
-            print(f"Response status code: {response.status_code}")
-            print(f"Response content: {response.text[:500]}...")  # Print first 500 characters
+                print(f"Response status code: {response.status_code}")
+                print(f"Response content: {response.text[:500]}...")  # Print first 500 characters
 
-            try:
-                data = response.json()
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON: {e}")
-                print(f"Full response content: {response.text}")
-                break
+                try:
+                    data = response.json()
+                except json.JSONDecodeError as e:
+                    print(f"Error decoding JSON: {e}")
+                    print(f"Full response content: {response.text}")
+                    break
 
-            if response.status_code != 200:
-                print(f"Error: {data.get('error', 'Unknown error')}")
-                break
+                if response.status_code != 200:
+                    print(f"Error: {data.get('error', 'Unknown error')}")
+                    break
 
-            all_events.extend(data.get('events', []))
+                writer.write_page(data.get('events', []))
 
-            cursor = data.get('cursor')
-            if not cursor:
-                break
-        
-        print(f"Total number of events: {len(all_events)}")
+                cursor = data.get('cursor')
+                if not cursor:
+                    break
 
-        if os.path.exists(self.output_file):
-            os.remove(self.output_file)
-            print(f"Deleted existing {self.output_file}")
+        print(f"Total number of events: {writer.count}")
+        print(f"All events have been saved to {self.output_file}")
 
-        with open(self.output_file, 'w') as f:
-            json.dump(all_events, f, indent=2)
+    def get_series_tickers(self, category=KALSHI_SPORTS_CATEGORY):
+        """Tickers of every series in a category (e.g. "Sports"), so events can be requested per series"""
+        response = http_client.get(self.series_url, params={"category": category})
+        if response.status_code != 200:
+            print(f"Error listing Kalshi {category} series: {response.status_code}")
+            return []
+        return [series["ticker"] for series in response.json().get("series") or () if series.get("ticker")]
+
+    def iter_series_events(self, series_ticker, status="open"):
+        """
+        Open events of one series with their markets, following the cursor; Kalshi filters server side.
+        Raises requests.HTTPError if a page fails, so a partial series is never taken for the whole one.
+        """
+        cursor = None
+        pages = 0
+        while True:
+            params = {"series_ticker": series_ticker, "status": status,
+                      "with_nested_markets": "true", "limit": self.page_limit}
+            if cursor:
+                params["cursor"] = cursor
+
+            with metrics.span("page_fetch_seconds", venue="kalshi"):
+                response = http_client.get(self.base_url, params=params)
+                if response.status_code != 200:
+                    message = f"Error fetching Kalshi {series_ticker} events: {response.status_code}"
+                    print(f"{message}{' after ' + str(pages) + ' pages' if pages else ''}")
+                    raise requests.exceptions.HTTPError(message, response=response)
+                data = response.json()
+            metrics.incr("pages_fetched_total", venue="kalshi")
+            pages += 1
+            metrics.incr("bytes_fetched_total", len(response.content), venue="kalshi")
+            yield from data.get('events') or ()
 
-        print(f"All events have been saved to {self.output_file}")
+            cursor = data.get('cursor')
+            if not cursor:
+                return
+
+    def fetch_sports_events(self, series_tickers=KALSHI_NBA_SERIES, category=None):
+        """
+        Raw events for the given series only. With a category the series are looked up first,
+        e.g. category="Sports" for every sport; the rest of the catalogue is never downloaded.
+        """
+        if category:
+            series_tickers = self.get_series_tickers(category)
+        events = []
+        for series_ticker in series_tickers:
+            events.extend(self.iter_series_events(series_ticker))
+        print(f"Retrieved {len(events)} Kalshi events from {len(series_tickers)} series")
+        return events
+
+    def load_game_quotes(self, normalize, series_tickers=KALSHI_NBA_SERIES):
+        """Kalshi games as two-outcome EventQuotes, team names mapped through normalize"""
+        return list(kalshi_games_from_api(self.fetch_sports_events(series_tickers), normalize))
 
     def getEventInfo(self, eventTicker):
         url = f"{self.base_url}/{eventTicker}"
-        response = requests.get(url)
+        response = http_client.get(url)
         return response.json()
 
+    def get_market_orderbook(self, ticker, depth=None):
+        """Resting bids for a market, {"orderbook": {"yes": [[cents, qty], ...], "no": [...]}}; None on failure"""
+        url = f"{self.markets_url}/{ticker}/orderbook"
+        if depth:
+            url += f"?depth={depth}"
+        response = http_client.get(url)
+        if response.status_code != 200:
+            print(f"Error fetching Kalshi order book for {ticker}: {response.status_code}")
+            return None
+        return response.json()
+
+    def load_event_quotes(self):
+        """Read the saved snapshot one event at a time into the compact quote model"""
+        return [kalshi_event_from_api(event) for event in iter_json_file(self.output_file)]
+
     def extract_kalshi_event_and_markets(self):
         with open(self.output_file, 'r') as f:
             events = json.load(f)
@@ -0,0 +1,221 @@
+"""
+Compact market model shared by every venue.
+
+Raw Gamma and Kalshi payloads are converted once, at ingest, into these __slots__ records:
+outcome names, float prices, token ids and epoch timestamps are parsed up front so the matcher
+and the arbitrage engine never touch JSON-encoded strings, and the dozens of unused fields in
+each raw market dict are dropped.
+"""
+import json
+import re
+from datetime import datetime
+
+from common.timeutil import EST, to_epoch
+
+
+def _parse_list(value):
+    """Gamma encodes list fields as JSON strings ('["Bulls", "Pistons"]'), accept both forms"""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = json.loads(value) if value else []
+    return tuple(value)
+
+
+class MarketQuote:
+    """
+    One tradable market: aligned outcome names, prices (0-1) and token ids. prices are what it
+    costs to buy each outcome (the ask); bids, when the venue quotes them, what it sells for.
+    """
+
+    __slots__ = ("venue", "market_id", "question", "outcomes", "prices", "token_ids", "end_ts", "updated_ts", "bids")
+
+    def __init__(self, venue, market_id, question, outcomes, prices, token_ids=(), end_ts=None, updated_ts=None, bids=()):
+        self.venue = venue
+        self.market_id = market_id
+        self.question = question
+        self.outcomes = tuple(outcomes)
+        self.prices = tuple(prices)
+        self.token_ids = tuple(token_ids)
+        self.end_ts = end_ts
+        self.updated_ts = updated_ts
+        self.bids = tuple(bids)
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"MarketQuote({self.venue}:{self.market_id} {dict(zip(self.outcomes, self.prices))})"
+
+
+class EventQuotes:
+    """An event (usually one game) and its markets."""
+
+    __slots__ = ("venue", "event_id", "title", "ticker", "end_date", "end_ts", "markets")
+
+    def __init__(self, venue, event_id, title, ticker, end_date, end_ts, markets):
+        self.venue = venue
+        self.event_id = event_id
+        self.title = title
+        self.ticker = ticker
+        self.end_date = end_date  # As quoted by the venue, kept for reports
+        self.end_ts = end_ts
+        self.markets = tuple(markets)
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["markets"] = [market.to_dict() for market in self.markets]
+        return data
+
+    def __repr__(self):
+        return f"EventQuotes({self.venue}:{self.event_id} {self.title!r})"
+
+
+def polymarket_events_from_gamma(events):
+    """Convert Gamma events, skipping (and reporting) any whose markets can't be parsed"""
+    for event in events:
+        try:
+            yield polymarket_event_from_gamma(event)
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Error parsing markets for event {event.get('title', 'Unknown')}: {e}")
+
+
+def polymarket_market_from_gamma(market):
+    return MarketQuote(
+        venue="polymarket",
+        market_id=market.get("id"),
+        question=market.get("question"),
+        outcomes=_parse_list(market.get("outcomes")),
+        prices=[float(price) for price in _parse_list(market.get("outcomePrices"))],
+        token_ids=_parse_list(market.get("clobTokenIds")),
+        end_ts=to_epoch(market.get("endDate")),
+        updated_ts=to_epoch(market.get("updatedAt")),
+    )
+
+
+def polymarket_event_from_gamma(event):
+    """Convert a Gamma event (raw or as filtered into nbaEvents.json) into EventQuotes"""
+    return EventQuotes(
+        venue="polymarket",
+        event_id=event.get("id"),
+        title=event.get("title"),
+        ticker=event.get("ticker"),
+        end_date=event.get("endDate"),
+        end_ts=to_epoch(event.get("endDate")),
+        markets=[polymarket_market_from_gamma(market) for market in event.get("markets", [])],
+    )
+
+
+def _cents(value):
+    return value / 100 if value is not None else float("nan")
+
+
+def kalshi_market_from_api(market):
+    """Kalshi quotes in cents; the price of each side is what it costs to buy it (the ask)"""
+    yes_ask, no_ask = market.get("yes_ask"), market.get("no_ask")
+    return MarketQuote(
+        venue="kalshi",
+        market_id=market.get("ticker"),
+        question=market.get("title") or market.get("subtitle"),
+        outcomes=("Yes", "No"),
+        prices=(
+            yes_ask / 100 if yes_ask is not None else float("nan"),
+            no_ask / 100 if no_ask is not None else float("nan"),
+        ),
+        token_ids=(market.get("ticker"),),
+        end_ts=to_epoch(market.get("expected_expiration_time") or market.get("close_time")),
+        updated_ts=None,
+        bids=(_cents(market.get("yes_bid")), _cents(market.get("no_bid"))),
+    )
+
+
+def kalshi_event_from_api(event):
+    markets = [kalshi_market_from_api(market) for market in event.get("markets", [])]
+    end_ts = min((market.end_ts for market in markets if market.end_ts is not None), default=None)
+    return EventQuotes(
+        venue="kalshi",
+        event_id=event.get("event_ticker"),
+        title=event.get("title"),
+        ticker=event.get("series_ticker"),
+        end_date=None,
+        end_ts=end_ts,
+        markets=markets,
+    )
+
+
+_TICKER_DATE = re.compile(r"-(\d{2}[A-Z]{3}\d{2})")
+
+
+def kalshi_game_date(event_ticker):
+    """Game date encoded in a Kalshi game ticker (KXNBAGAME-25FEB02BOSPHI -> 2025-02-02), or None"""
+    match = _TICKER_DATE.search(event_ticker or "")
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1).title(), "%y%b%d").date()
+    except ValueError:
+        return None
+
+
+def kalshi_game_from_api(event, normalize):
+    """
+    Turn a Kalshi game event (one "will <team> win" market per team) into a single two-outcome
+    moneyline like Polymarket's, with normalize mapping Kalshi's team labels to our short names.
+
+    Backing a team costs its YES ask or the other team's NO ask, whichever is cheaper; it sells
+    for the better of its YES bid and the other team's NO bid. The title is "<team> vs. <team>",
+    the form the matcher reads teams from. end_ts is the game date at noon US/Eastern: Kalshi
+    does not quote a start time, so games are matched on date and teams only.
+    """
+    markets = [market for market in event.get("markets", []) if market.get("status", "active") in ("active", "open")]
+    if len(markets) != 2:
+        raise ValueError(f"expected 2 team markets, got {len(markets)}")
+
+    teams = [normalize(market.get("yes_sub_title") or market.get("subtitle") or "") for market in markets]
+    if not all(teams) or teams[0] == teams[1]:
+        raise ValueError(f"could not tell the teams apart: {teams}")
+
+    prices, bids = [], []
+    for market, other in ((markets[0], markets[1]), (markets[1], markets[0])):
+        prices.append(min(_cents(market.get("yes_ask")), _cents(other.get("no_ask")), key=_nan_last))
+        bids.append(max(_cents(market.get("yes_bid")), _cents(other.get("no_bid")), key=_nan_first))
+
+    game_date = kalshi_game_date(event.get("event_ticker"))
+    end_ts = int(EST.localize(datetime(game_date.year, game_date.month, game_date.day, 12)).timestamp()) if game_date else None
+    title = f"{teams[0]} vs. {teams[1]}"
+    return EventQuotes(
+        venue="kalshi",
+        event_id=event.get("event_ticker"),
+        title=title,
+        ticker=event.get("series_ticker"),
+        end_date=game_date.isoformat() if game_date else None,
+        end_ts=end_ts,
+        markets=[MarketQuote(
+            venue="kalshi",
+            market_id=event.get("event_ticker"),
+            question=event.get("title") or title,
+            outcomes=teams,
+            prices=prices,
+            token_ids=[market.get("ticker") for market in markets],
+            end_ts=end_ts,
+            updated_ts=None,
+            bids=bids,
+        )],
+    )
+
+
+def _nan_last(price):
+    return float("inf") if price != price else price
+
+
+def _nan_first(price):
+    return float("-inf") if price != price else price
+
+
+def kalshi_games_from_api(events, normalize):
+    """Convert Kalshi game events, skipping (and reporting) any that aren't a two-team moneyline"""
+    for event in events:
+        try:
+            yield kalshi_game_from_api(event, normalize)
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Skipping Kalshi event {event.get('event_ticker', 'Unknown')}: {e}")
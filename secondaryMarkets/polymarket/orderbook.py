@@ -0,0 +1,344 @@
+"""
+Live Polymarket CLOB order books.
+
+OrderBookManager keeps one in-memory book per watched token and applies CLOB market-channel
+messages to it: a "book" message replaces the token's book, a "price_change" message updates
+single levels in place. Each side is a price -> size dict plus a sorted price list, so an update
+is a dict write and a bisect, and the best price sits at one end of the list.
+
+The manager does not care where messages come from. The feeds below all yield messages in the
+market-channel format:
+  - ClobWebSocketFeed: the live websocket (needs websocket-client), optionally recorded to JSONL
+  - ClobSnapshotPoller: polls py_clob_client's get_order_books, for when the websocket is blocked
+  - ReplayFeed: plays a recorded JSONL file back, for tests and offline runs
+
+A token can be watched with the highest ask that still makes an arbitrage; on_cross fires
+whenever the best ask crosses that line in either direction, so the arb check only runs when
+the top of the book actually moves through it.
+
+Feeds apply messages on their own thread. Readers on other threads go through the manager
+(best_ask, ask_levels), which copies what they need under its lock; an OrderBook itself is only
+safe to read on the feed thread.
+"""
+import json
+import threading
+import time
+from bisect import bisect_left, insort
+
+CLOB_MARKET_WS = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+
+
+class BookSide:
+    """One side of a book: sizes by price and the prices in ascending order"""
+
+    __slots__ = ("sizes", "prices")
+
+    def __init__(self):
+        self.sizes = {}
+        self.prices = []
+
+    def set(self, price, size):
+        if size <= 0:
+            if self.sizes.pop(price, None) is not None:
+                del self.prices[bisect_left(self.prices, price)]
+            return
+        if price not in self.sizes:
+            insort(self.prices, price)
+        self.sizes[price] = size
+
+    def replace(self, levels):
+        self.sizes = {price: size for price, size in levels if size > 0}
+        self.prices = sorted(self.sizes)
+
+    def __len__(self):
+        return len(self.prices)
+
+
+class OrderBook:
+    """In-memory book for one token; prices are probabilities (0-1), sizes are shares. Not locked, see OrderBookManager"""
+
+    __slots__ = ("token_id", "bids", "asks", "timestamp", "hash")
+
+    def __init__(self, token_id):
+        self.token_id = token_id
+        self.bids = BookSide()
+        self.asks = BookSide()
+        self.timestamp = None
+        self.hash = None
+
+    def best_bid(self):
+        return self.bids.prices[-1] if self.bids.prices else None
+
+    def best_ask(self):
+        return self.asks.prices[0] if self.asks.prices else None
+
+    def top(self):
+        return self.best_bid(), self.best_ask()
+
+    def bid_levels(self, depth=None):
+        """[(price, size), ...] best (highest) bid first"""
+        prices = self.bids.prices[::-1][:depth]
+        return [(price, self.bids.sizes[price]) for price in prices]
+
+    def ask_levels(self, depth=None):
+        """[(price, size), ...] best (lowest) ask first"""
+        prices = self.asks.prices[:depth]
+        return [(price, self.asks.sizes[price]) for price in prices]
+
+    def __repr__(self):
+        return f"OrderBook({self.token_id} bid={self.best_bid()} ask={self.best_ask()})"
+
+
+def _levels(raw_levels):
+    return [(float(level["price"]), float(level["size"])) for level in raw_levels or ()]
+
+
+class OrderBookManager:
+    """
+    Books for a set of tokens, updated from market-channel messages.
+
+    on_cross(token_id, asks, is_open) is called when a watched token's best ask crosses its
+    threshold: is_open is True once the ask is below it (the arbitrage is available) and False
+    when it moves back up or the ask side empties. asks is a copy of the ask levels at the time,
+    best first. It runs outside the lock, on whichever thread saw the cross.
+    """
+
+    def __init__(self, token_ids=(), on_cross=None):
+        self.books = {token_id: OrderBook(token_id) for token_id in token_ids}
+        self.on_cross = on_cross
+        self.thresholds = {}  # token id -> highest ask that is still an arbitrage
+        self._open = {}       # token id -> whether the ask was below the threshold last time
+        self._lock = threading.Lock()
+        self.messages = 0
+
+    def book(self, token_id):
+        return self.books.get(token_id)
+
+    def best_ask(self, token_id):
+        with self._lock:
+            book = self.books.get(token_id)
+            return book.best_ask() if book is not None else None
+
+    def ask_levels(self, token_id, depth=None):
+        """Copy of token_id's ask levels, best first; empty for an unknown token"""
+        with self._lock:
+            book = self.books.get(token_id)
+            return book.ask_levels(depth) if book is not None else []
+
+    def track(self, token_ids):
+        """Keep books for exactly token_ids: new tokens start empty, the others are dropped and unwatched"""
+        token_ids = set(token_ids)
+        with self._lock:
+            for token_id in list(self.books):
+                if token_id not in token_ids:
+                    del self.books[token_id]
+                    self.thresholds.pop(token_id, None)
+                    self._open.pop(token_id, None)
+            for token_id in token_ids:
+                self.books.setdefault(token_id, OrderBook(token_id))
+
+    def watch(self, token_id, max_ask):
+        """
+        Fire on_cross when token_id's best ask crosses max_ask; checks the current book right away.
+        Moving the threshold of a watched token only fires if that flips its state.
+        """
+        with self._lock:
+            self.books.setdefault(token_id, OrderBook(token_id))
+            self.thresholds[token_id] = max_ask
+        self._check_cross(token_id)
+
+    def unwatch(self, token_id):
+        with self._lock:
+            self.thresholds.pop(token_id, None)
+            self._open.pop(token_id, None)
+
+    def handle(self, message):
+        """Apply one message (or the list of messages a websocket frame can carry)"""
+        if isinstance(message, list):
+            for item in message:
+                self.handle(item)
+            return
+
+        event_type = message.get("event_type")
+        if event_type == "book":
+            touched = self._apply_book(message)
+        elif event_type == "price_change":
+            touched = self._apply_price_change(message)
+        else:
+            return  # tick_size_change, last_trade_price, ...
+
+        self.messages += 1
+        for token_id in touched:
+            self._check_cross(token_id)
+
+    def _apply_book(self, message):
+        token_id = message.get("asset_id")
+        with self._lock:
+            book = self.books.get(token_id)
+            if book is None:
+                return ()
+            book.bids.replace(_levels(message.get("bids", message.get("buys"))))
+            book.asks.replace(_levels(message.get("asks", message.get("sells"))))
+            book.timestamp = message.get("timestamp")
+            book.hash = message.get("hash")
+        return (token_id,)
+
+    def _apply_price_change(self, message):
+        # Current format: one price_changes list across assets; older one: asset_id + changes
+        changes = message.get("price_changes")
+        if changes is None:
+            changes = [dict(change, asset_id=message.get("asset_id")) for change in message.get("changes", ())]
+
+        touched = set()
+        with self._lock:
+            for change in changes:
+                book = self.books.get(change.get("asset_id"))
+                if book is None:
+                    continue
+                side = book.bids if change.get("side") == "BUY" else book.asks
+                side.set(float(change["price"]), float(change["size"]))
+                book.timestamp = message.get("timestamp", book.timestamp)
+                touched.add(book.token_id)
+        return touched
+
+    def _check_cross(self, token_id):
+        with self._lock:
+            threshold = self.thresholds.get(token_id)
+            book = self.books.get(token_id)
+            if threshold is None or book is None:
+                return
+            best_ask = book.best_ask()
+            is_open = best_ask is not None and best_ask < threshold
+
+            if self._open.get(token_id) == is_open:
+                return
+            first = token_id not in self._open
+            self._open[token_id] = is_open
+            # Report every flip, and the initial state only if it is already open
+            if self.on_cross is None or (first and not is_open):
+                return
+            asks = book.ask_levels()
+        self.on_cross(token_id, asks, is_open)
+
+    def run(self, feed, stop_event=None):
+        """Apply every message from feed until it ends or stop_event is set"""
+        for message in feed:
+            self.handle(message)
+            if stop_event is not None and stop_event.is_set():
+                break
+
+
+class ReplayFeed:
+    """
+    Messages from a JSONL recording (one websocket frame per line). With speed > 0 the gaps
+    between the frames' timestamps (ms) are replayed, divided by speed; by default as fast as possible.
+
+    The feed remembers how far it got: iterating it again (a feed restarted on new tokens) picks
+    up after the last frame played instead of replaying the recording from the start.
+    """
+
+    def __init__(self, path, speed=0.0, stop_event=None):
+        self.path = path
+        self.speed = speed
+        self.stop_event = stop_event or threading.Event()
+        self.offset = 0  # File position after the last frame played
+
+    def __iter__(self):
+        last_ts = None
+        with open(self.path) as f:
+            f.seek(self.offset)
+            for line in iter(f.readline, ""):
+                if self.stop_event.is_set():
+                    return
+                self.offset = f.tell()
+                if not line.strip():
+                    continue
+                message = json.loads(line)
+                if self.speed > 0:
+                    first = message[0] if isinstance(message, list) and message else message
+                    ts = float(first.get("timestamp", 0) or 0) if isinstance(first, dict) else 0
+                    if last_ts is not None and ts > last_ts and self.stop_event.wait((ts - last_ts) / 1000 / self.speed):
+                        return
+                    last_ts = ts
+                yield message
+
+
+class ClobSnapshotPoller:
+    """Full books for token_ids every interval seconds through py_clob_client, as "book" messages"""
+
+    def __init__(self, client, token_ids, interval=2.0, stop_event=None):
+        self.client = client
+        self.token_ids = list(token_ids)
+        self.interval = interval
+        self.stop_event = stop_event or threading.Event()
+
+    def __iter__(self):
+        from py_clob_client.clob_types import BookParams
+
+        params = [BookParams(token_id=token_id) for token_id in self.token_ids]
+        while not self.stop_event.is_set():
+            try:
+                summaries = self.client.get_order_books(params)
+            except Exception as e:
+                print(f"Error polling CLOB order books: {e}")
+                summaries = []
+
+            for summary in summaries:
+                yield {
+                    "event_type": "book",
+                    "asset_id": summary.asset_id,
+                    "market": summary.market,
+                    "bids": [{"price": level.price, "size": level.size} for level in summary.bids or ()],
+                    "asks": [{"price": level.price, "size": level.size} for level in summary.asks or ()],
+                    "timestamp": summary.timestamp,
+                    "hash": summary.hash,
+                }
+            self.stop_event.wait(self.interval)
+
+
+class ClobWebSocketFeed:
+    """
+    Live market-channel messages for token_ids. Reconnects (and so gets fresh "book" messages)
+    after a drop. With record_to every frame is also appended to that JSONL file for ReplayFeed.
+    Raises ImportError when constructed without websocket-client installed.
+    """
+
+    def __init__(self, token_ids, url=CLOB_MARKET_WS, record_to=None, reconnect_delay=2.0, stop_event=None):
+        import websocket  # websocket-client, only needed for live streaming; checked here, not on the feed thread
+
+        self.websocket = websocket
+        self.token_ids = list(token_ids)
+        self.url = url
+        self.record_to = record_to
+        self.reconnect_delay = reconnect_delay
+        self.stop_event = stop_event or threading.Event()
+
+    def __iter__(self):
+        websocket = self.websocket
+        record = open(self.record_to, "a") if self.record_to else None
+        try:
+            while not self.stop_event.is_set():
+                ws = None
+                try:
+                    ws = websocket.create_connection(self.url, timeout=10)
+                    ws.send(json.dumps({"assets_ids": self.token_ids, "type": "market"}))
+                    while not self.stop_event.is_set():
+                        try:
+                            frame = ws.recv()
+                        except websocket.WebSocketTimeoutException:
+                            ws.send("PING")  # Quiet market, keep the socket alive
+                            continue
+                        if not frame or frame == "PONG":
+                            continue
+                        if record:
+                            record.write(frame.strip() + "\n")
+                        yield json.loads(frame)
+                except (websocket.WebSocketException, OSError, ValueError) as e:
+                    print(f"CLOB websocket error: {e}, reconnecting in {self.reconnect_delay}s")
+                    self.stop_event.wait(self.reconnect_delay)
+                finally:
+                    if ws is not None:
+                        ws.close()
+        finally:
+            if record:
+                record.close()
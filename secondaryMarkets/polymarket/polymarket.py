@@ -1,71 +1,233 @@
-import requests
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from py_clob_client.client import ClobClient
+from common.http_client import http_client
+from common.metrics import metrics
+from common.json_stream import StreamingJsonArrayWriter, iter_json_array
+from secondaryMarkets.polymarket.orderbook import (
+    CLOB_MARKET_WS, ClobSnapshotPoller, ClobWebSocketFeed, OrderBookManager, ReplayFeed,
+)
 from dotenv import load_dotenv
 load_dotenv()
 
+BOOK_POLL_FALLBACK = 2.0  # Seconds between REST book polls when the websocket can't be used
+
 class PolymarketAPI:
-    def __init__(self):
-        self.gammaAPI = "https://gamma-api.polymarket.com/events"
+    def __init__(self, max_workers=None):
+        # Overridable so the fetchers can run against the local upstream simulator
+        self.gammaAPI = os.getenv("POLYMARKET_GAMMA_API", "https://gamma-api.polymarket.com/events")
         self.output_file = 'jsonOutputs/gamma_events.json'
         self.limit = 100  # Number of events per request
+        # Number of offset windows fetched in parallel, 1 walks the pages serially
+        self.max_workers = max_workers or int(os.getenv("POLYMARKET_FETCH_WORKERS", 4))
+        http_client.configure_host(self.gammaAPI, pool_size=self.max_workers)
         self.clobAPI = "https://clob.polymarket.com"
+        self.clobWS = CLOB_MARKET_WS
         self.private_key = os.getenv("POLYMARKET_PRIVATE_KEY")
         self.chain_id = 137  # Polygon Mainnet chain ID for eth layer 2 transactions 
         self.relevantInfo = []
+        self._replay_feeds = {}  # recording path -> ReplayFeed, so restarted feeds resume where they were
 
-    def get_and_save_all_events(self):
-        all_events = []
-        offset = 0
+    def _fetch_page(self, offset, predicate=None):
+        """
+        Fetch one offset window of events. Returns (events, page_size), or None if the page could
+        not be retrieved. With a predicate the body is parsed one event at a time while it downloads
+        and only matching events are kept; page_size still counts every event for last-page detection.
+        """
+        with metrics.span("page_fetch_seconds", venue="polymarket"):
+            page = self._fetch_page_body(offset, predicate)
+        if page is not None:
+            metrics.incr("pages_fetched_total", venue="polymarket")
+            metrics.incr("events_scanned_total", page[1], venue="polymarket")
+            metrics.incr("events_kept_total", len(page[0]), venue="polymarket")
+        return page
 
-        while True:
-            # Construct the URL with offset and limit
-            url = f"{self.gammaAPI}?offset={offset}&limit={self.limit}&active=true&closed=false"
-            response = requests.get(url)
-            
-            print(f"Fetching events starting at offset {offset}. Response status code: {response.status_code}")
+    def _fetch_page_body(self, offset, predicate):
+        # Construct the URL with offset and limit
+        url = f"{self.gammaAPI}?offset={offset}&limit={self.limit}&active=true&closed=false"
+        response = http_client.get(url, stream=predicate is not None)
 
-            if response.status_code != 200:
-                print(f"Error retrieving events at offset {offset}: {response.text}")
-                break
+        print(f"Fetching events starting at offset {offset}. Response status code: {response.status_code}")
+
+        if response.status_code != 200:
+            print(f"Error retrieving events at offset {offset}: {response.text}")
+            return None
 
+        if predicate is not None:
+            events = []
+            page_size = 0
             try:
-                events = response.json()
-            except json.JSONDecodeError as e:
+                for event in iter_json_array(self._counted_chunks(response.iter_content(chunk_size=65536))):
+                    page_size += 1
+                    if predicate(event):
+                        events.append(event)
+            except ValueError as e:
                 print(f"Error decoding JSON at offset {offset}: {e}")
-                print(f"Full response content: {response.text}")
-                break
+                return None
+            finally:
+                response.close()
+
+            print(f"Retrieved {page_size} events at offset {offset}, kept {len(events)}")
+            return events, page_size
 
-            # Ensure that the response is in the expected format (a list)
-            if not isinstance(events, list):
-                print(f"Unexpected response format at offset {offset}")
+        metrics.incr("bytes_fetched_total", len(response.content), venue="polymarket")
+        try:
+            events = response.json()
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON at offset {offset}: {e}")
+            print(f"Full response content: {response.text}")
+            return None
+
+        # Ensure that the response is in the expected format (a list)
+        if not isinstance(events, list):
+            print(f"Unexpected response format at offset {offset}")
+            return None
+
+        print(f"Retrieved {len(events)} events at offset {offset}")
+        return events, len(events)
+
+    @staticmethod
+    def _counted_chunks(chunks):
+        """Pass the body chunks through, adding their size to bytes_fetched_total once the body is read"""
+        if not metrics.enabled:
+            return chunks
+
+        def counted():
+            size = 0
+            try:
+                for chunk in chunks:
+                    size += len(chunk)
+                    yield chunk
+            finally:
+                metrics.incr("bytes_fetched_total", size, venue="polymarket")
+        return counted()
+
+    def _iter_pages_serial(self, predicate=None):
+        offset = 0
+
+        while True:
+            page = self._fetch_page(offset, predicate)
+            if page is None:
                 break
 
-            # Add the retrieved events to the list of all events
-            all_events.extend(events)
-            
-            print(f"Retrieved {len(events)} events at offset {offset}")
+            events, page_size = page
+            yield events
 
             # If the number of events returned is less than the limit, we've hit the last page
-            if len(events) < self.limit:
+            if page_size < self.limit:
                 break
 
             # Increment the offset to get the next batch of events
             offset += self.limit
 
-        print(f"Total number of events retrieved: {len(all_events)}")
+    def _iter_pages_concurrent(self, max_workers, predicate=None):
+        # Keep up to max_workers offset windows (0-100, 100-200, ...) in flight and
+        # hand pages back strictly in offset order so the output matches the serial walk
+        last_offset = [None]  # Lowest offset seen returning a short page
+
+        def on_done(offset, future):
+            if future.cancelled() or future.exception() is not None:
+                return
+            page = future.result()
+            if page is not None and page[1] < self.limit:
+                if last_offset[0] is None or offset < last_offset[0]:
+                    last_offset[0] = offset
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            next_offset = 0
+            expected_offset = 0
+
+            try:
+                while True:
+                    # Top up the window, never scheduling past a page we already know is the last
+                    while len(pending) < max_workers and (last_offset[0] is None or next_offset <= last_offset[0]):
+                        future = executor.submit(self._fetch_page, next_offset, predicate)
+                        future.add_done_callback(partial(on_done, next_offset))
+                        pending[next_offset] = future
+                        next_offset += self.limit
+
+                    if expected_offset not in pending:
+                        break
 
-        # Save the events to a file
-        if os.path.exists(self.output_file):
-            os.remove(self.output_file)
-            print(f"Deleted existing {self.output_file}")
+                    page = pending.pop(expected_offset).result()
+                    if page is None:
+                        break
 
-        with open(self.output_file, 'w') as f:
-            json.dump(all_events, f, indent=4)
+                    events, page_size = page
+                    yield events
 
+                    if page_size < self.limit:
+                        break
+
+                    expected_offset += self.limit
+            finally:
+                for future in pending.values():
+                    future.cancel()
+
+    def iter_event_pages(self, max_workers=None, predicate=None):
+        """
+        Yield pages of events in offset order, fetching up to max_workers windows at once.
+        When a predicate is given each page only holds the events it accepts.
+        """
+        max_workers = max_workers or self.max_workers
+        if max_workers > 1:
+            return self._iter_pages_concurrent(max_workers, predicate)
+        return self._iter_pages_serial(predicate)
+
+    def get_and_save_all_events(self, max_workers=None):
+        # Each page is streamed to a temp file as it arrives and renamed over the old snapshot at the end
+        with StreamingJsonArrayWriter(self.output_file, indent=4) as writer:
+            for events in self.iter_event_pages(max_workers):
+                writer.write_page(events)
+
+        print(f"Total number of events retrieved: {writer.count}")
         print(f"All Polymarket events have been saved to {self.output_file}")
 
+    def order_book_feed(self, token_ids, replay_file=None, poll_interval=None, record_to=None, stop_event=None,
+                        replay_speed=0.0):
+        """
+        Market-channel messages for token_ids: replayed from replay_file (at replay_speed times the
+        recorded pace, 0 for as fast as possible), polled through the CLOB REST API every
+        poll_interval seconds, or (by default) streamed from the websocket. Without websocket-client
+        installed the default falls back to polling every BOOK_POLL_FALLBACK seconds.
+        """
+        if replay_file:
+            feed = self._replay_feeds.get(replay_file)
+            if feed is None:
+                feed = self._replay_feeds[replay_file] = ReplayFeed(replay_file, replay_speed)
+            feed.speed = replay_speed
+            feed.stop_event = stop_event or threading.Event()
+            return feed
+        if not poll_interval:
+            try:
+                return ClobWebSocketFeed(token_ids, self.clobWS, record_to=record_to, stop_event=stop_event)
+            except ImportError:
+                print(f"websocket-client is not installed, polling the order books every {BOOK_POLL_FALLBACK}s instead "
+                      "(pip install websocket-client to stream them)")
+                poll_interval = BOOK_POLL_FALLBACK
+        # Book reads are public, no key needed
+        return ClobSnapshotPoller(ClobClient(self.clobAPI), token_ids, poll_interval, stop_event)
+
+    def start_order_books(self, token_ids, on_cross=None, manager=None, **feed_options):
+        """
+        Keep live books for token_ids on a background thread. Returns (manager, stop_event);
+        call manager.watch(token_id, max_ask) to have on_cross fire when that token's ask crosses it.
+        Passing the manager of a previous feed (stopped through its stop_event) moves it to the new
+        token_ids, keeping the books and thresholds of the tokens in both.
+        """
+        stop_event = threading.Event()
+        if manager is None:
+            manager = OrderBookManager(token_ids, on_cross)
+        else:
+            manager.track(token_ids)
+        feed = self.order_book_feed(token_ids, stop_event=stop_event, **feed_options)
+        threading.Thread(target=manager.run, args=(feed, stop_event), daemon=True).start()
+        return manager, stop_event
+
     def generate_api_key(self):
         if not self.private_key:
             raise ValueError("Private key not found. Please set Polymarket_private_key in the .env file.")
@@ -1,15 +1,12 @@
-import json
-from odds_api import getOdds
+from odds_api import get_cached_odds
 
 def main():
     print("Fetching NBA odds data...")
-    odds_data = getOdds("basketball_nba")
+    odds_data = get_cached_odds("basketball_nba")
     
     if odds_data:
-        data = json.loads(odds_data)
-        
-        # Extract remaining requests info
-        remaining_requests = data.pop()['remaining_requests']
+        data = odds_data['games']
+        remaining_requests = odds_data['remaining_requests']
         
         # Get a set of all bookmakers across all games
         all_bookmakers = set()
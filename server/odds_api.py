@@ -1,44 +1,26 @@
 import requests
 import os
+import sys
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from functools import lru_cache
 
+# The server is started from inside server/, make the shared modules at the repo root importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.http_client import http_client
+from common.metrics import metrics
+from common.timeutil import to_epoch
+from odds_cache import SharedOddsCache
+
 # env
 from dotenv import load_dotenv
 load_dotenv()
 ODDS_API = os.getenv('ODDSAPI')
-
-# Implementing caching to reduce the number of requests to the API
-class Cache:
-    def __init__(self):
-        # Cache will just be a dictionary with the sport as the key and the value as the timestamp and the data
-        self.cache = {}
-        self.cache_duration = timedelta(minutes=15) # Cache for 15 minutes
-
-    def get_cached_odds(self, sport):
-        # Get the current time
-        current_time = datetime.now()
-
-        # Check if the sport is in the cache and if it has expired
-        if sport in self.cache:
-            # Getting the data and timestamp from our dictionary (cache)
-            data, timestamp = self.cache[sport]
-
-            # Check if the cache has expired
-            if current_time - timestamp < self.cache_duration:
-                print(f"Returning cached data for {sport}")
-                return data
-
-        # If the cache has expired, get fresh data from the API, just need to call our getOdds function
-        print("Fetching new data...")
-        new_data = getOdds(sport)
-        if new_data:
-            self.cache[sport] = (new_data, current_time)
-        return new_data
+ODDS_API_BASE = os.getenv('ODDS_API_BASE', 'https://api.the-odds-api.com/v4')
 
 def getOdds(sport):
-    url = "https://api.the-odds-api.com/v4/sports/" + sport + "/odds"
+    """Odds for sport as {"games": [...], "remaining_requests": ...}, or None on failure"""
+    url = ODDS_API_BASE + "/sports/" + sport + "/odds"
     params = {
         "apiKey": ODDS_API,
         "regions": "us",
@@ -47,8 +29,11 @@ def getOdds(sport):
     }
 
     try:
-        response = requests.get(url, params=params)
+        with metrics.span("page_fetch_seconds", venue="oddsapi"):
+            response = http_client.get(url, params=params)
+        metrics.incr("pages_fetched_total", venue="oddsapi", status=response.status_code)
         response.raise_for_status()  # Raises an HTTPError for bad responses
+        metrics.incr("bytes_fetched_total", len(response.content), venue="oddsapi")
 
         data = response.json()
         formatted_data = []
@@ -58,6 +43,7 @@ def getOdds(sport):
                 "home_team": game["home_team"],
                 "away_team": game["away_team"],
                 "commence_time": datetime.fromisoformat(game["commence_time"].replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M:%S"),
+                "commence_ts": to_epoch(game["commence_time"]),  # UTC epoch, used for matching
                 "bookmakers": []
             }
 
@@ -65,6 +51,7 @@ def getOdds(sport):
                 bookmaker_data = {
                     "name": bookmaker["title"],
                     "last_update": datetime.fromisoformat(bookmaker["last_update"].replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M:%S"),
+                    "last_update_ts": to_epoch(bookmaker["last_update"]),
                     "odds": {}
                 }
 
@@ -79,9 +66,10 @@ def getOdds(sport):
 
         # Add remaining requests information
         remaining_requests = response.headers.get('x-requests-remaining', 'Unknown')
-        formatted_data.append({"remaining_requests": remaining_requests})
+        if remaining_requests.isdigit():
+            metrics.set_gauge("oddsapi_requests_remaining", int(remaining_requests))
 
-        return json.dumps(formatted_data, indent=2)
+        return {"games": formatted_data, "remaining_requests": remaining_requests}
 
     # Handle hella excpetions
     except requests.exceptions.RequestException as e:
@@ -109,8 +97,13 @@ def getOdds(sport):
         print(f"An unexpected error occurred: {e}")
         return None
 
-odds_cache = Cache()
+# Caching to reduce the number of requests to the API, shared by every server worker and CLI run
+odds_cache = SharedOddsCache(fetch=getOdds)
 
 # Get the cached odds for the sport
 def get_cached_odds(sport):
-    return odds_cache.get_cached_odds(sport)
\ No newline at end of file
+    return odds_cache.get_odds(sport)
+
+# Cached odds as (JSON text, version), for callers that only re-encode when the version changes
+def get_cached_odds_entry(sport):
+    return odds_cache.get_entry(sport)
@@ -0,0 +1,248 @@
+"""
+Odds cache shared by every server worker and CLI run on the machine.
+
+Entries live in a SQLite file (WAL mode) so separate processes see the same data. Each sport has
+its own TTL. Refreshes are single-flight: inside a process one thread per sport does the upstream
+call while the others wait for it, and across processes a lease row in the database makes every
+other process wait for the holder's result instead of spending Odds API quota. A background
+pre-warmer refreshes recently requested sports shortly before they expire, so reads stay hits.
+
+Only sports that have been fetched successfully count as requested, so a made-up sport in a URL
+never gets pre-warmed. A failed refresh backs the sport off (RETRY_BASE doubling up to
+RETRY_MAX): until then requests are answered with whatever is stored and nobody calls upstream.
+
+fetch(sport) returns structured data; it is encoded to compact JSON once when stored.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_PATH = os.getenv("ODDS_CACHE_DB", os.path.join(REPO_ROOT, "jsonOutputs", "odds_cache.sqlite3"))
+
+DEFAULT_TTL = 15 * 60  # Seconds, same as the old in-process cache
+SPORT_TTLS = {
+    "basketball_nba": 5 * 60,
+    "icehockey_nhl": 5 * 60,
+    "americanfootball_nfl": 10 * 60,
+}
+
+LEASE_SECONDS = 30  # How long a process may hold a refresh before others take over
+POLL_INTERVAL = 0.05
+RETRY_BASE = 30       # Seconds before retrying a sport whose refresh failed, doubled per failure
+RETRY_MAX = 15 * 60
+TOUCH_INTERVAL = 1.0  # last_requested only feeds the pre-warmer's hot window, coarser writes are enough
+
+
+class SharedOddsCache:
+    def __init__(self, fetch, db_path=DEFAULT_DB_PATH, default_ttl=DEFAULT_TTL, sport_ttls=None):
+        self.fetch = fetch
+        self.db_path = db_path
+        self.default_ttl = default_ttl
+        self.sport_ttls = dict(SPORT_TTLS if sport_ttls is None else sport_ttls)
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._sport_locks = {}
+        self._touched = {}  # sport -> last_requested this process last wrote
+        self._locks_guard = threading.Lock()
+        self._prewarmer = None
+        self._stop = threading.Event()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS odds_cache (
+                    sport TEXT PRIMARY KEY,
+                    payload TEXT,
+                    fetched_at REAL,
+                    expires_at REAL,
+                    last_requested REAL,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    retry_after REAL
+                )
+            """)
+            # Caches created before the retry backoff
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(odds_cache)")}
+            if "retry_after" not in columns:
+                conn.execute("ALTER TABLE odds_cache ADD COLUMN failures INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE odds_cache ADD COLUMN retry_after REAL")
+
+    def ttl_for(self, sport):
+        return self.sport_ttls.get(sport, self.default_ttl)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _sport_lock(self, sport):
+        with self._locks_guard:
+            return self._sport_locks.setdefault(sport, threading.Lock())
+
+    def _read(self, sport):
+        """(payload, expires_at, fetched_at, retry_after) for sport"""
+        row = self._connect().execute(
+            "SELECT payload, expires_at, fetched_at, retry_after FROM odds_cache WHERE sport = ?", (sport,)
+        ).fetchone()
+        if row is None:
+            return None, 0.0, None, None
+        payload, expires_at, fetched_at, retry_after = row
+        return payload, expires_at or 0.0, fetched_at, retry_after
+
+    @staticmethod
+    def _backing_off(retry_after, now):
+        return retry_after is not None and retry_after > now
+
+    def _touch(self, sport, now):
+        # Hits would otherwise each cost a write; skip it while this process's last one is recent
+        if now - self._touched.get(sport, 0.0) < TOUCH_INTERVAL:
+            return
+        self._touched[sport] = now
+        # Never creates a row: a sport is only kept hot once it has been fetched
+        self._connect().execute(
+            "UPDATE odds_cache SET last_requested = ? WHERE sport = ? AND payload IS NOT NULL", (now, sport)
+        )
+
+    def get(self, sport):
+        """Return the cached JSON payload for sport (fresh or not) without fetching."""
+        return self._read(sport)[0]
+
+    def get_entry(self, sport):
+        """
+        (payload, fetched_at) for sport, refreshing through exactly one upstream call when expired.
+        payload is the JSON text as stored; fetched_at identifies the version, so callers can
+        keep whatever they derive from it until it changes. (None, None) if nothing is available.
+        """
+        now = time.time()
+        self._touch(sport, now)
+
+        payload, expires_at, fetched_at, retry_after = self._read(sport)
+        if (payload is not None and expires_at > now) or self._backing_off(retry_after, now):
+            return payload, fetched_at
+
+        # In-process single flight: one thread refreshes, the rest wait and re-read
+        with self._sport_lock(sport):
+            payload, expires_at, fetched_at, retry_after = self._read(sport)
+            now = time.time()
+            if (payload is not None and expires_at > now) or self._backing_off(retry_after, now):
+                return payload, fetched_at
+            return self._refresh(sport, stale=(payload, fetched_at))
+
+    def get_odds(self, sport):
+        """Cached odds for sport as structured data, or None"""
+        payload, _ = self.get_entry(sport)
+        return json.loads(payload) if payload is not None else None
+
+    def _try_lease(self, sport, fresh_until):
+        """Take the cross-process refresh lease. Returns True if this process now owns it."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT expires_at, lease_owner, lease_expires, retry_after FROM odds_cache WHERE sport = ?", (sport,)
+            ).fetchone()
+            expires_at, lease_owner, lease_expires, retry_after = row or (0.0, None, 0.0, None)
+            if (expires_at or 0) > fresh_until:
+                conn.execute("COMMIT")
+                return False  # Someone refreshed it while we were waiting
+            if self._backing_off(retry_after, now):
+                conn.execute("COMMIT")
+                return False  # A recent refresh failed, wait out the backoff
+            if lease_owner and lease_owner != self.owner and (lease_expires or 0) > now:
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                "INSERT INTO odds_cache (sport, lease_owner, lease_expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(sport) DO UPDATE SET lease_owner = excluded.lease_owner, lease_expires = excluded.lease_expires",
+                (sport, self.owner, now + LEASE_SECONDS),
+            )
+            conn.execute("COMMIT")
+            return True
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _refresh(self, sport, stale=(None, None), ahead=0.0):
+        """Refresh unless the entry is valid for more than `ahead` seconds (pre-warming refreshes early)."""
+        deadline = time.time() + LEASE_SECONDS
+        while not self._try_lease(sport, time.time() + ahead):
+            # Another process is fetching, wait for its result
+            payload, expires_at, fetched_at, retry_after = self._read(sport)
+            if payload is not None and expires_at > time.time() + ahead:
+                return payload, fetched_at
+            if self._backing_off(retry_after, time.time()):
+                return payload, fetched_at
+            if time.time() > deadline:
+                return payload, fetched_at
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            print(f"Fetching new {sport} odds from upstream...")
+            data = self.fetch(sport)
+            payload = json.dumps(data, separators=(",", ":")) if data is not None else None
+        except Exception as e:
+            print(f"Error refreshing {sport} odds: {e}")
+            payload = None
+
+        now = time.time()
+        if payload:
+            self._connect().execute(
+                "UPDATE odds_cache SET payload = ?, fetched_at = ?, expires_at = ?, lease_owner = NULL, lease_expires = NULL, "
+                "failures = 0, retry_after = NULL, last_requested = MAX(COALESCE(last_requested, 0), ?) WHERE sport = ?",
+                (payload, now, now + self.ttl_for(sport), now if not ahead else 0, sport),
+            )
+            return payload, now
+
+        # Failed upstream call: back off, release the lease and serve whatever we had
+        self._connect().execute(
+            "UPDATE odds_cache SET lease_owner = NULL, lease_expires = NULL, failures = failures + 1, "
+            "retry_after = ? + MIN(?, ? * (1 << MIN(failures, 10))) WHERE sport = ? AND lease_owner = ?",
+            (now, RETRY_MAX, RETRY_BASE, sport, self.owner),
+        )
+        return stale
+
+    def _due_for_prewarm(self, hot_window, refresh_ahead):
+        now = time.time()
+        rows = self._connect().execute(
+            "SELECT sport, expires_at FROM odds_cache WHERE last_requested > ? AND payload IS NOT NULL "
+            "AND (retry_after IS NULL OR retry_after <= ?)",
+            (now - hot_window, now),
+        ).fetchall()
+        return [sport for sport, expires_at in rows
+                if (expires_at or 0) - now < self.ttl_for(sport) * refresh_ahead]
+
+    def _prewarm_loop(self, interval, hot_window, refresh_ahead):
+        while not self._stop.wait(interval):
+            try:
+                for sport in self._due_for_prewarm(hot_window, refresh_ahead):
+                    with self._sport_lock(sport):
+                        payload, _, fetched_at, _ = self._read(sport)
+                        self._refresh(sport, stale=(payload, fetched_at), ahead=self.ttl_for(sport) * refresh_ahead)
+            except sqlite3.Error as e:
+                print(f"Odds pre-warmer error: {e}")
+
+    def start_prewarmer(self, interval=15, hot_window=30 * 60, refresh_ahead=0.2):
+        """
+        Refresh sports requested in the last hot_window seconds once less than refresh_ahead of
+        their TTL is left. Safe to start in every worker: refreshes are single-flight.
+        """
+        if self._prewarmer and self._prewarmer.is_alive():
+            return
+        self._stop.clear()
+        self._prewarmer = threading.Thread(
+            target=self._prewarm_loop, args=(interval, hot_window, refresh_ahead), daemon=True
+        )
+        self._prewarmer.start()
+
+    def stop_prewarmer(self):
+        self._stop.set()
@@ -1,54 +1,240 @@
-from flask import Flask, jsonify
-from odds_api import getOdds
+from flask import Flask, Response, g, jsonify, request
+from odds_api import get_cached_odds_entry, odds_cache
+from common.metrics import LATEST_SCAN_SUMMARY, metrics, read_summary, render_prometheus
+import argparse
+import gzip
+import hashlib
 import json
 import asyncio
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
 
 app = Flask(__name__)
 executor = ThreadPoolExecutor()
 
+GZIP_MIN_BYTES = 1024  # Smaller bodies aren't worth compressing
+MAX_BATCH_SPORTS = 12
+
+class EncodedOdds:
+    """One sport's /odds response, encoded once per cache version and reused for every request"""
+    __slots__ = ("version", "body", "remaining_requests", "etag", "_gzipped")
+
+    def __init__(self, version, body, remaining_requests):
+        self.version = version
+        self.body = body
+        self.remaining_requests = remaining_requests
+        # Content hash, so every worker (and a refresh with unchanged odds) hands out the same tag
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self._gzipped = None
+
+    @property
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+encoded_odds = {}
+encoded_odds_lock = threading.Lock()
+
+def build_odds_response(odds):
+    game_data = odds['games']
+
+    # Get a set of all bookmakers across all games
+    all_bookmakers = set()
+    for game in game_data:
+        all_bookmakers.update(bookmaker['name'] for bookmaker in game['bookmakers'])
+
+    # Process the odds data
+    formatted_data = {}
+    for index, game in enumerate(game_data, start=1):
+        game_key = f"Game {index}"
+        game_info = {
+            "away_team": game['away_team'],
+            "home_team": game['home_team'],
+            "commence_time": game['commence_time'],
+            "commence_ts": game.get('commence_ts'),
+            "bookmakers": game['bookmakers'],
+            # Sorted, a set's order changes with PYTHONHASHSEED and would change the ETag between processes
+            "missing_bookmakers": sorted(all_bookmakers - set(bookmaker['name'] for bookmaker in game['bookmakers']))
+        }
+        formatted_data[game_key] = game_info
+
+    return {
+        "odds_data": formatted_data,
+        "remaining_requests": odds['remaining_requests']
+    }
+
+def get_encoded_odds(sport):
+    """Encoded response for sport, rebuilt only when the shared cache holds a new version"""
+    payload, version = get_cached_odds_entry(sport)
+    if payload is None:
+        return None
+
+    entry = encoded_odds.get(sport)
+    if entry is not None and entry.version == version:
+        return entry
+
+    metrics.incr("odds_encodes_total", sport=sport)
+    response = build_odds_response(json.loads(payload))
+    body = json.dumps(response, separators=(",", ":")).encode()
+    entry = EncodedOdds(version, body, response['remaining_requests'])
+    with encoded_odds_lock:
+        encoded_odds[sport] = entry
+    return entry
+
 async def async_get_odds(sport):
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, getOdds, sport)
+    return await loop.run_in_executor(executor, get_encoded_odds, sport)
+
+def timed_get_encoded_odds(sport):
+    start = time.perf_counter()
+    try:
+        entry = get_encoded_odds(sport)
+    except Exception as e:
+        print(f"Error getting {sport} odds: {e}")
+        entry = None
+    return entry, round((time.perf_counter() - start) * 1000, 2)
+
+def lowest_remaining(values):
+    """The quota is per API key, so the smallest count reported is the current one"""
+    counts = [int(value) for value in values if str(value).isdigit()]
+    return min(counts) if counts else "Unknown"
+
+def gzip_if_accepted(body, headers, compressed=None):
+    """body gzipped when it's large enough and the client accepts it; compressed() returns an already gzipped copy"""
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.accept_encodings:
+        headers["Content-Encoding"] = "gzip"
+        return compressed() if compressed else gzip.compress(body, compresslevel=6)
+    return body
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe("request_seconds", time.perf_counter() - started, route=route)
+        metrics.incr("requests_total", route=route, status=response.status_code)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """This server's counters and timings, plus the summary of the latest main.py run, in Prometheus text format"""
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled, start the server with ARB_METRICS=1"}), 404
+    summaries = [(metrics.summary(), {"process": "server"})]
+    scan_summary = read_summary(LATEST_SCAN_SUMMARY)
+    if scan_summary is not None:
+        summaries.append((scan_summary, {"process": "scan"}))
+    return Response(render_prometheus(*summaries), mimetype="text/plain; version=0.0.4")
 
 @app.route('/api/<sport>/odds', methods=['GET'])
 async def sport_odds(sport):
     print(f"Fetching {sport} odds data...")
-    odds_data = await async_get_odds(sport)
-    
-    if odds_data:
-        data = json.loads(odds_data)
-        
-        # Extract remaining requests info without modifying the original data
-        remaining_requests = data[-1]['remaining_requests']
-        game_data = data[:-1]  # Exclude the last item which contains remaining requests
-        
-        # Get a set of all bookmakers across all games
-        all_bookmakers = set()
-        for game in game_data:
-            all_bookmakers.update(bookmaker['name'] for bookmaker in game['bookmakers'])
-        
-        # Process the odds data
-        formatted_data = {}
-        for index, game in enumerate(game_data, start=1):
-            game_key = f"Game {index}"
-            game_info = {
-                "away_team": game['away_team'],
-                "home_team": game['home_team'],
-                "commence_time": game['commence_time'],
-                "bookmakers": game['bookmakers'],
-                "missing_bookmakers": list(all_bookmakers - set(bookmaker['name'] for bookmaker in game['bookmakers']))
-            }
-            formatted_data[game_key] = game_info
-        
-        response = {
-            "odds_data": formatted_data,
-            "remaining_requests": remaining_requests
-        }
-        
-        return jsonify(response), 200
-    else:
+    entry = await async_get_odds(sport)
+
+    if entry is None:
         return jsonify({"error": "Failed to retrieve odds data"}), 500
 
+    headers = {"ETag": f'"{entry.etag}"', "Vary": "Accept-Encoding"}
+    if request.if_none_match.contains(entry.etag):
+        return Response(status=304, headers=headers)
+
+    body = gzip_if_accepted(entry.body, headers, lambda: entry.gzipped)
+    return Response(body, status=200, mimetype="application/json", headers=headers)
+
+@app.route('/api/odds', methods=['GET'])
+async def batch_odds():
+    """
+    Odds for several sports in one call: /api/odds?sports=basketball_nba,icehockey_nhl
+    Sports are fetched concurrently; the response holds each sport's /odds payload (or an error),
+    the time each took, and the remaining Odds API quota. When every sport is available the
+    response carries an ETag built from the sports' own, so pollers can revalidate with
+    If-None-Match and get a 304 until one of them changes.
+    """
+    sports = list(dict.fromkeys(s.strip() for s in request.args.get('sports', '').split(',') if s.strip()))
+    if not sports:
+        return jsonify({"error": "Pass the sports to fetch, e.g. ?sports=basketball_nba,icehockey_nhl"}), 400
+    if len(sports) > MAX_BATCH_SPORTS:
+        return jsonify({"error": f"At most {MAX_BATCH_SPORTS} sports per request"}), 400
+
+    print(f"Fetching odds data for {', '.join(sports)}...")
+    loop = asyncio.get_event_loop()
+    results = await asyncio.gather(*(loop.run_in_executor(executor, timed_get_encoded_odds, sport) for sport in sports))
+
+    headers = {"Vary": "Accept-Encoding"}
+    if all(entry is not None for entry, _ in results):
+        tags = ",".join(f"{sport}={entry.etag}" for sport, (entry, _) in zip(sports, results))
+        etag = hashlib.sha1(tags.encode()).hexdigest()[:20]
+        headers["ETag"] = f'"{etag}"'
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+
+    # Splice the per-sport bodies in as they are, they are already encoded
+    parts, timing, failed = [], {}, []
+    for sport, (entry, elapsed_ms) in zip(sports, results):
+        timing[sport] = elapsed_ms
+        if entry is None:
+            failed.append(sport)
+            parts.append(json.dumps(sport).encode() + b':{"error":"Failed to retrieve odds data"}')
+        else:
+            parts.append(json.dumps(sport).encode() + b":" + entry.body)
+
+    summary = {
+        "timing_ms": timing,
+        "failed": failed,
+        "remaining_requests": lowest_remaining(entry.remaining_requests for entry, _ in results if entry is not None),
+    }
+    body = b'{"sports":{' + b",".join(parts) + b"}," + json.dumps(summary, separators=(",", ":")).encode()[1:]
+
+    body = gzip_if_accepted(body, headers)
+    status = 500 if len(failed) == len(sports) else 200
+    return Response(body, status=status, mimetype="application/json", headers=headers)
+
+def serve_production(host, port, workers, threads):
+    """
+    Serve app from several gunicorn worker processes with a thread pool each. The odds cache is
+    shared through SQLite, so workers reuse each other's Odds API fetches. Metrics are kept per
+    worker, so /metrics shows whichever worker answers.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("Production mode needs gunicorn: pip install gunicorn")
+        raise SystemExit(1)
+
+    class OddsServerApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", threads)
+            self.cfg.set("accesslog", None)
+            # Threads don't survive the fork, every worker starts its own pre-warmer
+            self.cfg.set("post_worker_init", lambda worker: odds_cache.start_prewarmer())
+
+        def load(self):
+            return app
+
+    OddsServerApplication().run()
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Serve cached Odds API data for the scanners")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Serve from this many gunicorn worker processes instead of the Flask dev server")
+    parser.add_argument("--threads", type=int, default=8, help="Request threads per gunicorn worker")
+    args = parser.parse_args()
+
+    if args.workers:
+        serve_production(args.host, args.port, args.workers, args.threads)
+    else:
+        # Keep recently polled sports fresh so requests are served from the shared cache
+        odds_cache.start_prewarmer()
+        app.run(host=args.host, port=args.port)
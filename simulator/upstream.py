@@ -0,0 +1,321 @@
+"""
+Local stand-in for every upstream the scanners call, so the whole pipeline runs with no network,
+keys or quota:
+
+    python simulator/upstream.py --port 9000 --games 80 --latency 0.05 polymarket=0.2 --error-rate 0.01
+
+then start the odds server and main.py with the environment it prints. Served endpoints:
+  - Polymarket Gamma /events, offset/limit pagination over a catalogue of --gamma-events events
+  - Kalshi /events (cursor pagination, series filter), /events/<ticker>, /series and /markets/<ticker>/orderbook
+  - The Odds API /sports/<sport>/odds with x-requests-remaining / x-requests-used, 429 once --odds-quota is spent
+  - Discord webhooks: 204 with X-RateLimit-* headers, 429 + retry_after past 5 posts per 2 seconds
+  - The exchange rate API's /latest/CAD
+
+Every venue serves the same slate of games (see benchmarks/payloads.py), so the matcher finds
+them all. --latency, --error-rate (500s) and --rate-limit-rate (random 429s) take a default
+and/or per-upstream values (polymarket, kalshi, oddsapi, discord, fx). GET /_sim/stats returns
+request counts per upstream and status.
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.payloads import (
+    BASE_BOOKS, BASE_GAMES, OTHER_EVENTS, gamma_events, kalshi_game_events, make_slate, odds_api_raw,
+)
+
+UPSTREAMS = ("polymarket", "kalshi", "oddsapi", "discord", "fx")
+KALSHI_NOISE_SERIES = ("KXFEDDECISION", "KXHIGHNY", "KXBTCD")
+DISCORD_LIMIT = 5       # Posts per webhook per window, Discord's webhook default
+DISCORD_WINDOW = 2.0    # Seconds
+
+
+def per_upstream(values, default):
+    """Parse ["0.05", "polymarket=0.2"] into {upstream: value}; a bare number sets every upstream"""
+    result = dict.fromkeys(UPSTREAMS, default)
+    for value in values or ():
+        name, _, number = value.rpartition("=")
+        if name and name not in UPSTREAMS:
+            raise argparse.ArgumentTypeError(f"unknown upstream {name!r}, expected one of {', '.join(UPSTREAMS)}")
+        for upstream in ([name] if name else UPSTREAMS):
+            result[upstream] = float(number)
+    return result
+
+
+def _cursor(offset):
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode()
+
+
+def _offset(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode().split(":", 1)[1])
+    except (ValueError, IndexError):
+        return None
+
+
+class UpstreamSimulator:
+    """Payloads and counters behind the handler; prices are regenerated every reprice_every seconds"""
+
+    def __init__(self, games=BASE_GAMES, books=BASE_BOOKS, gamma_events=OTHER_EVENTS, kalshi_noise_events=200,
+                 odds_quota=500, reprice_every=0, latency=None, error_rate=None, rate_limit_rate=None, seed=0):
+        self.games = games
+        self.books = books
+        self.other_gamma_events = gamma_events
+        self.kalshi_noise_events = kalshi_noise_events
+        self.odds_quota = odds_quota
+        self.odds_used = 0
+        self.reprice_every = reprice_every
+        self.latency = latency or dict.fromkeys(UPSTREAMS, 0.0)
+        self.error_rate = error_rate or dict.fromkeys(UPSTREAMS, 0.0)
+        self.rate_limit_rate = rate_limit_rate or dict.fromkeys(UPSTREAMS, 0.0)
+        self.seed = seed
+        self.slate = make_slate(games, seed)
+        self.stats = Counter()
+        self.discord_messages = []
+        self._discord_posts = {}  # webhook path -> post times in the current window
+        self._payloads = (None, None)
+        self._lock = threading.Lock()
+
+    def payloads(self):
+        """(gamma events, kalshi events, odds api games) for the current pricing epoch"""
+        epoch = int(time.time() // self.reprice_every) if self.reprice_every else 0
+        with self._lock:
+            if self._payloads[0] != epoch:
+                seed = self.seed + epoch
+                kalshi = kalshi_game_events(self.slate, seed) + self._kalshi_noise()
+                self._payloads = (epoch, (
+                    list(gamma_events(self.slate, seed, self.other_gamma_events)),
+                    kalshi,
+                    odds_api_raw(self.slate, self.books, seed),
+                ))
+            return self._payloads[1]
+
+    def _kalshi_noise(self):
+        events = []
+        for i in range(self.kalshi_noise_events):
+            series = KALSHI_NOISE_SERIES[i % len(KALSHI_NOISE_SERIES)]
+            ticker = f"{series}-SIM{i}"
+            events.append({
+                "event_ticker": ticker, "series_ticker": series, "title": f"Simulated {series} event {i}",
+                "category": "Economics", "mutually_exclusive": False,
+                "markets": [{"ticker": f"{ticker}-T1", "event_ticker": ticker, "status": "active",
+                             "yes_bid": 40, "yes_ask": 42, "no_bid": 58, "no_ask": 60}],
+            })
+        return events
+
+    def discord_post(self, webhook, content):
+        """(status, headers, body) for one webhook post, enforcing the per-webhook window"""
+        now = time.monotonic()
+        with self._lock:
+            posts = [t for t in self._discord_posts.get(webhook, ()) if now - t < DISCORD_WINDOW]
+            reset_after = DISCORD_WINDOW - (now - posts[0]) if posts else DISCORD_WINDOW
+            headers = {"X-RateLimit-Limit": str(DISCORD_LIMIT), "X-RateLimit-Reset-After": f"{reset_after:.3f}"}
+            if len(posts) >= DISCORD_LIMIT:
+                self._discord_posts[webhook] = posts
+                headers.update({"X-RateLimit-Remaining": "0", "Retry-After": f"{reset_after:.3f}"})
+                body = {"message": "You are being rate limited.", "retry_after": round(reset_after, 3), "global": False}
+                return 429, headers, body
+            posts.append(now)
+            self._discord_posts[webhook] = posts
+            self.discord_messages.append(content)
+            headers["X-RateLimit-Remaining"] = str(DISCORD_LIMIT - len(posts))
+            return 204, headers, None
+
+
+def make_handler(sim):
+    class UpstreamHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real upstreams
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, upstream, status, body=None, headers=None):
+            payload = b"" if body is None else json.dumps(body, separators=(",", ":")).encode()
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if body is not None:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            with sim._lock:
+                sim.stats[f"{upstream} {status}"] += 1
+
+        def _simulate(self, upstream):
+            """Latency and injected failures; returns True when a failure was sent"""
+            latency = sim.latency[upstream]
+            if latency:
+                time.sleep(latency * random.uniform(0.5, 1.5))
+            if random.random() < sim.error_rate[upstream]:
+                self._send(upstream, 500, {"error": "simulated upstream error"})
+                return True
+            if random.random() < sim.rate_limit_rate[upstream]:
+                self._send(upstream, 429, {"error": "simulated rate limit", "retry_after": 1}, {"Retry-After": "1"})
+                return True
+            return False
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            parts = [part for part in url.path.split("/") if part]
+
+            if parts == ["_sim", "stats"]:
+                with sim._lock:
+                    stats = dict(sim.stats)
+                return self._send("sim", 200, {"requests": stats, "discord_messages": len(sim.discord_messages),
+                                               "odds_requests_used": sim.odds_used})
+
+            upstream = parts[0] if parts else ""
+            if upstream not in UPSTREAMS or upstream == "discord":
+                return self._send("unknown", 404, {"error": f"no route for {url.path}"})
+            if self._simulate(upstream):
+                return
+            gamma, kalshi, odds = sim.payloads()
+
+            if upstream == "polymarket" and parts[1:] == ["events"]:
+                offset, limit = int(query.get("offset", 0)), int(query.get("limit", 100))
+                return self._send(upstream, 200, gamma[offset:offset + limit])
+
+            if upstream == "kalshi":
+                return self._kalshi(parts[1:], query, kalshi)
+
+            if upstream == "oddsapi" and len(parts) == 5 and parts[2] == "sports" and parts[4] == "odds":
+                with sim._lock:
+                    if sim.odds_used >= sim.odds_quota:
+                        headers = {"x-requests-remaining": "0", "x-requests-used": str(sim.odds_used)}
+                        return self._send(upstream, 429, {"message": "Usage quota has been reached"}, headers)
+                    sim.odds_used += 1
+                    headers = {"x-requests-remaining": str(sim.odds_quota - sim.odds_used),
+                               "x-requests-used": str(sim.odds_used), "x-requests-last": "1"}
+                games = odds if parts[3] == "basketball_nba" else []
+                return self._send(upstream, 200, games, headers)
+
+            if upstream == "fx" and parts[-2:] == ["latest", "CAD"]:
+                return self._send(upstream, 200, {"base": "CAD", "rates": {"CAD": 1, "USD": 0.73}})
+
+            self._send(upstream, 404, {"error": f"no route for {url.path}"})
+
+        def _kalshi(self, parts, query, events):
+            # parts after /kalshi: trade-api/v2/<resource>...
+            resource = parts[2:]
+            if resource == ["series"]:
+                series = sorted({event["series_ticker"] for event in events})
+                return self._send("kalshi", 200, {"series": [{"ticker": ticker, "category": "Sports" if ticker == "KXNBAGAME"
+                                                              else "Economics"} for ticker in series]})
+            if resource == ["events"]:
+                if query.get("series_ticker"):
+                    events = [event for event in events if event["series_ticker"] == query["series_ticker"]]
+                offset = _offset(query["cursor"]) if query.get("cursor") else 0
+                if offset is None:
+                    return self._send("kalshi", 400, {"error": "invalid cursor"})
+                limit = min(int(query.get("limit", 200)), 200)
+                page = events[offset:offset + limit]
+                if query.get("with_nested_markets") != "true":
+                    page = [{key: value for key, value in event.items() if key != "markets"} for event in page]
+                cursor = _cursor(offset + limit) if offset + limit < len(events) else ""
+                return self._send("kalshi", 200, {"events": page, "cursor": cursor})
+            if len(resource) == 2 and resource[0] == "events":
+                for event in events:
+                    if event["event_ticker"] == resource[1]:
+                        return self._send("kalshi", 200, {"event": event, "markets": event["markets"]})
+                return self._send("kalshi", 404, {"error": "event not found"})
+            if len(resource) == 3 and resource[0] == "markets" and resource[2] == "orderbook":
+                for event in events:
+                    for market in event["markets"]:
+                        if market["ticker"] == resource[1]:
+                            yes, no = market["yes_bid"], market["no_bid"]
+                            return self._send("kalshi", 200, {"orderbook": {
+                                "yes": [[yes - i, 100 * (i + 1)] for i in range(5) if yes - i > 0],
+                                "no": [[no - i, 100 * (i + 1)] for i in range(5) if no - i > 0],
+                            }})
+                return self._send("kalshi", 404, {"error": "market not found"})
+            self._send("kalshi", 404, {"error": "no such resource"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length) if length else b""
+            if parts[:1] != ["discord"] or "webhooks" not in parts:
+                return self._send("unknown", 404, {"error": f"no route for {url.path}"})
+            if self._simulate("discord"):
+                return
+            try:
+                content = json.loads(body or b"{}").get("content", "")
+            except ValueError:
+                return self._send("discord", 400, {"message": "Cannot send an empty message", "code": 50006})
+            if not content or len(content) > 2000:
+                return self._send("discord", 400, {"message": "Invalid Form Body", "code": 50035})
+            status, headers, payload = sim.discord_post(url.path, content)
+            self._send("discord", status, payload, headers)
+
+    return UpstreamHandler
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def environment(host, port):
+    """Environment that points the fetchers at a simulator on host:port"""
+    base = f"http://{host}:{port}"
+    return {
+        "POLYMARKET_GAMMA_API": f"{base}/polymarket/events",
+        "KALSHI_API_BASE": f"{base}/kalshi/trade-api/v2",
+        "ODDS_API_BASE": f"{base}/oddsapi/v4",
+        "ODDSAPI": "simulated-key",
+        "DISCORD_WEBHOOK_URL": f"{base}/discord/api/webhooks/1/simulated",
+        "EXCHANGE_RATE_API": f"{base}/fx/v4/latest/CAD",
+    }
+
+
+def start_simulator(sim, host="127.0.0.1", port=0):
+    """Serve sim on a background thread; returns the server (its port is server.server_address[1])"""
+    server = SimulatorServer((host, port), make_handler(sim))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--games", type=int, default=BASE_GAMES, help="NBA games every venue lists")
+    parser.add_argument("--books", type=int, default=BASE_BOOKS, help="Bookmakers per Odds API game")
+    parser.add_argument("--gamma-events", type=int, default=OTHER_EVENTS,
+                        help="Unrelated Gamma events around the NBA games; pages = total / the client's limit")
+    parser.add_argument("--kalshi-noise-events", type=int, default=200, help="Non-NBA Kalshi events")
+    parser.add_argument("--odds-quota", type=int, default=500, help="Odds API requests before it answers 429")
+    parser.add_argument("--reprice-every", type=float, default=0, help="Seconds between price changes, 0 for static prices")
+    parser.add_argument("--latency", nargs="+", help="Seconds per request, e.g. 0.05 polymarket=0.2")
+    parser.add_argument("--error-rate", nargs="+", help="Fraction of requests answered 500, e.g. 0.01 kalshi=0.1")
+    parser.add_argument("--rate-limit-rate", nargs="+", help="Fraction of requests answered 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sim = UpstreamSimulator(
+        games=args.games, books=args.books, gamma_events=args.gamma_events,
+        kalshi_noise_events=args.kalshi_noise_events, odds_quota=args.odds_quota, reprice_every=args.reprice_every,
+        latency=per_upstream(args.latency, 0.0), error_rate=per_upstream(args.error_rate, 0.0),
+        rate_limit_rate=per_upstream(args.rate_limit_rate, 0.0), seed=args.seed,
+    )
+    server = SimulatorServer((args.host, args.port), make_handler(sim))
+    print(f"Upstream simulator on http://{args.host}:{args.port} with {args.games} games. Point the scanners at it with:")
+    for name, value in environment(args.host, args.port).items():
+        print(f"export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Simulator stopped")
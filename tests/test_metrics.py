@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.metrics import Metrics, render_prometheus
+
+
+def test_mixed_label_types_summarize_and_render():
+    m = Metrics(enabled=True)
+    m.incr("webhook_posts_total", status="error")
+    m.incr("webhook_posts_total", status=204)
+    m.incr("webhook_posts_total", status=204)
+    m.observe("page_fetch_seconds", 0.1, status=200)
+    m.observe("page_fetch_seconds", 0.2, status="timeout")
+    m.set_gauge("queue_depth", 3, shard=1)
+    m.set_gauge("queue_depth", 4, shard="b")
+
+    summary = m.summary()
+
+    counters = {c["labels"]["status"]: c["value"] for c in summary["counters"]}
+    assert counters == {"204": 2, "error": 1}
+    assert len(summary["timings"]) == 2
+    assert len(summary["gauges"]) == 2
+    text = render_prometheus((summary, {"process": "test"}))
+    assert 'arb_webhook_posts_total{process="test",status="204"} 2' in text
+    assert 'arb_webhook_posts_total{process="test",status="error"} 1' in text